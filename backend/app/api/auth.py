@@ -2,8 +2,10 @@ import random
 import hashlib
 
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 
+from sqlalchemy import delete, update
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
 
@@ -13,13 +15,13 @@ from fastapi import Request
 
 from app.models.user import User
 from app.models.refresh_token import RefreshToken
-from app.services.email import send_otp_email
+from app.services.email import email_dispatcher, enqueue_otp_email
 from app.models.password_reset import PasswordResetToken
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_fresh, invalidate_principal
 
 from app.config.database import get_db
-from app.config.security import hash_password, verify_password, create_access_token
+from app.config.security import hash_password_async, verify_password_async, create_access_token
 from app.config.config import settings
 
 from app.schemas.user import UserCreate, UserResponse, UpdateDisplayNameRequest, UpdateDisplayNameResponse
@@ -28,14 +30,77 @@ from app.schemas.auth import ChangeEmailRequest, ChangePasswordRequest, ForgotPa
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
+# The handlers that hash or verify passwords are async so they can await
+# the hashing executor without holding a threadpool slot; their database
+# work goes through run_in_threadpool so it never blocks the event loop.
+
+def _get_user_by_email(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _get_credentials(db: Session, email: str):
+    row = db.query(User.id, User.password_hash).filter(User.email == email).first()
+
+    # End the read so the connection goes back to the pool while bcrypt
+    # runs; a login storm would otherwise pin every pooled connection
+    db.rollback()
+
+    return row
+
+
+def _get_reset_token(db: Session, user_id, otp: str):
+    row = db.query(PasswordResetToken.id, PasswordResetToken.expires_at).filter(
+        PasswordResetToken.user_id == user_id,
+        PasswordResetToken.otp_hash == hashlib.sha256(otp.encode()).hexdigest()
+    ).first()
+
+    # Released before the new password is hashed, like _get_credentials
+    db.rollback()
+
+    return row
+
+
+def _set_password_hash(db: Session, user_id, old_hash: str, new_hash: str) -> bool:
+    """Swap the hash if it is still the one the old password was checked against."""
+    updated = db.execute(
+        update(User)
+        .where(User.id == user_id, User.password_hash == old_hash)
+        .values(password_hash=new_hash)
+    ).rowcount
+
+    db.commit()
+    return bool(updated)
+
+
+def _consume_reset_token(db: Session, token_id, user_id, new_hash: str) -> bool:
+    """Delete the token and set the new hash, unless a concurrent reset used it first."""
+    deleted = db.execute(
+        delete(PasswordResetToken).where(PasswordResetToken.id == token_id)
+    ).rowcount
+
+    if not deleted:
+        db.rollback()
+        return False
+
+    db.execute(update(User).where(User.id == user_id).values(password_hash=new_hash))
+    db.commit()
+    return True
+
+
+def _save(db: Session, instance):
+    db.add(instance)
+    db.commit()
+    db.refresh(instance)
+
+
 @router.post("/register", response_model=UserResponse)
 @limiter.limit("3/minute")
-def register(
+async def register(
     request: Request, 
     user_data: UserCreate, db: 
     Session = Depends(get_db)
     ):
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_in_threadpool(_get_credentials, db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -44,13 +109,11 @@ def register(
 
     new_user = User(
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         display_name=user_data.display_name,
     )
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await run_in_threadpool(_save, db, new_user)
 
     return new_user
 
@@ -59,17 +122,15 @@ def register(
 
 @router.post("/login")
 @limiter.limit("5/minute")
-def login(
+async def login(
     request: Request,
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
 ):
-    user = db.query(User).filter(
-        User.email == form_data.username
-    ).first()
+    user = await run_in_threadpool(_get_credentials, db, form_data.username)
 
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     access_token = create_access_token({"sub": str(user.id)})
@@ -79,9 +140,7 @@ def login(
         expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     )
 
-    db.add(refresh_token)
-    db.commit()
-    db.refresh(refresh_token)
+    await run_in_threadpool(_save, db, refresh_token)
 
     response.set_cookie(
         key="refresh_token",
@@ -135,19 +194,33 @@ def get_me(
 
 # endpoint to change password
 @router.post("/change-password")
-def change_password(
+async def change_password(
     data: ChangePasswordRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_fresh)
 ):
-    if not verify_password(data.old_password, current_user.password_hash):
+    user_id = current_user.id
+    old_hash = current_user.password_hash
+
+    # Nothing is written until both hashes are done, so end the read
+    # and give the connection back while bcrypt runs
+    await run_in_threadpool(db.rollback)
+
+    if not await verify_password_async(data.old_password, old_hash):
         raise HTTPException(
             status_code=400,
             detail="Old password incorrect"
         )
 
-    current_user.password_hash = hash_password(data.new_password)
-    db.commit()
+    new_hash = await hash_password_async(data.new_password)
+
+    if not await run_in_threadpool(_set_password_hash, db, user_id, old_hash, new_hash):
+        raise HTTPException(
+            status_code=409,
+            detail="Password was changed in the meantime"
+        )
+
+    invalidate_principal(user_id)
 
     return {"message": "Password updated successfully"}
 
@@ -169,8 +242,6 @@ def forgot_password(
         PasswordResetToken.user_id == user.id
     ).delete()
 
-    db.commit()
-
     otp = str(random.randint(100000, 999999))
 
     otp_hash = hashlib.sha256(otp.encode()).hexdigest()
@@ -182,29 +253,29 @@ def forgot_password(
     )
 
     db.add(reset)
+
+    # Written in the same transaction as the token; delivered in the background
+    enqueue_otp_email(db, user.email, otp)
     db.commit()
 
-    send_otp_email(user.email, otp)
+    email_dispatcher.wake()
 
     return {"message": "If email exists, OTP sent."}
 
 # endpoint to reset password using OTP
 @router.post("/reset-password")
 @limiter.limit("5/minute")
-def reset_password(
+async def reset_password(
     request: Request,
     data: ResetPasswordRequest,
     db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == data.email).first()
+    user = await run_in_threadpool(_get_credentials, db, data.email)
 
     if not user:
         raise HTTPException(status_code=400, detail="Invalid request")
 
-    reset = db.query(PasswordResetToken).filter(
-        PasswordResetToken.user_id == user.id,
-        PasswordResetToken.otp_hash == hashlib.sha256(data.otp.encode()).hexdigest()
-    ).first()
+    reset = await run_in_threadpool(_get_reset_token, db, user.id, data.otp)
 
     if not reset:
         raise HTTPException(status_code=400, detail="Invalid OTP")
@@ -212,29 +283,41 @@ def reset_password(
     if reset.expires_at < datetime.now(timezone.utc):
         raise HTTPException(status_code=400, detail="OTP expired")
 
-    user.password_hash = hash_password(data.new_password)
+    new_hash = await hash_password_async(data.new_password)
 
-    db.delete(reset)
-    db.commit()
+    if not await run_in_threadpool(_consume_reset_token, db, reset.id, user.id, new_hash):
+        raise HTTPException(status_code=400, detail="Invalid OTP")
+
+    invalidate_principal(user.id)
 
     return {"message": "Password reset successful"}
 
 # endpoint to change email - requires current password for verification
 @router.post("/change-email")
-def change_email(
+async def change_email(
     data: ChangeEmailRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_fresh)
 ):
-    if not verify_password(data.password, current_user.password_hash):
+    user_id = current_user.id
+    password_hash = current_user.password_hash
+
+    await run_in_threadpool(db.rollback)
+
+    if not await verify_password_async(data.password, password_hash):
         raise HTTPException(status_code=400, detail="Incorrect password")
 
-    existing = db.query(User).filter(User.email == data.new_email).first()
+    existing = await run_in_threadpool(_get_user_by_email, db, data.new_email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already in use")
 
-    current_user.email = data.new_email
-    db.commit()
+    def update_email():
+        db.execute(update(User).where(User.id == user_id).values(email=data.new_email))
+        db.commit()
+
+    await run_in_threadpool(update_email)
+
+    invalidate_principal(user_id)
 
     return {"message": "Email updated successfully"}
 
@@ -262,6 +345,8 @@ def update_display_name(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update display name"
         )
+
+    invalidate_principal(current_user.id)
     
     return UpdateDisplayNameResponse(
         id=str(current_user.id),
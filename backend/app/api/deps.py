@@ -1,26 +1,36 @@
+import uuid
+from dataclasses import dataclass, field
+from threading import Lock
+
+from cachetools import TTLCache
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, aliased, make_transient_to_detached
+from sqlalchemy.orm.exc import ObjectDeletedError
 
 from app.config.database import get_db
 from app.config.config import settings
 from app.models.user import User
+from app.models.vault import Vault
+from app.models.vault_membership import VaultMembership
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def decode_token_subject(token: str) -> str:
     try:
         payload = jwt.decode(
             token,
@@ -29,13 +39,167 @@ def get_current_user(
         )
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+
+    return user_id
+
+
+# -------------------
+# Principal Cache
+# -------------------
+
+# Column snapshots of recently seen users keyed by the token's "sub".
+# Snapshots (not ORM instances) are cached because instances are bound
+# to the session of the request that loaded them.
+_principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+_principal_cache_lock = Lock()
+_principal_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _snapshot_user(user: User) -> dict:
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in sa_inspect(User).column_attrs
+    }
+
+
+def invalidate_principal(user_id) -> None:
+    """Evict a user from the principal cache after writing to their row."""
+    with _principal_cache_lock:
+        _principal_cache.pop(str(user_id), None)
+
+
+def get_principal_cache_stats() -> dict:
+    with _principal_cache_lock:
+        return {
+            **_principal_cache_stats,
+            "size": len(_principal_cache),
+        }
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    user_id = decode_token_subject(token)
+
+    with _principal_cache_lock:
+        snapshot = _principal_cache.get(str(user_id))
+        if snapshot is None:
+            _principal_cache_stats["misses"] += 1
+        else:
+            _principal_cache_stats["hits"] += 1
+
+    if snapshot is not None:
+        # Attach a detached copy to this session without a SELECT, so
+        # handlers can still modify and commit current_user as before.
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
 
     user = db.query(User).filter(User.id == user_id).first()
 
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+
+    with _principal_cache_lock:
+        _principal_cache[str(user_id)] = _snapshot_user(user)
 
     return user
+
+
+def get_current_user_fresh(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    get_current_user, reloaded from the database.
+
+    For handlers that check credentials: invalidate_principal only evicts
+    this process's cache, so a snapshot can hold a password hash or email
+    that was changed through another worker.
+    """
+    try:
+        db.refresh(current_user)
+    except ObjectDeletedError:
+        raise _credentials_exception()
+
+    return current_user
+
+
+# -------------------
+# Vault Context
+# -------------------
+
+@dataclass
+class VaultContext:
+    """The current user together with their active vault and partner."""
+
+    user: User
+    membership: VaultMembership | None
+    vault: Vault | None
+    partner: User | None
+
+    # Plain copies of the ids, so they stay readable after a commit
+    # expires the ORM instances above.
+    user_id: uuid.UUID = field(init=False)
+    vault_id: uuid.UUID | None = field(init=False)
+    partner_id: uuid.UUID | None = field(init=False)
+
+    def __post_init__(self):
+        self.user_id = self.user.id
+        self.vault_id = self.membership.vault_id if self.membership else None
+        self.partner_id = self.partner.id if self.partner else None
+
+
+def get_vault_context(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> VaultContext:
+    """
+    The current user's active membership, vault and partner in one joined query.
+
+    The user comes from get_current_user, so the principal cache covers
+    these routes too and only the membership side is queried. FastAPI
+    caches dependency results per request, so every handler or
+    sub-dependency asking for this gets the same instance.
+    """
+    partner_membership = aliased(VaultMembership)
+    partner = aliased(User)
+
+    row = db.query(VaultMembership, Vault, partner).join(
+        Vault,
+        Vault.id == VaultMembership.vault_id
+    ).outerjoin(
+        partner_membership,
+        and_(
+            partner_membership.vault_id == VaultMembership.vault_id,
+            partner_membership.user_id != VaultMembership.user_id,
+            partner_membership.left_at.is_(None)
+        )
+    ).outerjoin(
+        partner,
+        partner.id == partner_membership.user_id
+    ).filter(
+        VaultMembership.user_id == current_user.id,
+        VaultMembership.left_at.is_(None)
+    ).first()
+
+    if row is None:
+        return VaultContext(current_user, None, None, None)
+
+    return VaultContext(current_user, *row)
+
+
+def get_active_vault_context(
+    ctx: VaultContext = Depends(get_vault_context)
+) -> VaultContext:
+    if ctx.membership is None:
+        raise HTTPException(status_code=400, detail="User not in active vault")
+
+    return ctx
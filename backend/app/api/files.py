@@ -0,0 +1,91 @@
+import mimetypes
+import os
+import tempfile
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.services.media_service import MAX_FILE_SIZE
+from app.services.storage import storage
+
+router = APIRouter(prefix="/files", tags=["Files"])
+
+
+def strong_etag(stat_result: os.stat_result) -> str:
+    # Objects are written once under a fresh key and replaced atomically,
+    # so inode, size and mtime identify the exact bytes
+    return f'"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def get_local_path(path: str):
+    try:
+        return storage.backend.local_path(path)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="File not found")
+
+
+# Upload through a signed URL from /upload-url (local storage only)
+@router.put("/upload/{path:path}")
+async def upload_signed(path: str, request: Request, expires: int, token: str):
+
+    if not storage.backend.verify_upload_token(path, expires, token):
+        raise HTTPException(status_code=403, detail="Invalid or expired upload URL")
+
+    tmp = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+
+    try:
+        size = 0
+
+        async for chunk in request.stream():
+            size += len(chunk)
+
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large (max {MAX_FILE_SIZE // (1024 * 1024)}MB)"
+                )
+
+            await run_in_threadpool(tmp.write, chunk)
+
+        tmp.close()
+
+        content_type = request.headers.get("content-type") or "application/octet-stream"
+        await storage.upload(path, tmp.name, content_type)
+    finally:
+        tmp.close()
+        os.unlink(tmp.name)
+
+    return {"path": path}
+
+
+# Serve a stored file
+@router.get("/{path:path}")
+def get_file(path: str, request: Request):
+
+    full_path = get_local_path(path)
+
+    try:
+        stat_result = os.stat(full_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    etag = strong_etag(stat_result)
+    cache_headers = {
+        "etag": etag,
+        "cache-control": "public, max-age=31536000, immutable"
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=cache_headers)
+
+    # FileResponse answers Range requests (video seeking). Under uvicorn
+    # it streams the file in chunks; a zero-copy transfer needs an ASGI
+    # server that implements the http.response.pathsend extension
+    return FileResponse(
+        full_path,
+        media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+        headers=cache_headers,
+        stat_result=stat_result
+    )
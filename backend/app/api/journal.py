@@ -1,10 +1,12 @@
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from math import ceil
 
 from app.config.database import get_db
-from app.api.deps import get_current_user
+from app.utils.pagination import paginate
+from app.utils.aggregates import aggregate, count_if
+from app.api.deps import VaultContext, get_current_user, get_vault_context
 from app.models.user import User
 from app.models.journal import Journal
 from app.models.memory import Memory
@@ -12,17 +14,10 @@ from app.models.vault_membership import VaultMembership
 from app.schemas.journal import JournalCreate, JournalUpdate, JournalResponse
 from app.schemas import memory
 from app.services.notification import create_notification
+from app.services.vault_stats import bump_vault_stats
 
 router = APIRouter(prefix="/journals", tags=["Journals"])
 
-def get_user_vault(db: Session, user_id):
-    membership = db.query(VaultMembership).filter(
-        VaultMembership.user_id == user_id,
-        VaultMembership.left_at.is_(None)
-    ).first()
-
-    return membership.vault_id if membership else None
-
 # POST ENDPOINTS
 
 # Creating a journal with title, content, and visibility (private/shared). 
@@ -31,12 +26,13 @@ def get_user_vault(db: Session, user_id):
 def create_journal(
     journal_data: JournalCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_vault_context)
 ):
+    current_user = ctx.user
     vault_id = None
 
     if journal_data.visibility == "shared":
-        vault_id = get_user_vault(db, current_user.id)
+        vault_id = ctx.vault_id
         if not vault_id:
             raise HTTPException(
                 status_code=400,
@@ -55,19 +51,10 @@ def create_journal(
     db.commit()
     db.refresh(journal)
 
-    partner = None
-
-    if journal.visibility == "shared" and journal.vault_id:
-        partner = db.query(VaultMembership).filter(
-            VaultMembership.vault_id == journal.vault_id,
-            VaultMembership.user_id != current_user.id,
-            VaultMembership.left_at.is_(None)
-        ).first()
-
-    if partner:
+    if journal.visibility == "shared" and ctx.partner:
         create_notification(
             db=db,
-            user_id=partner.user_id,
+            user_id=ctx.partner_id,
             type="journal_shared",
             title="Journal Shared",
             message="Your partner shared a journal entry.",
@@ -118,6 +105,8 @@ def convert_journal_to_memory(
     db.add(memory)
     db.flush()  # get memory.id
 
+    bump_vault_stats(db, journal.vault_id, total_memories=1, memory_at=memory.created_at)
+
     journal.status = "converted"
     journal.memory_id = memory.id
 
@@ -152,8 +141,9 @@ def convert_journal_to_memory(
 # Getting all private Journals for the user, sorted by creation date (newest to oldest)
 @router.get("/private")
 def get_private_journals(
-    page: int = 1,
+    page: int | None = None,
     page_size: int = 10,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -161,126 +151,85 @@ def get_private_journals(
         Journal.user_id == current_user.id,
         Journal.visibility == "private",
         Journal.is_deleted == False
-    ).order_by(Journal.created_at.desc())
-
-    total = query.count()
+    )
 
-    journals = query.offset((page - 1) * page_size)\
-                    .limit(page_size)\
-                    .all()
+    journals, meta = paginate(query, Journal, page, page_size, cursor)
 
     return {
         "items": journals,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": ceil(total / page_size)
+        **meta
     }
 
 
 # Getting all shared Journals in the user's vault, sorted by creation date (newest to oldest)
 @router.get("/shared")
 def get_shared_journals(
-    page: int = 1,
+    page: int | None = None,
     page_size: int = 10,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    vault_id = ctx.vault_id
 
     query = db.query(Journal).filter(
         Journal.vault_id == vault_id,
         Journal.visibility == "shared",
         Journal.is_deleted == False
-    ).order_by(Journal.created_at.desc())
-
-    total = query.count()
+    )
 
-    journals = query.offset((page - 1) * page_size)\
-                    .limit(page_size)\
-                    .all()
+    journals, meta = paginate(query, Journal, page, page_size, cursor)
 
     return {
         "items": journals,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": ceil(total / page_size)
+        **meta
     }
 
+def my_journal_analytics(db: Session, user_id) -> dict:
+    # One scan over the user's journals for every figure
+    return aggregate(
+        db,
+        Journal.user_id == user_id,
+        Journal.is_deleted == False,
+        total_entries=func.count(),
+        private_entries=count_if(Journal.visibility == "private"),
+        shared_entries=count_if(Journal.visibility == "shared"),
+        converted_entries=count_if(Journal.status == "converted"),
+        first_entry_date=func.min(Journal.created_at),
+        latest_entry_date=func.max(Journal.created_at)
+    )
+
+
+def vault_journal_analytics(db: Session, vault_id) -> dict:
+    # One scan over the vault's live journals
+    return aggregate(
+        db,
+        Journal.vault_id == vault_id,
+        Journal.is_deleted == False,
+        total_shared_journals=count_if(Journal.visibility == "shared"),
+        converted_to_memories=count_if(Journal.status == "converted")
+    )
+
+
 @router.get("/analytics/me")
 def get_my_journal_analytics(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    total = db.query(Journal).filter(
-        Journal.user_id == current_user.id,
-        Journal.is_deleted == False
-    ).count()
-
-    private_count = db.query(Journal).filter(
-        Journal.user_id == current_user.id,
-        Journal.visibility == "private",
-        Journal.is_deleted == False
-    ).count()
-
-    shared_count = db.query(Journal).filter(
-        Journal.user_id == current_user.id,
-        Journal.visibility == "shared",
-        Journal.is_deleted == False
-    ).count()
-
-    converted_count = db.query(Journal).filter(
-        Journal.user_id == current_user.id,
-        Journal.status == "converted",
-        Journal.is_deleted == False
-    ).count()
-
-    first_entry = db.query(Journal.created_at).filter(
-        Journal.user_id == current_user.id,
-        Journal.is_deleted == False
-    ).order_by(Journal.created_at.asc()).first()
-
-    latest_entry = db.query(Journal.created_at).filter(
-        Journal.user_id == current_user.id,
-        Journal.is_deleted == False
-    ).order_by(Journal.created_at.desc()).first()
-
-    return {
-        "total_entries": total,
-        "private_entries": private_count,
-        "shared_entries": shared_count,
-        "converted_entries": converted_count,
-        "first_entry_date": first_entry[0] if first_entry else None,
-        "latest_entry_date": latest_entry[0] if latest_entry else None
-    }
+    return my_journal_analytics(db, current_user.id)
 
 @router.get("/analytics/vault")
 def get_vault_journal_analytics(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    vault_id = ctx.vault_id
 
     if not vault_id:
         raise HTTPException(status_code=400, detail="Not in vault")
 
-    total_shared = db.query(Journal).filter(
-        Journal.vault_id == vault_id,
-        Journal.visibility == "shared",
-        Journal.is_deleted == False
-    ).count()
-
-    total_converted = db.query(Journal).filter(
-        Journal.vault_id == vault_id,
-        Journal.status == "converted",
-        Journal.is_deleted == False
-    ).count()
-
-    return {
-        "total_shared_journals": total_shared,
-        "converted_to_memories": total_converted
-    }
+    # Only ever the caller's own vault
+    return vault_journal_analytics(db, vault_id)
 
 
 # PUT ENDPOINTS
@@ -291,8 +240,10 @@ def update_journal(
     journal_id: str,
     journal_data: JournalUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_vault_context)
 ):
+    current_user = ctx.user
+
     journal = db.query(Journal).filter(
         Journal.id == journal_id,
         Journal.is_deleted == False
@@ -315,7 +266,7 @@ def update_journal(
 
     if journal_data.visibility is not None:
         if journal_data.visibility == "shared":
-            vault_id = get_user_vault(db, current_user.id)
+            vault_id = ctx.vault_id
             if not vault_id:
                 raise HTTPException(
                     status_code=400,
@@ -1,18 +1,38 @@
-from datetime import datetime, timezone
+from datetime import datetime
+from functools import partial
 from uuid import uuid4
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from app.config.supabase import supabase
 from app.config.database import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
+from app.api.deps import VaultContext, get_active_vault_context
 from app.models.memory import Memory
 from app.models.memory_media import MemoryMedia
-from app.models.vault_membership import VaultMembership
+from app.schemas.media import MediaFinalizeRequest, MediaUploadUrlRequest, MediaUploadUrlResponse
+from app.services.media_service import (
+    MAX_FILE_SIZE,
+    blob_media_fields,
+    delete_media_row,
+    derivative_pipeline,
+    register_blob,
+    remove_objects,
+    store_upload,
+    verify_direct_upload
+)
+from app.services.storage import storage
+from app.services.storage_quota import (
+    charge_vault_storage,
+    release_vault_storage
+)
+from app.services.vault_stats import bump_vault_stats, media_stats_delta
 
 router = APIRouter(prefix="/media", tags=["Media"])
 
+# The handlers that wait on storage are async, so a slow transfer does not
+# hold a threadpool slot; their database work goes through
+# run_in_threadpool so it never blocks the event loop.
+
 ALLOWED_TYPES = {
     "image/jpeg",
     "image/png",
@@ -20,19 +40,40 @@ ALLOWED_TYPES = {
     "video/mp4",
 }
 
-MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB
-
 
-def get_user_vault(db: Session, user_id):
-    membership = db.query(VaultMembership).filter(
-        VaultMembership.user_id == user_id,
-        VaultMembership.left_at.is_(None)
+def get_vault_memory(db: Session, memory_id: str, vault_id):
+    memory = db.query(Memory).filter(
+        Memory.id == memory_id,
+        Memory.vault_id == vault_id,
+        Memory.is_deleted == False
     ).first()
 
-    if not membership:
-        raise HTTPException(status_code=400, detail="User not in active vault")
+    if not memory:
+        raise HTTPException(status_code=404, detail="Memory not found")
+
+    return memory
+
+
+def _check_memory(db: Session, memory_id: str, vault_id):
+    """
+    Look up the memory and end the read, so no pooled connection is held
+    while the handler waits on storage. Returns the memory's id.
+    """
+    memory_id = get_vault_memory(db, memory_id, vault_id).id
+    db.rollback()
+    return memory_id
+
 
-    return membership.vault_id
+def _add_uploaded_media(memory_id, vault_id, file_type: str, db: Session, blob):
+    # Checked again: the memory may have been deleted during the transfer
+    memory = get_vault_memory(db, memory_id, vault_id)
+
+    db.add(MemoryMedia(
+        memory_id=memory.id,
+        file_type=file_type,
+        **blob_media_fields(blob)
+    ))
+    bump_vault_stats(db, vault_id, **media_stats_delta(file_type, 1))
 
 
 @router.post("/{memory_id}")
@@ -40,56 +81,98 @@ async def upload_media(
     memory_id: str,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
-
-    memory = db.query(Memory).filter(
-        Memory.id == memory_id,
-        Memory.vault_id == vault_id,
-        Memory.is_deleted == False
-    ).first()
-
-    if not memory:
-        raise HTTPException(status_code=404, detail="Memory not found")
+    memory_id = await run_in_threadpool(_check_memory, db, memory_id, ctx.vault_id)
 
     if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    contents = await file.read()
+    blob = await store_upload(
+        db,
+        file,
+        MAX_FILE_SIZE,
+        ctx.vault_id,
+        partial(_add_uploaded_media, memory_id, ctx.vault_id, file.content_type)
+    )
 
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large (max 20MB)")
+    derivative_pipeline.submit(blob)
 
-    extension = file.filename.split(".")[-1]
+    return {"message": "File uploaded successfully"}
+
+
+# Direct upload, step 1: hand out a signed URL so the client uploads the
+# file straight to storage instead of through the API.
+@router.post("/{memory_id}/upload-url", response_model=MediaUploadUrlResponse)
+async def create_media_upload_url(
+    memory_id: str,
+    data: MediaUploadUrlRequest,
+    db: Session = Depends(get_db),
+    ctx: VaultContext = Depends(get_active_vault_context)
+):
+    if data.content_type not in ALLOWED_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported file type")
+
+    memory_id = await run_in_threadpool(_check_memory, db, memory_id, ctx.vault_id)
+
+    extension = data.filename.split(".")[-1]
     file_path = f"memories/{memory_id}/{uuid4()}.{extension}"
 
-    supabase.storage.from_("vault-media").upload(
-        file_path,
-        contents,
-        {"content-type": file.content_type}
-    )
+    return await storage.create_signed_upload_url(file_path)
+
 
-    public_url = supabase.storage.from_("vault-media").get_public_url(file_path)
+def _record_direct_upload(db: Session, memory_id: str, vault_id, path: str, info: dict):
+    """Register the verified object as a blob and media row, and commit. Returns the blob."""
+    # Checked again: the memory may have been deleted while storage was verified
+    memory = get_vault_memory(db, memory_id, vault_id)
+
+    blob = register_blob(db, path, info["content_type"], info["size"])
+
+    # Another finalize of the same path got there first
+    if blob is None:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Upload already finalized")
 
     media = MemoryMedia(
         memory_id=memory.id,
-        file_url=public_url,
-        file_path=file_path,
-        file_type=file.content_type
+        file_type=info["content_type"],
+        **blob_media_fields(blob)
     )
 
     db.add(media)
+    charge_vault_storage(db, vault_id, blob.size)
+    bump_vault_stats(db, vault_id, **media_stats_delta(media.file_type, 1))
     db.commit()
 
-    return {"message": "File uploaded successfully"}
+    return blob
 
-@router.delete("/{media_id}")
-def delete_media(
-    media_id: str,
+
+# Direct upload, step 2: check the uploaded object and record it
+@router.post("/{memory_id}/finalize")
+async def finalize_media_upload(
+    memory_id: str,
+    data: MediaFinalizeRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
+    memory_id = await run_in_threadpool(_check_memory, db, memory_id, ctx.vault_id)
+
+    if not data.path.startswith(f"memories/{memory_id}/") or ".." in data.path:
+        raise HTTPException(status_code=400, detail="Invalid upload path")
+
+    info = await verify_direct_upload(data.path, ALLOWED_TYPES, MAX_FILE_SIZE)
+
+    blob = await run_in_threadpool(_record_direct_upload, db, memory_id, ctx.vault_id, data.path, info)
+
+    derivative_pipeline.submit(blob)
+
+    return {"message": "File uploaded successfully"}
+
+def _delete_memory_media(db: Session, media_id: str, ctx: VaultContext) -> list[str]:
+    """Delete the row and commit. Returns the storage paths left to remove."""
+    current_user = ctx.user
+    vault_id = ctx.vault_id
+
     media = db.query(MemoryMedia).filter(
         MemoryMedia.id == media_id
     ).first()
@@ -105,20 +188,37 @@ def delete_media(
     if not memory:
         raise HTTPException(status_code=404, detail="Associated memory not found")
 
-    vault_id = get_user_vault(db, current_user.id)
-
     if memory.vault_id != vault_id:
         raise HTTPException(status_code=403, detail="Unauthorized")
 
     if memory.created_by != current_user.id:
         raise HTTPException(status_code=403, detail="Only creator can delete media")
 
-    if datetime.now(timezone.utc) > memory.editable_until:
+    if datetime.utcnow() > memory.editable_until:
         raise HTTPException(status_code=403, detail="Media delete window expired")
 
-    supabase.storage.from_("vault-media").remove([media.file_path])
+    size = media.size
+    file_type = media.file_type
+
+    unreferenced_paths = delete_media_row(db, media)
+
+    # After the blob, so locks are taken in the same order as on upload
+    release_vault_storage(db, vault_id, size)
+    bump_vault_stats(db, vault_id, **media_stats_delta(file_type, -1))
 
-    db.delete(media)
     db.commit()
 
+    return unreferenced_paths
+
+
+@router.delete("/{media_id}")
+async def delete_media(
+    media_id: str,
+    db: Session = Depends(get_db),
+    ctx: VaultContext = Depends(get_active_vault_context)
+):
+    unreferenced_paths = await run_in_threadpool(_delete_memory_media, db, media_id, ctx)
+
+    await remove_objects(unreferenced_paths)
+
     return {"message": "Media deleted successfully"}
\ No newline at end of file
@@ -1,40 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime
-from math import ceil
 
 from app.config.database import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
+from app.utils.pagination import paginate
+from app.utils.aggregates import count_if
+from app.api.deps import VaultContext, get_active_vault_context
 from app.models.memory import Memory
-from app.models.vault_membership import VaultMembership
+from app.models.memory_media import MemoryMedia
 from app.schemas.memory import MemoryCreate, MemoryUpdate, MemoryResponse
 from app.services.notification import create_notification
+from app.services.storage_quota import release_vault_storage
+from app.services.vault_stats import bump_vault_stats
 
 router = APIRouter(prefix="/memories", tags=["Memories"],)
 
-def get_user_vault(db: Session, user_id):
-    membership = db.query(VaultMembership).filter(
-        VaultMembership.user_id == user_id,
-        VaultMembership.left_at.is_(None)
-    ).first()
-
-    if not membership:
-        raise HTTPException(
-            status_code=400,
-            detail="User not in an active vault"
-        )
-
-    return membership.vault_id
-
 
 @router.post("/", response_model=MemoryResponse)
 def create_memory(
     memory_data: MemoryCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    current_user = ctx.user
+    vault_id = ctx.vault_id
 
     memory = Memory(
         vault_id=vault_id,
@@ -45,21 +35,19 @@ def create_memory(
     )
 
     db.add(memory)
+    db.flush()
+
+    bump_vault_stats(db, vault_id, total_memories=1, memory_at=memory.created_at)
+
     db.commit()
     db.refresh(memory)
 
     db.flush()
 
-    partner = db.query(VaultMembership).filter(
-        VaultMembership.vault_id == vault_id,
-        VaultMembership.user_id != current_user.id,
-        VaultMembership.left_at.is_(None)
-    ).first()
-
-    if partner:
+    if ctx.partner:
         create_notification(
             db=db,
-            user_id=partner.user_id,
+            user_id=ctx.partner_id,
             type="memory_created",
             title="New Memory Created",
             message="Your partner added a new memory.",
@@ -73,68 +61,57 @@ def create_memory(
 
 @router.get("/")
 def list_memories(
-    page: int = 1,
+    page: int | None = None,
     page_size: int = 10,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    vault_id = ctx.vault_id
 
     query = db.query(Memory).filter(
         Memory.vault_id == vault_id,
         Memory.is_deleted == False
-    ).order_by(Memory.created_at.desc())
-
-    total = query.count()
+    )
 
-    memories = query.offset((page - 1) * page_size)\
-                    .limit(page_size)\
-                    .all()
+    memories, meta = paginate(query, Memory, page, page_size, cursor)
 
     return {
         "items": memories,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": ceil(total / page_size)
+        **meta
     }
 
 @router.get("/me")
 def get_my_memories(
-    page: int = 1,
+    page: int | None = None,
     page_size: int = 10,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    current_user = ctx.user
+    vault_id = ctx.vault_id
 
     query = db.query(Memory).filter(
         Memory.vault_id == vault_id,
         Memory.created_by == current_user.id,
         Memory.is_deleted == False
-    ).order_by(Memory.created_at.desc())
-
-    total = query.count()
+    )
 
-    memories = query.offset((page - 1) * page_size)\
-                    .limit(page_size)\
-                    .all()
+    memories, meta = paginate(query, Memory, page, page_size, cursor)
 
     return {
         "items": memories,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": ceil(total / page_size)
+        **meta
     }
 
 @router.get("/{memory_id}", response_model=MemoryResponse)
 def get_memory(
     memory_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    vault_id = ctx.vault_id
 
     memory = db.query(Memory).filter(
         Memory.id == memory_id,
@@ -152,9 +129,10 @@ def update_memory(
     memory_id: str,
     update_data: MemoryUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    current_user = ctx.user
+    vault_id = ctx.vault_id
 
     memory = db.query(Memory).filter(
         Memory.id == memory_id,
@@ -194,9 +172,10 @@ def update_memory(
 def delete_memory(
     memory_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    current_user = ctx.user
+    vault_id = ctx.vault_id
 
     memory = db.query(Memory).filter(
         Memory.id == memory_id,
@@ -227,6 +206,23 @@ def delete_memory(
     memory.is_deleted = True
     memory.edited_at = datetime.utcnow()
 
+    media_bytes, images, videos = db.query(
+        func.sum(MemoryMedia.size),
+        count_if(MemoryMedia.file_type.like("image%")),
+        count_if(MemoryMedia.file_type.like("video%"))
+    ).filter(
+        MemoryMedia.memory_id == memory.id
+    ).one()
+
+    release_vault_storage(db, vault_id, media_bytes)
+    bump_vault_stats(
+        db,
+        vault_id,
+        total_memories=-1,
+        total_images=-images,
+        total_videos=-videos
+    )
+
     db.commit()
 
     return {"message": "Memory withdrawn successfully"}
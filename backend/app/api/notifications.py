@@ -1,42 +1,79 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import tuple_, update
 from sqlalchemy.orm import Session
-from math import ceil
 
 from app.config.database import get_db
+from app.utils.pagination import decode_cursor, paginate
 from app.api.deps import get_current_user
 from app.models.notification import Notification
 from app.models.user import User
+from app.schemas.notification import NotificationReadRequest
+from app.services.push import queue_push
+from app.services.unread_counts import bump_unread_counts, get_unread_counts
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
+MAX_READ_BATCH = 1000
+
 # Get Endpoint
 
 # Get notifications for the current user with pagination
 @router.get("/")
 def get_notifications(
-    page: int = 1,
+    page: int | None = None,
     page_size: int = 10,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     query = db.query(Notification).filter(
         Notification.user_id == current_user.id
-    ).order_by(Notification.created_at.desc())
-
-    total = query.count()
+    )
 
-    notifications = query.offset((page - 1) * page_size)\
-                         .limit(page_size)\
-                         .all()
+    notifications, meta = paginate(query, Notification, page, page_size, cursor)
 
     return {
         "items": notifications,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": ceil(total / page_size)
+        **meta
     }
 
+# Mark many notifications as read in one UPDATE, either by id or
+# everything up to a list cursor
+@router.patch("/read")
+def mark_many_as_read(
+    data: NotificationReadRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if (data.ids is None) == (data.before is None):
+        raise HTTPException(status_code=400, detail="Provide either ids or before")
+
+    if data.ids is not None:
+        if len(data.ids) > MAX_READ_BATCH:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_READ_BATCH} ids per request")
+
+        selected = Notification.id.in_(data.ids)
+    else:
+        created_at, row_id = decode_cursor(data.before)
+        selected = tuple_(Notification.created_at, Notification.id) <= tuple_(created_at, row_id)
+
+    marked = db.execute(
+        update(Notification).where(
+            Notification.user_id == current_user.id,
+            Notification.is_read == False,
+            selected
+        ).values(
+            is_read=True
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+
+    if marked:
+        bump_unread_counts(db, current_user.id, notifications=-marked)
+        queue_push(db, current_user.id)
+        db.commit()
+
+    return {"marked_read": marked}
+
 # Mark a notification as read
 @router.patch("/{notification_id}/read")
 def mark_as_read(
@@ -44,16 +81,30 @@ def mark_as_read(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == current_user.id
+    # Conditional, so two tabs marking the same notification only
+    # decrement the unread counter once
+    marked = db.execute(
+        update(Notification).where(
+            Notification.id == notification_id,
+            Notification.user_id == current_user.id,
+            Notification.is_read == False
+        ).values(
+            is_read=True
+        ).returning(Notification.id)
     ).first()
 
-    if not notification:
-        raise HTTPException(status_code=404, detail="Notification not found")
+    if marked:
+        bump_unread_counts(db, current_user.id, notifications=-1)
+        queue_push(db, current_user.id)
+        db.commit()
+    else:
+        exists = db.query(Notification.id).filter(
+            Notification.id == notification_id,
+            Notification.user_id == current_user.id
+        ).first()
 
-    notification.is_read = True
-    db.commit()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Notification not found")
 
     return {"message": "Marked as read"}
 
@@ -63,12 +114,9 @@ def get_unread_count(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.is_read == False
-    ).count()
+    counts = get_unread_counts(db, current_user.id)
 
-    return {"unread_count": count}
+    return {"unread_count": counts["notifications"]}
 
 # Cleanup Endpoint
 @router.delete("/cleanup")
@@ -76,6 +124,7 @@ def cleanup_notifications(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    # Only read notifications go, so the unread counter is unchanged
     db.query(Notification).filter(
         Notification.user_id == current_user.id,
         Notification.is_read == True
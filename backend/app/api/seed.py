@@ -1,52 +1,92 @@
-from app.config.supabase import supabase
+from functools import partial
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime, timedelta, timezone
-from math import ceil
 
 from app.config.database import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
+from app.utils.pagination import paginate
+from app.utils.aggregates import aggregate, count_if
+from app.api.deps import VaultContext, get_active_vault_context
 from app.models.seed import Seed
 from app.models.seed_view import SeedView
 from app.models.memory import Memory
-from app.models.vault_membership import VaultMembership
 from app.schemas.seed import SeedCreate, SeedResponse
 from app.models.seed_media import SeedMedia
 from app.models.memory_media import MemoryMedia
+from app.models.media_blob import MediaBlob
 from app.services.notification import create_notification
+from app.services.bloom_scheduler import bloom_scheduler
+from app.schemas.media import MediaFinalizeRequest, MediaUploadUrlRequest, MediaUploadUrlResponse
+from app.services.media_service import (
+    MAX_FILE_SIZE,
+    blob_media_fields,
+    delete_media_row,
+    derivative_pipeline,
+    register_blob,
+    remove_objects,
+    store_upload,
+    verify_direct_upload
+)
+from app.services.storage import storage
+from app.services.storage_quota import (
+    charge_vault_storage,
+    release_vault_storage
+)
+from app.services.vault_stats import bump_vault_stats
 
-SEED_UPLOAD_DIR = "uploads/seeds"
 ALLOWED_TYPES = {"image/jpeg", "image/png", "image/webp", "video/mp4"}
-MAX_FILE_SIZE = 20 * 1024 * 1024
 
 
 router = APIRouter(prefix="/seeds", tags=["Seeds"],)
 
-def get_user_vault(db: Session, user_id):
-    membership = db.query(VaultMembership).filter(
-        VaultMembership.user_id == user_id,
-        VaultMembership.left_at.is_(None)
+
+# Seeds whose media the current user may still change: their own,
+# still scheduled, and within 24h of creation
+def get_editable_seed(db: Session, seed_id: str, ctx: VaultContext):
+    seed = db.query(Seed).filter(
+        Seed.id == seed_id,
+        Seed.vault_id == ctx.vault_id,
+        Seed.status == "scheduled"
     ).first()
 
-    if not membership:
-        raise HTTPException(status_code=400, detail="User not in active vault")
+    if not seed:
+        raise HTTPException(status_code=404, detail="Seed not found")
 
-    return membership.vault_id
+    # Only creator can upload
+    if seed.created_by != ctx.user_id:
+        raise HTTPException(status_code=403, detail="Not authorized")
 
+    # Edit window check (24h)
+    if datetime.now(timezone.utc) > seed.created_at + timedelta(hours=24):
+        raise HTTPException(status_code=403, detail="Edit window expired")
+
+    return seed
+
+
+def _check_editable_seed(db: Session, seed_id: str, ctx: VaultContext):
+    """
+    get_editable_seed, ending the read so no pooled connection is held
+    while the handler waits on storage. Returns the seed's id.
+    """
+    seed_id = get_editable_seed(db, seed_id, ctx).id
+    db.rollback()
+    return seed_id
 
 # GET ENDPOINTS
 
-# Get active seeds for the user's vault (not archived, basically the seeds that are still "blooming")
+# Get seeds in the user's vault that are ready to bloom but not yet bloomed.
+# Bloom notifications are sent by the bloom scheduler, so this is a pure read.
 @router.get("/active")
 def get_active_seeds(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    vault_id = ctx.vault_id
 
     seeds = db.query(Seed).filter(
         Seed.vault_id == vault_id,
@@ -54,64 +94,54 @@ def get_active_seeds(
         Seed.bloom_at <= datetime.now(timezone.utc)
     ).order_by(Seed.bloom_at.asc()).all()
 
-    result = []
-
-    now = datetime.now(timezone.utc)
-
-    for seed in seeds:
-        # If ready AND not yet notified
-        if (
-            seed.status == "scheduled" and
-            seed.bloom_at <= now and
-            not seed.bloom_notified
-        ):
-            # Notify creator if partner hasn't seen yet
-            if seed.created_by != current_user.id:
-                create_notification(
-                    db=db,
-                    user_id=seed.created_by,
-                    type="seed_ready",
-                    title="A Seed is Ready to Bloom",
-                    message="One of your seeds is ready to bloom.",
-                    reference_type="seed",
-                    reference_id=seed.id
-                )
-
-            seed.bloom_notified = True
-        
-    db.commit()
-
-    return result
+    return [
+        {
+            "id": seed.id,
+            "title": seed.title,
+            "bloom_at": seed.bloom_at,
+            "created_at": seed.created_at,
+            "created_by": seed.created_by,
+            "status": seed.status,
+        }
+        for seed in seeds
+    ]
 
 
 # Get all seeds for the user's vault (including archived)
 @router.get("/")
 def get_all_seeds(
-    page: int = 1,
+    page: int | None = None,
     page_size: int = 10,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    vault_id = ctx.vault_id
 
-    query = db.query(Seed).filter(
+    # Media for the whole page is loaded in one extra SELECT ... IN
+    query = db.query(Seed).options(
+        selectinload(Seed.media)
+    ).filter(
         Seed.vault_id == vault_id
-    ).order_by(Seed.created_at.desc())
+    )
 
-    total = query.count()
+    seeds, meta = paginate(query, Seed, page, page_size, cursor)
 
-    seeds = query.offset((page - 1) * page_size)\
-                 .limit(page_size)\
-                 .all()
+    # One grouped aggregate for the view counts of every seed on the page
+    view_counts = {}
+    if seeds:
+        view_counts = dict(
+            db.query(SeedView.seed_id, func.count(SeedView.id)).filter(
+                SeedView.seed_id.in_([seed.id for seed in seeds])
+            ).group_by(SeedView.seed_id).all()
+        )
 
     result = []
 
     now = datetime.now(timezone.utc)
 
     for seed in seeds:
-        views = db.query(SeedView).filter(
-            SeedView.seed_id == seed.id
-        ).count()
+        views = view_counts.get(seed.id, 0)
 
         is_ready = (
             seed.status == "scheduled" and
@@ -130,7 +160,9 @@ def get_all_seeds(
                 {
                     "id": m.id,
                     "file_url": m.file_url,
-                    "file_type": m.file_type
+                    "file_type": m.file_type,
+                    "thumbnail_url": m.thumbnail_url,
+                    "medium_url": m.medium_url
                 }
                 for m in seed.media
             ],
@@ -139,31 +171,26 @@ def get_all_seeds(
 
     return {
         "items": result,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": ceil(total / page_size)
+        **meta
     }
 
 @router.get("/me")
 def get_my_seeds(
-    page: int = 1,
+    page: int | None = None,
     page_size: int = 10,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    current_user = ctx.user
+    vault_id = ctx.vault_id
 
     query = db.query(Seed).filter(
         Seed.vault_id == vault_id,
         Seed.created_by == current_user.id
-    ).order_by(Seed.created_at.desc())
-
-    total = query.count()
+    )
 
-    seeds = query.offset((page - 1) * page_size)\
-                 .limit(page_size)\
-                 .all()
+    seeds, meta = paginate(query, Seed, page, page_size, cursor)
 
     now = datetime.now(timezone.utc)
 
@@ -204,63 +231,38 @@ def get_my_seeds(
 
     return {
         "items": result,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": ceil(total / page_size)
+        **meta
     }
 
 
+def seed_summary(db: Session, vault_id, now: datetime) -> dict:
+    # All four counts in one scan over the vault's seeds
+    return aggregate(
+        db,
+        Seed.vault_id == vault_id,
+        total=count_if(Seed.status != "cancelled"),
+        growing=count_if(and_(Seed.status == "scheduled", Seed.bloom_at > now)),
+        ready=count_if(and_(Seed.status == "scheduled", Seed.bloom_at <= now)),
+        bloomed=count_if(Seed.status == "bloomed")
+    )
+
+
 @router.get("/summary")
 def get_seed_summary(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
-
-    now = datetime.now(timezone.utc)
-
-    # Total (exclude cancelled)
-    total = db.query(func.count(Seed.id)).filter(
-        Seed.vault_id == vault_id,
-        Seed.status != "cancelled"
-    ).scalar()
-
-    # Growing (scheduled + future)
-    growing = db.query(func.count(Seed.id)).filter(
-        Seed.vault_id == vault_id,
-        Seed.status == "scheduled",
-        Seed.bloom_at > now
-    ).scalar()
-
-    # Ready (scheduled + past bloom time)
-    ready = db.query(func.count(Seed.id)).filter(
-        Seed.vault_id == vault_id,
-        Seed.status == "scheduled",
-        Seed.bloom_at <= now
-    ).scalar()
-
-    # Bloomed (converted)
-    bloomed = db.query(func.count(Seed.id)).filter(
-        Seed.vault_id == vault_id,
-        Seed.status == "bloomed"
-    ).scalar()
-
-    return {
-        "total": total,
-        "growing": growing,
-        "ready": ready,
-        "bloomed": bloomed
-    }
+    return seed_summary(db, ctx.vault_id, datetime.now(timezone.utc))
 
 # Get a specific seed by ID
 @router.get("/{seed_id}")
 def get_seed_details(
     seed_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    current_user = ctx.user
+    vault_id = ctx.vault_id
 
     seed = db.query(Seed).filter(
         Seed.id == seed_id,
@@ -295,7 +297,9 @@ def get_seed_details(
             {
                 "id": m.id,
                 "file_url": m.file_url,
-                "file_type": m.file_type
+                "file_type": m.file_type,
+                "thumbnail_url": m.thumbnail_url,
+                "medium_url": m.medium_url
             }
             for m in seed.media
         ]
@@ -305,7 +309,9 @@ def get_seed_details(
                 {
                     "id": m.id,
                     "file_url": m.file_url,
-                    "file_type": m.file_type
+                    "file_type": m.file_type,
+                    "thumbnail_url": m.thumbnail_url,
+                    "medium_url": m.medium_url
                 }
                 for m in seed.media
             ]
@@ -334,15 +340,10 @@ def get_seed_details(
 def create_seed(
     seed_data: SeedCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    membership = db.query(VaultMembership).filter(
-        VaultMembership.user_id == current_user.id,
-        VaultMembership.left_at.is_(None)
-    ).first()
-
-    if not membership:
-        raise HTTPException(status_code=400, detail="Not in vault")
+    current_user = ctx.user
+    membership = ctx.membership
 
     if seed_data.bloom_at <= datetime.now(timezone.utc):
         raise HTTPException(
@@ -361,17 +362,12 @@ def create_seed(
     db.add(seed)
     db.flush()  # so we get seed.id without committing yet
 
-    # Find partner
-    partner = db.query(VaultMembership).filter(
-        VaultMembership.vault_id == membership.vault_id,
-        VaultMembership.user_id != current_user.id,
-        VaultMembership.left_at.is_(None)
-    ).first()
+    bump_vault_stats(db, seed.vault_id, total_seeds=1)
 
-    if partner:
+    if ctx.partner:
         create_notification(
             db=db,
-            user_id=partner.user_id,
+            user_id=ctx.partner_id,
             type="seed_created",
             title="New Seed Planted",
             message="Your partner planted a new seed.",
@@ -382,6 +378,8 @@ def create_seed(
     db.commit()
     db.refresh(seed)
 
+    bloom_scheduler.schedule(seed.id, seed.bloom_at)
+
     return seed
 
 # Endpoint to bloom a seed (mark as viewed by current user)
@@ -389,47 +387,43 @@ def create_seed(
 def bloom_seed(
     seed_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    current_user = ctx.user
+    vault_id = ctx.vault_id
 
+    # Lock the seed row for the rest of the transaction so two partners
+    # blooming at the same moment are serialized: the second one always
+    # sees the first one's view, and only one of them converts.
     seed = db.query(Seed).filter(
         Seed.id == seed_id,
-        Seed.vault_id == vault_id,
-        Seed.status == "scheduled"
-    ).first()
+        Seed.vault_id == vault_id
+    ).with_for_update().first()
 
-    if not seed:
+    if not seed or seed.status == "cancelled":
         raise HTTPException(status_code=404, detail="Seed not found")
 
+    if seed.status == "bloomed":
+        return {"status": "already_converted"}
+
     if datetime.now(timezone.utc) < seed.bloom_at:
         raise HTTPException(status_code=400, detail="Seed not ready")
 
     # Record view if not already viewed
-    existing_view = db.query(SeedView).filter(
-        SeedView.seed_id == seed.id,
-        SeedView.user_id == current_user.id
-    ).first()
-
-    if not existing_view:
-        db.add(
-            SeedView(
-                seed_id=seed.id,
-                user_id=current_user.id
-            )
-        )
-        db.commit()
+    db.execute(
+        pg_insert(SeedView).values(
+            id=uuid4(),
+            seed_id=seed.id,
+            user_id=current_user.id,
+            viewed_at=datetime.now(timezone.utc)
+        ).on_conflict_do_nothing(constraint="uq_seed_user")
+    )
 
-    # Recalculate total views
-    total_views = db.query(SeedView).filter(
+    total_views = db.query(func.count(SeedView.id)).filter(
         SeedView.seed_id == seed.id
-    ).count()
+    ).scalar()
 
     if total_views >= 2:
-
-        if seed.status != "scheduled":
-            return {"status": "already_converted"}
-
         memory = Memory(
             vault_id=seed.vault_id,
             created_by=seed.created_by,
@@ -438,93 +432,190 @@ def bloom_seed(
             is_seed=True
         )
 
-        seed.memory_id = memory.id
-
         db.add(memory)
         db.flush()
 
-        for seed_media in seed.media:
-            db.add(
-                MemoryMedia(
-                    memory_id=memory.id,
-                    file_url=seed_media.file_url,
-                    file_type=seed_media.file_type
+        # Copy every seed media row with a single INSERT ... SELECT
+        db.execute(
+            insert(MemoryMedia).from_select(
+                [
+                    "id", "memory_id", "blob_id", "file_url", "file_path", "file_type",
+                    "size", "thumbnail_url", "medium_url", "uploaded_at"
+                ],
+                select(
+                    func.gen_random_uuid(),
+                    literal(memory.id, type_=MemoryMedia.memory_id.type),
+                    SeedMedia.blob_id,
+                    SeedMedia.file_url,
+                    SeedMedia.file_path,
+                    SeedMedia.file_type,
+                    SeedMedia.size,
+                    SeedMedia.thumbnail_url,
+                    SeedMedia.medium_url,
+                    func.now()
+                ).where(
+                    SeedMedia.seed_id == seed.id
                 )
             )
+        )
 
+        # The copies share the seed's blobs, so each blob gains a reference
+        copies = select(
+            SeedMedia.blob_id,
+            func.count().label("copies")
+        ).where(
+            SeedMedia.seed_id == seed.id,
+            SeedMedia.blob_id.isnot(None)
+        ).group_by(
+            SeedMedia.blob_id
+        ).subquery()
+
+        db.execute(
+            update(MediaBlob).where(
+                MediaBlob.id == copies.c.blob_id
+            ).values(
+                ref_count=MediaBlob.ref_count + copies.c.copies
+            )
+        )
+
+        images, videos = db.query(
+            count_if(SeedMedia.file_type.like("image%")),
+            count_if(SeedMedia.file_type.like("video%"))
+        ).filter(
+            SeedMedia.seed_id == seed.id
+        ).one()
+
+        bump_vault_stats(
+            db,
+            seed.vault_id,
+            memory_at=memory.created_at,
+            total_memories=1,
+            total_images=images,
+            total_videos=videos
+        )
+
+        seed.memory_id = memory.id
         seed.status = "bloomed"
 
         db.commit()
 
         return {"status": "converted_to_memory"}
 
+    db.commit()
+
     return {"status": "view_recorded"}
 
 
+def _add_uploaded_seed_media(seed_id, ctx: VaultContext, file_type: str, db: Session, blob):
+    # Checked again: the seed may have bloomed during the transfer
+    seed = get_editable_seed(db, seed_id, ctx)
+
+    db.add(SeedMedia(
+        seed_id=seed.id,
+        file_type=file_type,
+        **blob_media_fields(blob)
+    ))
+
+
 # Endpoint to upload media for a seed
 @router.post("/{seed_id}/media")
 async def upload_seed_media(
     seed_id: str,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    seed_id = await run_in_threadpool(_check_editable_seed, db, seed_id, ctx)
 
-    seed = db.query(Seed).filter(
-        Seed.id == seed_id,
-        Seed.vault_id == vault_id,
-        Seed.status == "scheduled"
-    ).first()
+    if file.content_type not in ALLOWED_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    if not seed:
-        raise HTTPException(status_code=404, detail="Seed not found")
+    blob = await store_upload(
+        db,
+        file,
+        MAX_FILE_SIZE,
+        ctx.vault_id,
+        partial(_add_uploaded_seed_media, seed_id, ctx, file.content_type)
+    )
 
-    # Only creator can upload
-    if seed.created_by != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized")
+    derivative_pipeline.submit(blob)
 
-    # Edit window check (24h)
-    if datetime.now(timezone.utc) > seed.created_at + timedelta(hours=24):
-        raise HTTPException(status_code=403, detail="Edit window expired")
+    return {"message": "Seed media uploaded"}
 
-    if file.content_type not in ALLOWED_TYPES:
-        raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    contents = await file.read()
+# Direct upload, step 1: hand out a signed URL so the client uploads the
+# file straight to storage instead of through the API.
+@router.post("/{seed_id}/media/upload-url", response_model=MediaUploadUrlResponse)
+async def create_seed_media_upload_url(
+    seed_id: str,
+    data: MediaUploadUrlRequest,
+    db: Session = Depends(get_db),
+    ctx: VaultContext = Depends(get_active_vault_context)
+):
+    if data.content_type not in ALLOWED_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large")
+    seed_id = await run_in_threadpool(_check_editable_seed, db, seed_id, ctx)
 
-    extension = file.filename.split(".")[-1]
+    extension = data.filename.split(".")[-1]
     file_path = f"seeds/{seed_id}/{uuid4()}.{extension}"
 
-    supabase.storage.from_("vault-media").upload(
-        file_path,
-        contents,
-        {"content-type": file.content_type}
-    )
+    return await storage.create_signed_upload_url(file_path)
+
+
+def _record_direct_upload(db: Session, seed_id: str, ctx: VaultContext, path: str, info: dict):
+    """Record the checked object as a blob plus seed media, charge the vault and commit."""
+    # Checked again: the seed may have bloomed while storage was verified
+    seed = get_editable_seed(db, seed_id, ctx)
+
+    blob = register_blob(db, path, info["content_type"], info["size"])
+
+    # Another finalize of the same path got there first
+    if blob is None:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Upload already finalized")
 
     media = SeedMedia(
         seed_id=seed.id,
-        file_url=supabase.storage.from_("vault-media").get_public_url(file_path),
-        file_type=file.content_type,
-        file_path=file_path
+        file_type=info["content_type"],
+        **blob_media_fields(blob)
     )
 
     db.add(media)
+    charge_vault_storage(db, ctx.vault_id, blob.size)
     db.commit()
 
-    return {"message": "Seed media uploaded"}
+    return blob
 
 
-# DELETE ENDPOINTS
-@router.delete("/media/{media_id}")
-def delete_seed_media(
-    media_id: str,
+# Direct upload, step 2: check the uploaded object and record it
+@router.post("/{seed_id}/media/finalize")
+async def finalize_seed_media_upload(
+    seed_id: str,
+    data: MediaFinalizeRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
+    seed_id = await run_in_threadpool(_check_editable_seed, db, seed_id, ctx)
+
+    if not data.path.startswith(f"seeds/{seed_id}/") or ".." in data.path:
+        raise HTTPException(status_code=400, detail="Invalid upload path")
+
+    info = await verify_direct_upload(data.path, ALLOWED_TYPES, MAX_FILE_SIZE)
+
+    blob = await run_in_threadpool(_record_direct_upload, db, seed_id, ctx, data.path, info)
+
+    derivative_pipeline.submit(blob)
+
+    return {"message": "Seed media uploaded"}
+
+
+# DELETE ENDPOINTS
+def _delete_seed_media(db: Session, media_id: str, ctx: VaultContext) -> list[str]:
+    """Remove the seed media row and commit; the caller deletes the returned paths."""
+    current_user = ctx.user
+    vault_id = ctx.vault_id
+
     media = db.query(SeedMedia).filter(
         SeedMedia.id == media_id
     ).first()
@@ -532,8 +623,6 @@ def delete_seed_media(
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
 
-    vault_id = get_user_vault(db, current_user.id)
-
     seed = db.query(Seed).filter(
         Seed.id == media.seed_id,
         Seed.vault_id == vault_id
@@ -548,12 +637,31 @@ def delete_seed_media(
     if datetime.now(timezone.utc) > seed.created_at + timedelta(hours=24):
         raise HTTPException(status_code=403, detail="Delete window expired")
 
-    file_path = media.file_path
-    supabase.storage.from_("vault-media").remove([file_path])
+    size = media.size
+
+    unreferenced_paths = delete_media_row(db, media)
+
+    # Media of a bloomed seed is counted against its memory instead.
+    # Released after the blob, so locks are taken in the same order as on upload.
+    if seed.status == "scheduled":
+        release_vault_storage(db, vault_id, size)
 
-    db.delete(media)
     db.commit()
 
+    return unreferenced_paths
+
+
+# Async for the storage call; the database work runs in the threadpool
+@router.delete("/media/{media_id}")
+async def delete_seed_media(
+    media_id: str,
+    db: Session = Depends(get_db),
+    ctx: VaultContext = Depends(get_active_vault_context)
+):
+    unreferenced_paths = await run_in_threadpool(_delete_seed_media, db, media_id, ctx)
+
+    await remove_objects(unreferenced_paths)
+
     return {"message": "Seed media deleted"}
 
 
@@ -565,9 +673,10 @@ def update_seed(
     seed_id: str,
     seed_data: SeedCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    current_user = ctx.user
+    vault_id = ctx.vault_id
 
     seed = db.query(Seed).filter(
         Seed.id == seed_id,
@@ -595,6 +704,8 @@ def update_seed(
     db.commit()
     db.refresh(seed)
 
+    bloom_scheduler.schedule(seed.id, seed.bloom_at)
+
     return {"message": "Seed updated successfully"}
 
 
@@ -605,9 +716,10 @@ def update_seed(
 def cancel_seed(
     seed_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
+    current_user = ctx.user
+    vault_id = ctx.vault_id
 
     seed = db.query(Seed).filter(
         Seed.id == seed_id,
@@ -631,6 +743,12 @@ def cancel_seed(
 
     seed.status = "cancelled"
 
+    release_vault_storage(db, vault_id, db.query(
+        func.sum(SeedMedia.size)
+    ).filter(
+        SeedMedia.seed_id == seed.id
+    ).scalar())
+
     db.commit()
 
     return {"message": "Seed cancelled successfully"}
@@ -1,78 +1,71 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import Literal
 
 from app.config.database import get_db
-from app.api.deps import get_current_user
+from app.api.deps import VaultContext, get_active_vault_context, get_current_user
 from app.models.user import User
-from app.models.vault_membership import VaultMembership
 from app.models.thinking_signal import ThinkingSignal
+from app.services.push import queue_push
+from app.services.unread_counts import bump_unread_counts, get_unread_counts
+from app.services.signal_buffer import signal_buffer
+from app.services.signal_rollups import signal_histogram
 
 router = APIRouter(prefix="/signals", tags=["Signals"])
 
-
-def get_user_vault(db: Session, user_id):
-    membership = db.query(VaultMembership).filter(
-        VaultMembership.user_id == user_id,
-        VaultMembership.left_at.is_(None)
-    ).first()
-
-    if not membership:
-        raise HTTPException(status_code=400, detail="Not in active vault")
-
-    return membership.vault_id
-
 # POST ENDPOINTS
 
-# Sending a signal creates a new ThinkingSignal entry for the partner in the vault. 
-# The sender is the current user, and the recipient is the other user in the vault. 
+# Sending a signal queues a new ThinkingSignal for the partner in the vault.
+# The sender is the current user, and the recipient is the other user in the vault.
 # If there is no partner, an error is raised.
+# The signal is written in the next batch from the signal buffer, within a
+# fraction of a second, so this returns without a database write.
 @router.post("/send")
 def send_signal(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_active_vault_context)
 ):
-    vault_id = get_user_vault(db, current_user.id)
-
-    # Find partner
-    partner_membership = db.query(VaultMembership).filter(
-        VaultMembership.vault_id == vault_id,
-        VaultMembership.user_id != current_user.id,
-        VaultMembership.left_at.is_(None)
-    ).first()
-
-    if not partner_membership:
+    if not ctx.partner:
         raise HTTPException(status_code=400, detail="No partner in vault")
 
-    signal = ThinkingSignal(
-        vault_id=vault_id,
-        sender_id=current_user.id,
-        recipient_id=partner_membership.user_id
-    )
-
-    db.add(signal)
-    db.commit()
+    if not signal_buffer.add(ctx.vault_id, ctx.user_id, ctx.partner_id):
+        raise HTTPException(status_code=503, detail="Too many signals, try again shortly")
 
     return {"message": "Signal sent"}
 
 # Marking signals as seen updates all unseen signals for the current user to seen and sets the seen_at timestamp.
+# It is a single UPDATE, however many signals piled up.
 @router.post("/mark-seen")
 def mark_signals_seen(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    signals = db.query(ThinkingSignal).filter(
-        ThinkingSignal.recipient_id == current_user.id,
-        ThinkingSignal.is_seen == False
-    ).all()
+    # Signals still in the buffer are written as seen. This goes first: a
+    # batch it misses was committed before it, so the UPDATE catches it
+    buffered = signal_buffer.mark_seen(current_user.id)
+
+    seen = db.execute(
+        update(ThinkingSignal).where(
+            ThinkingSignal.recipient_id == current_user.id,
+            ThinkingSignal.is_seen == False
+        ).values(
+            is_seen=True,
+            seen_at=datetime.utcnow()
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+
+    if seen:
+        bump_unread_counts(db, current_user.id, signals=-seen)
 
-    for signal in signals:
-        signal.is_seen = True
-        signal.seen_at = datetime.utcnow()
+    seen += buffered
 
-    db.commit()
+    if seen:
+        # Let the user's other tabs drop their badge
+        queue_push(db, current_user.id)
+        db.commit()
 
-    return {"message": "Signals marked as seen"}
+    return {"message": "Signals marked as seen", "marked_seen": seen}
 
 
 # GET ENDPOINTS
@@ -84,9 +77,20 @@ def get_unread_signal_count(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    count = db.query(ThinkingSignal).filter(
-        ThinkingSignal.recipient_id == current_user.id,
-        ThinkingSignal.is_seen == False
-    ).count()
-
-    return {"unread_count": count}
+    counts = get_unread_counts(db, current_user.id)
+
+    # Include signals accepted but not written yet
+    return {"unread_count": counts["signals"] + signal_buffer.pending_count(current_user.id)}
+
+# Signal histogram for the active vault, per hour or per day and per sender.
+# Served from the rollup tables, so the cost depends on the number of
+# buckets, not on how many signals were sent.
+@router.get("/stats")
+def get_signal_stats(
+    bucket: Literal["hour", "day"] = "day",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    db: Session = Depends(get_db),
+    ctx: VaultContext = Depends(get_active_vault_context)
+):
+    return signal_histogram(db, ctx.vault_id, bucket, start, end)
@@ -2,32 +2,25 @@ import secrets
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.config.config import settings
 from app.config.database import get_db
-from app.api.deps import get_current_user
+from app.api.deps import VaultContext, get_vault_context, invalidate_principal
 from app.models.user import User
 from app.models.vault import Vault
 from app.models.vault_membership import VaultMembership
-
-from sqlalchemy import func
-from app.models.memory import Memory
-from app.models.seed import Seed
-from app.models.memory_media import MemoryMedia
-from app.models.thinking_signal import ThinkingSignal
+from app.services.vault_stats import get_vault_stats
 
 router = APIRouter(prefix="/vaults", tags=["Vaults"])
 
 @router.post("/create")
 def create_vault(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_vault_context)
 ):
-    # Check if user is already actively in a vault
-    active_membership = db.query(VaultMembership).filter(
-        VaultMembership.user_id == current_user.id,
-        VaultMembership.left_at.is_(None)
-    ).first()
+    current_user = ctx.user
 
-    if active_membership:
+    # Check if user is already actively in a vault
+    if ctx.membership:
         raise HTTPException(
             status_code=400,
             detail="User already in a vault"
@@ -70,8 +63,10 @@ def create_vault(
 def join_vault(
     invite_code: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_vault_context)
 ):
+    current_user = ctx.user
+
     vault = db.query(Vault).filter(
         Vault.invite_code == invite_code
     ).first()
@@ -88,12 +83,7 @@ def join_vault(
           detail="Vault is archived"
       )
     
-    existing_membership = db.query(VaultMembership).filter(
-    VaultMembership.user_id == current_user.id,
-    VaultMembership.left_at.is_(None)
-    ).first()
-
-    if existing_membership:
+    if ctx.membership:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User already in a vault"
@@ -127,20 +117,12 @@ def join_vault(
 
 @router.get("/me")
 def get_my_vault(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_vault_context)
 ):
-    membership = db.query(VaultMembership).filter(
-        VaultMembership.user_id == current_user.id,
-        VaultMembership.left_at.is_(None)
-    ).first()
-
-    if not membership:
+    if not ctx.membership:
         return {"vault": None}
 
-    vault = db.query(Vault).filter(
-        Vault.id == membership.vault_id
-    ).first()
+    vault = ctx.vault
 
     return {
         "vault_id": vault.id,
@@ -153,12 +135,9 @@ from datetime import datetime
 @router.post("/leave")
 def leave_vault(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_vault_context)
 ):
-    membership = db.query(VaultMembership).filter(
-        VaultMembership.user_id == current_user.id,
-        VaultMembership.left_at.is_(None)
-    ).first()
+    membership = ctx.membership
 
     if not membership:
         raise HTTPException(
@@ -167,93 +146,45 @@ def leave_vault(
         )
 
     membership.left_at = datetime.utcnow()
-    db.commit()
-
-    # Check remaining active members
-    active_members = db.query(VaultMembership).filter(
-        VaultMembership.vault_id == membership.vault_id,
-        VaultMembership.left_at.is_(None)
-    ).count()
 
-    vault = db.query(Vault).filter(
-        Vault.id == membership.vault_id
-    ).first()
+    # The partner loaded with the context is the only member left behind
+    vault = ctx.vault
 
-    if active_members == 1:
+    if ctx.partner:
         vault.status = "pending"
-    elif active_members == 0:
+    else:
         vault.status = "archived"
 
     db.commit()
 
+    invalidate_principal(ctx.user_id)
+
     return {"message": "Left vault successfully"}
 
 @router.get("/details")
 def get_vault_details(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    ctx: VaultContext = Depends(get_vault_context)
 ):
-    membership = db.query(VaultMembership).filter(
-        VaultMembership.user_id == current_user.id,
-        VaultMembership.left_at.is_(None)
-    ).first()
-
-    if not membership:
+    if not ctx.membership:
         raise HTTPException(status_code=400, detail="Not in vault")
 
-    vault = db.query(Vault).filter(
-        Vault.id == membership.vault_id
-    ).first()
+    vault = ctx.vault
 
-    # Get partner
-    partner_membership = db.query(VaultMembership).filter(
-        VaultMembership.vault_id == vault.id,
-        VaultMembership.user_id != current_user.id,
-        VaultMembership.left_at.is_(None)
-    ).first()
+    partner_name = ctx.partner.display_name if ctx.partner else None
 
-    partner_name = None
-    if partner_membership:
-        partner = db.query(User).filter(
-            User.id == partner_membership.user_id
-        ).first()
-        partner_name = partner.display_name
-
-    # Stats
-    total_memories = db.query(Memory).filter(
-        Memory.vault_id == vault.id,
-        Memory.is_deleted == False
-    ).count()
+    # Maintained incrementally, so this is one primary key lookup
+    stats = get_vault_stats(db, vault.id)
 
-    total_seeds = db.query(Seed).filter(
-        Seed.vault_id == vault.id
-    ).count()
-
-    total_images = db.query(MemoryMedia).join(Memory).filter(
-        Memory.vault_id == vault.id,
-        MemoryMedia.file_type.like("image%")
-    ).count()
-
-    total_videos = db.query(MemoryMedia).join(Memory).filter(
-        Memory.vault_id == vault.id,
-        MemoryMedia.file_type.like("video%")
-    ).count()
-
-    total_signals = db.query(ThinkingSignal).filter(
-        ThinkingSignal.vault_id == vault.id
-    ).count()
-
-    first_memory = db.query(func.min(Memory.created_at)).filter(
-        Memory.vault_id == vault.id
-    ).scalar()
-
-    last_activity = db.query(func.max(Memory.created_at)).filter(
-        Memory.vault_id == vault.id
-    ).scalar()
-
-    creator = db.query(User).filter(
-        User.id == vault.created_by
-    ).first()
+    # The creator is almost always one of the two members already loaded
+    if vault.created_by == ctx.user.id:
+        creator = ctx.user
+    elif ctx.partner and vault.created_by == ctx.partner_id:
+        creator = ctx.partner
+    else:
+        creator = db.query(User).filter(
+            User.id == vault.created_by
+        ).first()
 
     return {
         "vault_id": vault.id,
@@ -261,13 +192,9 @@ def get_vault_details(
         "created_at": vault.created_at,
         "created_by": creator.display_name if creator else None,
         "partner_name": partner_name,
-        "stats": {
-            "total_memories": total_memories,
-            "total_seeds": total_seeds,
-            "total_images": total_images,
-            "total_videos": total_videos,
-            "total_signals": total_signals,
-            "first_memory_date": first_memory,
-            "last_activity_date": last_activity
+        "stats": stats,
+        "storage": {
+            "used_bytes": vault.storage_used_bytes,
+            "quota_bytes": settings.VAULT_STORAGE_QUOTA_BYTES
         }
     }
\ No newline at end of file
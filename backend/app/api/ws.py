@@ -0,0 +1,27 @@
+import uuid
+
+from fastapi import APIRouter, HTTPException, WebSocket, status
+
+from app.api.deps import decode_token_subject
+from app.services.push import push_hub
+
+router = APIRouter(tags=["Push"])
+
+
+# Live notifications, signals and unread counts for the current user.
+# Browsers cannot set headers on a WebSocket, so the access token comes
+# in the query string.
+@router.websocket("/ws")
+async def push_socket(websocket: WebSocket, token: str | None = None):
+    # Accepted before the token is checked: a close before the handshake
+    # completes is sent as an HTTP 403, which browsers only report as
+    # 1006, so the client could not tell it needs a fresh token
+    await websocket.accept()
+
+    try:
+        user_id = uuid.UUID(decode_token_subject(token or ""))
+    except (HTTPException, ValueError):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await push_hub.serve(user_id, websocket)
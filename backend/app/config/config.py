@@ -7,11 +7,53 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
 
-    SUPABASE_URL: str
-    SUPABASE_SERVICE_KEY: str
+    SUPABASE_URL: str = ""
+    SUPABASE_SERVICE_KEY: str = ""
+    STORAGE_BACKEND: str = "supabase"  # "supabase" or "local"
+    STORAGE_LOCAL_ROOT: str = "uploads"
+    STORAGE_PUBLIC_BASE_URL: str = "http://localhost:8000"
+    STORAGE_SIGNED_UPLOAD_TTL_SECONDS: int = 3600
+    STORAGE_WORKERS: int = 8
+    STORAGE_TIMEOUT_SECONDS: float = 60.0
+    MEDIA_DERIVATIVE_WORKERS: int = 2
+    MEDIA_DERIVATIVE_SWEEP_SECONDS: int = 10 * 60
+    MEDIA_DERIVATIVE_RETRY_SECONDS: int = 15 * 60
+    MEDIA_DERIVATIVE_MAX_ATTEMPTS: int = 3
+    VAULT_STORAGE_QUOTA_BYTES: int = 2 * 1024 * 1024 * 1024  # 2GB
+    STORAGE_GC_INTERVAL_SECONDS: int = 24 * 60 * 60
+    STORAGE_GC_MIN_AGE_SECONDS: int = 24 * 60 * 60
+    STORAGE_GC_REMOVE_BATCH_SIZE: int = 100
+    STORAGE_GC_REMOVES_PER_SECOND: float = 2.0
 
     RESEND_API_KEY: str
+    RESEND_API_URL: str = "https://api.resend.com"
     EMAIL_FROM: str
+    EMAIL_SEND_TIMEOUT_SECONDS: float = 10.0
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5.0
+    EMAIL_MAX_ATTEMPTS: int = 5
+
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+
+    PASSWORD_HASH_WORKERS: int = 4
+
+    VAULT_STATS_REPAIR_SECONDS: int = 24 * 60 * 60
+    UNREAD_COUNTS_REPAIR_SECONDS: int = 60 * 60
+
+    PARTITION_MAINTENANCE_SECONDS: int = 24 * 60 * 60
+    PARTITION_PREMAKE_MONTHS: int = 3
+    PARTITION_DETACH_EXPIRED: bool = False
+    NOTIFICATION_RETENTION_MONTHS: int = 12
+    SIGNAL_RETENTION_MONTHS: int = 24
+    BLOOM_SCHEDULER_RESYNC_SECONDS: int = 300
+
+    PUSH_HEARTBEAT_SECONDS: float = 25.0
+    PUSH_SEND_TIMEOUT_SECONDS: float = 10.0
+    PUSH_QUEUE_SIZE: int = 100
+
+    SIGNAL_BUFFER_SIZE: int = 10000
+    SIGNAL_FLUSH_INTERVAL_MS: int = 200
+    SIGNAL_FLUSH_MAX_ROWS: int = 500
 
     class Config:
         env_file = ".env"
@@ -1,4 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from threading import Lock
 from jose import jwt
 from passlib.context import CryptContext
 from app.config.config import settings
@@ -18,6 +21,62 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# -------------------
+# Hashing Executor
+# -------------------
+
+# bcrypt is deliberately slow (~200ms). Running it on a small dedicated
+# pool keeps a burst of logins from occupying the shared request
+# threadpool that cheap endpoints depend on. bcrypt releases the GIL,
+# so threads are enough here.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_hash_stats_lock = Lock()
+_hash_stats = {"queued": 0, "running": 0, "completed": 0, "peak_queued": 0}
+
+
+def _run_tracked(fn, *args):
+    with _hash_stats_lock:
+        _hash_stats["queued"] -= 1
+        _hash_stats["running"] += 1
+    try:
+        return fn(*args)
+    finally:
+        with _hash_stats_lock:
+            _hash_stats["running"] -= 1
+            _hash_stats["completed"] += 1
+
+
+async def _submit(fn, *args):
+    with _hash_stats_lock:
+        _hash_stats["queued"] += 1
+        _hash_stats["peak_queued"] = max(
+            _hash_stats["peak_queued"],
+            _hash_stats["queued"]
+        )
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, _run_tracked, fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _submit(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _submit(verify_password, plain_password, hashed_password)
+
+
+def get_hashing_stats() -> dict:
+    with _hash_stats_lock:
+        return {
+            **_hash_stats,
+            "workers": settings.PASSWORD_HASH_WORKERS,
+        }
+
+
 # -------------------
 # JWT
 # -------------------
@@ -0,0 +1,81 @@
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+# Room for the multipart boundaries, part headers and small form fields
+# around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Caps multipart/form-data request bodies before they are parsed.
+
+    FastAPI parses a form, spooling every file part, before any handler
+    or dependency runs, so a size check in the handler only fires once
+    the whole body has arrived. A body whose Content-Length is already
+    over max_body_size is refused with 413 without reading it; one that
+    grows past it while streaming (chunked, or a short Content-Length) is
+    cut off at the chunk that crosses it.
+    """
+
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def _refuse(self, scope, receive, send):
+        response = JSONResponse(
+            {"detail": f"File too large (max {(self.max_body_size - MULTIPART_OVERHEAD) // (1024 * 1024)}MB)"},
+            status_code=413
+        )
+        await response(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            return await self.app(scope, receive, send)
+
+        content_length = headers.get("content-length", "")
+
+        if content_length.isdigit() and int(content_length) > self.max_body_size:
+            return await self._refuse(scope, receive, send)
+
+        received = 0
+        cut_off = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, cut_off
+
+            if cut_off:
+                return {"type": "http.disconnect"}
+
+            message = await receive()
+
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+
+                # The parser sees the client go away and gives up; its
+                # error response is replaced with the 413 below
+                if received > self.max_body_size:
+                    cut_off = True
+                    return {"type": "http.disconnect"}
+
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+
+            if cut_off and not response_started:
+                return
+
+            response_started = response_started or message["type"] == "http.response.start"
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+
+        if cut_off and not response_started:
+            await self._refuse(scope, receive, send)
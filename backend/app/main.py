@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from app.api.auth import router as auth_router
@@ -8,6 +10,8 @@ from app.api.seed import router as seed_router
 from app.api.signals import router as thinking_router
 from app.api.journal import router as journal_router
 from app.api.notifications import router as notifications_router
+from app.api.files import router as files_router
+from app.api.ws import router as ws_router
 
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -18,11 +22,49 @@ from fastapi.responses import JSONResponse
 from fastapi import Request
 from slowapi.middleware import SlowAPIMiddleware
 
+from app.services.email import email_dispatcher
+from app.services.bloom_scheduler import bloom_scheduler
+from app.services.media_service import MAX_FILE_SIZE, derivative_pipeline
+from app.services.storage_gc import storage_gc
+from app.services.vault_stats import vault_stats_repair
+from app.services.unread_counts import unread_counts_repair
+from app.services.partitions import partition_maintainer
+from app.services.push import push_hub
+from app.services.signal_buffer import signal_buffer
+from app.config.config import settings
+from app.config.upload_limit import MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await email_dispatcher.start()
+    await bloom_scheduler.start()
+    await derivative_pipeline.start()
+    await storage_gc.start()
+    await vault_stats_repair.start()
+    await unread_counts_repair.start()
+    await partition_maintainer.start()
+    await push_hub.start()
+    await signal_buffer.start()
+    yield
+    await signal_buffer.stop()
+    await push_hub.stop()
+    await partition_maintainer.stop()
+    await unread_counts_repair.stop()
+    await vault_stats_repair.stop()
+    await storage_gc.stop()
+    await derivative_pipeline.stop()
+    await bloom_scheduler.stop()
+    await email_dispatcher.stop()
 
-app = FastAPI(title="Shared Memory Vault API", redirect_slashes=False)
+
+app = FastAPI(title="Shared Memory Vault API", redirect_slashes=False, lifespan=lifespan)
 
 app.add_middleware(SlowAPIMiddleware)
 
+# Before the form parser sees the body; inside CORS so the 413 carries its headers
+app.add_middleware(UploadSizeLimitMiddleware, max_body_size=MAX_FILE_SIZE + MULTIPART_OVERHEAD)
+
 app.state.limiter = limiter
 
 app.add_exception_handler(
@@ -53,3 +95,8 @@ app.include_router(seed_router)
 app.include_router(thinking_router)
 app.include_router(journal_router)
 app.include_router(notifications_router)
+app.include_router(ws_router)
+
+# Local disk storage serves its own files and signed uploads
+if settings.STORAGE_BACKEND == "local":
+    app.include_router(files_router)
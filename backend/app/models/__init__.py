@@ -10,4 +10,10 @@ from .thinking_signal import ThinkingSignal
 from .journal import Journal
 from .notification import Notification
 from .password_reset import PasswordResetToken
-from .refresh_token import RefreshToken
\ No newline at end of file
+from .refresh_token import RefreshToken
+from .email_outbox import EmailOutbox
+from .media_blob import MediaBlob
+from .vault_stats import VaultStats
+from .user_unread_counts import UserUnreadCounts
+from .signal_hourly_rollup import SignalHourlyRollup
+from .signal_daily_rollup import SignalDailyRollup
\ No newline at end of file
@@ -0,0 +1,52 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import String, Text, DateTime, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from app.config.database import Base
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    __table_args__ = (
+        Index("idx_email_outbox_status_created_at", "status", "created_at"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+
+    to_email: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    template: Mapped[str] = mapped_column(String(50), nullable=False)
+
+    # Template variables. Cleared once the email is sent, since it can
+    # hold secrets such as an OTP.
+    context: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+
+    status: Mapped[str] = mapped_column(
+        String(20),
+        default="pending"  # pending | sending | sent | failed
+    )
+
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+    claimed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+
+    sent_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Boolean, String, Text, DateTime, ForeignKey
+from sqlalchemy import Boolean, String, Text, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 from app.config.database import Base
 from sqlalchemy.orm import relationship
@@ -9,6 +9,21 @@ from sqlalchemy.orm import relationship
 class Journal(Base):
     __tablename__ = "journals"
 
+    __table_args__ = (
+        Index("idx_journal_user_created", "user_id", "created_at", "id"),
+        Index("idx_journal_vault_created", "vault_id", "created_at", "id"),
+        Index(
+            "idx_journal_user_visibility_live",
+            "user_id", "visibility", "created_at", "id",
+            postgresql_where=text("NOT is_deleted")
+        ),
+        Index(
+            "idx_journal_vault_visibility_live",
+            "vault_id", "visibility", "created_at", "id",
+            postgresql_where=text("NOT is_deleted")
+        ),
+    )
+
     id: Mapped[uuid.UUID] = mapped_column(
         primary_key=True,
         default=uuid.uuid4
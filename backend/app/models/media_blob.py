@@ -0,0 +1,61 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import String, DateTime, Integer, BigInteger, Boolean, Index, text, true
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.config.database import Base
+
+
+class MediaBlob(Base):
+    """
+    One stored object, shared by every memory_media / seed_media row
+    that points at it. The object is removed from storage when ref_count
+    drops to zero.
+    """
+    __tablename__ = "media_blobs"
+
+    __table_args__ = (
+        Index("uq_media_blob_content_hash", "content_hash", unique=True),
+        Index(
+            "idx_media_blob_derivatives_pending",
+            "created_at",
+            postgresql_where=text("NOT derivatives_ready")
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4
+    )
+
+    # SHA-256 of the bytes. Null for direct uploads, which never pass
+    # through the API and so are not deduplicated.
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    file_path: Mapped[str] = mapped_column(String(500), nullable=False, unique=True)
+
+    file_type: Mapped[str] = mapped_column(String(50), nullable=False)
+
+    size: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+    ref_count: Mapped[int] = mapped_column(Integer, default=1)
+
+    # False while an upload that claimed the row is still transferring the
+    # bytes. Such a claim holds no references until the upload completes.
+    stored: Mapped[bool] = mapped_column(Boolean, default=True, server_default=true())
+
+    derivatives_ready: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    # Sweeps that picked the blob up again after its queued job was lost
+    derivative_attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    derivatives_attempted_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc)
+    )
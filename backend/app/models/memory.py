@@ -13,6 +13,7 @@ class Memory(Base):
     __table_args__ = (
         Index("idx_memory_vault_id", "vault_id"),
         Index("idx_memory_created_at", "created_at"),
+        Index("idx_memory_vault_created", "vault_id", "created_at", "id"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey, Index
+from sqlalchemy import String, DateTime, ForeignKey, Index, BigInteger
 from sqlalchemy.orm import Mapped, mapped_column
 from app.config.database import Base
 
@@ -10,6 +10,8 @@ class MemoryMedia(Base):
 
     __table_args__ = (
         Index("idx_media_memory_id", "memory_id"),
+        Index("idx_media_blob_id", "blob_id"),
+        Index("idx_media_file_path", "file_path"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -33,11 +35,34 @@ class MemoryMedia(Base):
         nullable=False
     )
 
+    # Null for media uploaded before blobs existed
+    blob_id: Mapped[uuid.UUID | None] = mapped_column(
+        ForeignKey("media_blobs.id"),
+        nullable=True
+    )
+
     file_type: Mapped[str] = mapped_column(
         String(50),
         nullable=False
     )
 
+    # Bytes, null for media uploaded before sizes were recorded
+    size: Mapped[int | None] = mapped_column(
+        BigInteger,
+        nullable=True
+    )
+
+    # Resized WebP copies, filled in by the derivative pipeline
+    thumbnail_url: Mapped[str | None] = mapped_column(
+        String(500),
+        nullable=True
+    )
+
+    medium_url: Mapped[str | None] = mapped_column(
+        String(500),
+        nullable=True
+    )
+
     uploaded_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc)
@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, DateTime, Boolean, ForeignKey, Text, Index
+from sqlalchemy import String, DateTime, Boolean, ForeignKey, Text, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -16,6 +16,14 @@ class Notification(Base):
 
     __table_args__ = (
         Index("idx_notification_user_id", "user_id"),
+        Index("idx_notification_user_created", "user_id", "created_at", "id"),
+        Index(
+            "idx_notification_user_unread",
+            "user_id",
+            postgresql_where=text("NOT is_read")
+        ),
+        # Monthly partitions, kept by app.services.partitions
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -44,7 +52,9 @@ class Notification(Base):
 
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
 
+    # Part of the primary key because it is the partition key
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        primary_key=True,
         default=lambda: datetime.now(timezone.utc)
     )
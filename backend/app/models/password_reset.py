@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import DateTime, ForeignKey, String
+from sqlalchemy import DateTime, ForeignKey, String, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from app.config.database import Base
@@ -9,6 +9,10 @@ from app.config.database import Base
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
 
+    __table_args__ = (
+        Index("idx_password_reset_user_id", "user_id"),
+    )
+
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         primary_key=True,
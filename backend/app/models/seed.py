@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, Text, DateTime, ForeignKey, Index, Boolean
+from sqlalchemy import String, Text, DateTime, ForeignKey, Index, Boolean, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.config.database import Base
 from sqlalchemy.dialects.postgresql import UUID
@@ -13,6 +13,14 @@ class Seed(Base):
     __table_args__ = (
         Index("idx_seed_vault_id", "vault_id"),
         Index("idx_seed_bloom_at", "bloom_at"),
+        Index("idx_seed_vault_created", "vault_id", "created_at", "id"),
+        Index("idx_seed_vault_status_bloom", "vault_id", "status", "bloom_at"),
+        # Pending blooms, for the bloom scheduler
+        Index(
+            "idx_seed_pending_bloom",
+            "bloom_at",
+            postgresql_where=text("status = 'scheduled' AND NOT bloom_notified")
+        ),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey, Index
+from sqlalchemy import String, DateTime, ForeignKey, Index, BigInteger
 from sqlalchemy.orm import Mapped, mapped_column
 from app.config.database import Base
 
@@ -10,6 +10,8 @@ class SeedMedia(Base):
 
     __table_args__ = (
         Index("idx_seed_media_seed_id", "seed_id"),
+        Index("idx_seed_media_blob_id", "blob_id"),
+        Index("idx_seed_media_file_path", "file_path"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -30,8 +32,31 @@ class SeedMedia(Base):
         nullable=False
     )
 
+    # Null for media uploaded before blobs existed
+    blob_id: Mapped[uuid.UUID | None] = mapped_column(
+        ForeignKey("media_blobs.id"),
+        nullable=True
+    )
+
     file_type: Mapped[str] = mapped_column(String(50), nullable=False)
 
+    # Bytes, null for media uploaded before sizes were recorded
+    size: Mapped[int | None] = mapped_column(
+        BigInteger,
+        nullable=True
+    )
+
+    # Resized WebP copies, filled in by the derivative pipeline
+    thumbnail_url: Mapped[str | None] = mapped_column(
+        String(500),
+        nullable=True
+    )
+
+    medium_url: Mapped[str | None] = mapped_column(
+        String(500),
+        nullable=True
+    )
+
     uploaded_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc)
@@ -0,0 +1,29 @@
+import uuid
+from datetime import date
+from sqlalchemy import Date, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from app.config.database import Base
+
+
+class SignalDailyRollup(Base):
+    """
+    Signals sent per vault, sender and UTC day.
+
+    Written by app.services.signal_rollups with every batch of signals,
+    and kept after the signals themselves are retired.
+    """
+    __tablename__ = "signal_daily_rollups"
+
+    vault_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("vaults.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    sender_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    count: Mapped[int] = mapped_column(Integer, default=0)
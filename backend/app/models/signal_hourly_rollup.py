@@ -0,0 +1,30 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from app.config.database import Base
+
+
+class SignalHourlyRollup(Base):
+    """
+    Signals sent per vault, sender and UTC hour.
+
+    Written by app.services.signal_rollups with every batch of signals,
+    and kept after the signals themselves are retired.
+    """
+    __tablename__ = "signal_hourly_rollups"
+
+    # Key order puts one vault's hours next to each other for range scans
+    vault_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("vaults.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    hour: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+
+    sender_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    count: Mapped[int] = mapped_column(Integer, default=0)
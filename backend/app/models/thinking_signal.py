@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import DateTime, ForeignKey, Boolean, Index
+from sqlalchemy import DateTime, ForeignKey, Boolean, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 from app.config.database import Base
 
@@ -11,6 +11,13 @@ class ThinkingSignal(Base):
     __table_args__ = (
         Index("idx_signal_vault_id", "vault_id"),
         Index("idx_signal_recipient", "recipient_id"),
+        Index(
+            "idx_signal_recipient_unseen",
+            "recipient_id",
+            postgresql_where=text("NOT is_seen")
+        ),
+        # Monthly partitions, kept by app.services.partitions
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -33,8 +40,10 @@ class ThinkingSignal(Base):
         nullable=False
     )
 
+    # Part of the primary key because it is the partition key
     created_at: Mapped[datetime] = mapped_column(
         DateTime,
+        primary_key=True,
         default=datetime.utcnow
     )
 
@@ -0,0 +1,30 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from app.config.database import Base
+
+
+class UserUnreadCounts(Base):
+    """
+    Sidebar badge counters for a user, one row per user.
+
+    Kept up to date by app.services.unread_counts in the same transaction
+    as the notification or signal write, and recomputed from scratch by
+    the repair job.
+    """
+    __tablename__ = "user_unread_counts"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    notifications: Mapped[int] = mapped_column(Integer, default=0)
+
+    signals: Mapped[int] = mapped_column(Integer, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow
+    )
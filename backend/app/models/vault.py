@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import ForeignKey, String, DateTime
+from sqlalchemy import ForeignKey, String, DateTime, BigInteger
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 from app.config.database import Base
@@ -33,3 +33,10 @@ class Vault(Base):
         ForeignKey("users.id"),
         nullable=True
     )
+
+    # Bytes of media on live memories and scheduled seeds, kept up to
+    # date on every upload and delete
+    storage_used_bytes: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0
+    )
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import DateTime, ForeignKey, Index
+from sqlalchemy import DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 from app.config.database import Base
@@ -13,6 +13,17 @@ class VaultMembership(Base):
         UniqueConstraint("vault_id", "user_id", name="uq_vault_user"),
         Index("idx_vault_id", "vault_id"),
         Index("idx_user_id", "user_id"),
+        # Active memberships, looked up on nearly every request
+        Index(
+            "idx_membership_user_active",
+            "user_id",
+            postgresql_where=text("left_at IS NULL")
+        ),
+        Index(
+            "idx_membership_vault_active",
+            "vault_id",
+            postgresql_where=text("left_at IS NULL")
+        ),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -0,0 +1,42 @@
+import uuid
+from datetime import datetime
+from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from app.config.database import Base
+
+
+class VaultStats(Base):
+    """
+    Dashboard counters for a vault, one row per vault.
+
+    Kept up to date by app.services.vault_stats in the same transaction
+    as the write that changes them, and recomputed from scratch by the
+    repair job.
+    """
+    __tablename__ = "vault_stats"
+
+    vault_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("vaults.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    total_memories: Mapped[int] = mapped_column(Integer, default=0)
+
+    total_seeds: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Media on memories that are not deleted
+    total_images: Mapped[int] = mapped_column(Integer, default=0)
+
+    total_videos: Mapped[int] = mapped_column(Integer, default=0)
+
+    total_signals: Mapped[int] = mapped_column(Integer, default=0)
+
+    # created_at of the first and latest memory, deleted ones included
+    first_memory_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    last_activity_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow
+    )
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+
+class MediaUploadUrlRequest(BaseModel):
+    filename: str
+    content_type: str
+
+
+class MediaUploadUrlResponse(BaseModel):
+    path: str
+    signed_url: str
+    token: str
+
+
+class MediaFinalizeRequest(BaseModel):
+    path: str
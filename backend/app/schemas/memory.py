@@ -7,6 +7,8 @@ class MediaResponse(BaseModel):
     id: uuid.UUID
     file_url: str
     file_type: str
+    thumbnail_url: str | None = None
+    medium_url: str | None = None
 
     class Config:
         from_attributes = True
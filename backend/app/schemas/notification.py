@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+import uuid
+
+
+class NotificationReadRequest(BaseModel):
+    # Either the notifications to mark, or a cursor from the list
+    # endpoint: that row and everything older is marked
+    ids: list[uuid.UUID] | None = None
+    before: str | None = None
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundService:
+    """
+    A service that runs one task on the event loop for the app's lifetime.
+
+    The lifespan calls start() and stop(). Subclasses implement _run();
+    ones that need more set up (an httpx client, a wake-up event) do it
+    around super().start() and super().stop().
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        raise NotImplementedError
+
+
+class PeriodicService(BackgroundService):
+    """
+    A BackgroundService that calls tick() every interval() seconds.
+
+    A failed tick is logged and the next one runs on schedule. The first
+    tick waits a full interval unless run_at_start is set. interval() is
+    read before every wait, so settings patched at runtime apply.
+    """
+
+    # Used in the log line of a failed tick
+    name = "Periodic task"
+    run_at_start = False
+
+    def interval(self) -> float:
+        raise NotImplementedError
+
+    async def tick(self):
+        raise NotImplementedError
+
+    async def _run(self):
+        if not self.run_at_start:
+            await asyncio.sleep(self.interval())
+
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("%s failed", self.name)
+
+            await asyncio.sleep(self.interval())
@@ -0,0 +1,153 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+
+from sqlalchemy import update
+
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.models.seed import Seed
+from app.services.background import BackgroundService
+from app.services.notification import create_notifications
+
+logger = logging.getLogger(__name__)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Heap keys must all be aware to be comparable
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class BloomScheduler(BackgroundService):
+    """
+    Marks seeds as bloomed-notified when their bloom_at passes.
+
+    Upcoming (bloom_at, seed_id) pairs are kept in a min-heap and the worker
+    sleeps until the earliest one is due. Heap entries are only hints: the
+    flip is a single UPDATE ... WHERE bloom_at <= now AND NOT bloom_notified
+    RETURNING, so stale entries (edited or cancelled seeds) and other app
+    workers running the same scheduler cannot notify a seed twice.
+
+    The heap is refreshed from the database every BLOOM_SCHEDULER_RESYNC_SECONDS
+    to pick up seeds scheduled by other processes.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, object]] = []
+        super().__init__()
+        self._lock = Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        await super().start()
+
+    def schedule(self, seed_id, bloom_at: datetime):
+        """Register a new or rescheduled seed. Safe to call from any thread."""
+        bloom_at = _as_utc(bloom_at)
+
+        with self._lock:
+            is_earliest = not self._heap or bloom_at < self._heap[0][0]
+            heapq.heappush(self._heap, (bloom_at, seed_id))
+
+        if is_earliest and self._loop and self._wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        resync_interval = settings.BLOOM_SCHEDULER_RESYNC_SECONDS
+        next_resync = datetime.now(timezone.utc)
+
+        while True:
+            now = datetime.now(timezone.utc)
+
+            try:
+                if now >= next_resync:
+                    await asyncio.to_thread(self._resync, now + timedelta(seconds=resync_interval))
+                    next_resync = now + timedelta(seconds=resync_interval)
+
+                due = self._pop_due(now)
+                if due:
+                    await asyncio.to_thread(self._fire, due)
+            except Exception:
+                logger.exception("Bloom scheduler run failed")
+
+            with self._lock:
+                next_at = self._heap[0][0] if self._heap else None
+
+            timeout = (next_resync - datetime.now(timezone.utc)).total_seconds()
+            if next_at is not None:
+                timeout = min(timeout, (next_at - datetime.now(timezone.utc)).total_seconds())
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+
+            self._wake.clear()
+
+    def _pop_due(self, now: datetime) -> list:
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    def _resync(self, horizon: datetime):
+        """Reload every pending seed due before the next resync."""
+        db = SessionLocal()
+        try:
+            rows = db.query(Seed.bloom_at, Seed.id).filter(
+                Seed.status == "scheduled",
+                Seed.bloom_notified == False,
+                Seed.bloom_at <= horizon
+            ).all()
+        finally:
+            db.close()
+
+        with self._lock:
+            # Union with the current heap so seeds scheduled while the
+            # query ran are not dropped
+            heap = list(set(self._heap) | {(_as_utc(bloom_at), seed_id) for bloom_at, seed_id in rows})
+            heapq.heapify(heap)
+            self._heap = heap
+
+    def _fire(self, seed_ids: list):
+        db = SessionLocal()
+        try:
+            bloomed = db.execute(
+                update(Seed).where(
+                    Seed.id.in_(seed_ids),
+                    Seed.status == "scheduled",
+                    Seed.bloom_notified == False,
+                    Seed.bloom_at <= datetime.now(timezone.utc)
+                ).values(
+                    bloom_notified=True
+                ).returning(
+                    Seed.id, Seed.created_by
+                ).execution_options(synchronize_session=False)
+            ).all()
+
+            create_notifications(db, [
+                {
+                    "user_id": created_by,
+                    "type": "seed_ready",
+                    "title": "A Seed is Ready to Bloom",
+                    "message": "One of your seeds is ready to bloom.",
+                    "reference_type": "seed",
+                    "reference_id": seed_id,
+                }
+                for seed_id, created_by in bloomed
+            ])
+
+            db.commit()
+        finally:
+            db.close()
+
+
+bloom_scheduler = BloomScheduler()
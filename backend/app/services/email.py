@@ -1,18 +1,27 @@
-import requests
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from string import Template
+
+import httpx
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
 from app.config.config import settings
+from app.config.database import SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.services.background import BackgroundService
+
+logger = logging.getLogger(__name__)
+
 
-def send_otp_email(to_email: str, otp: str):
-    response = requests.post(
-        "https://api.resend.com/emails",
-        headers={
-            "Authorization": f"Bearer {settings.RESEND_API_KEY}",
-            "Content-Type": "application/json",
-        },
-        json={
-            "from": settings.EMAIL_FROM,
-            "to": to_email,
-            "subject": "Your Password Reset OTP",
-            "html": f"""
+# -------------------
+# Templates
+# -------------------
+
+# Compiled once at import time; rendering is a single substitute() call.
+OTP_EMAIL_HTML = Template("""
         <!DOCTYPE html>
         <html>
         <head>
@@ -49,7 +58,7 @@ def send_otp_email(to_email: str, otp: str):
                     <div style="margin: 32px 0; text-align: center;">
                         <div style="display: inline-block; background-color: #faf5ff; border: 1px dashed #d8b4fe; border-radius: 12px; padding: 16px 32px;">
                             <span style="font-family: 'DM Sans', monospace; font-size: 36px; font-weight: 700; color: #7c3aed; letter-spacing: 6px;">
-                                {otp}
+                                $otp
                             </span>
                         </div>
                     </div>
@@ -70,9 +79,230 @@ def send_otp_email(to_email: str, otp: str):
             </div>
         </body>
         </html>
-        """,
-        },
+        """)
+
+TEMPLATES = {
+    "otp": ("Your Password Reset OTP", OTP_EMAIL_HTML),
+}
+
+
+def render_email(template: str, context: dict) -> tuple[str, str]:
+    subject, html = TEMPLATES[template]
+    return subject, html.substitute(context)
+
+
+# -------------------
+# Outbox
+# -------------------
+
+def enqueue_email(db: Session, to_email: str, template: str, context: dict):
+    """
+    Add an email to the outbox without committing, so it is written in the
+    same transaction as the change that caused it.
+    """
+    email = EmailOutbox(
+        to_email=to_email,
+        template=template,
+        context=context,
+        status="pending",
+        attempts=0
     )
 
-    if response.status_code >= 400:
-        raise Exception("Failed to send email")
+    db.add(email)
+
+    return email
+
+
+def enqueue_otp_email(db: Session, to_email: str, otp: str):
+    return enqueue_email(db, to_email, "otp", {"otp": otp})
+
+
+# -------------------
+# Dispatcher
+# -------------------
+
+class RetryableEmailError(Exception):
+    pass
+
+
+class PermanentEmailError(Exception):
+    """Resend rejected the email itself (a 4xx other than 429); sending it again would not help."""
+
+
+class EmailDispatcher(BackgroundService):
+    """
+    Background worker that delivers outbox rows through Resend.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    app workers can run a dispatcher against the same table. A claim that
+    is never resolved (e.g. the worker died mid-send) is picked up again
+    after CLAIM_TIMEOUT. Failed sends go back to pending until
+    EMAIL_MAX_ATTEMPTS, except ones Resend rejects outright (a 4xx other
+    than 429), which are marked failed straight away.
+    """
+
+    BATCH_SIZE = 20
+    CLAIM_TIMEOUT = timedelta(minutes=5)
+
+    def __init__(self):
+        super().__init__()
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._client = httpx.AsyncClient(
+            base_url=settings.RESEND_API_URL,
+            timeout=settings.EMAIL_SEND_TIMEOUT_SECONDS,
+            headers={"Authorization": f"Bearer {settings.RESEND_API_KEY}"},
+            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
+        )
+        await super().start()
+
+    async def stop(self):
+        await super().stop()
+
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    def wake(self):
+        """Ask the worker to check the outbox now. Safe to call from any thread."""
+        if self._loop and self._wake:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        while True:
+            try:
+                claimed = await self.dispatch_pending()
+            except Exception:
+                logger.exception("Email dispatch failed")
+                claimed = 0
+
+            # A full batch means there is probably more waiting
+            if claimed >= self.BATCH_SIZE:
+                continue
+
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(),
+                    timeout=settings.EMAIL_OUTBOX_POLL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            self._wake.clear()
+
+    async def dispatch_pending(self) -> int:
+        emails = await asyncio.to_thread(self._claim_batch)
+
+        results = await asyncio.gather(
+            *(
+                self._send(to_email, template, context)
+                for _, to_email, template, context, _ in emails
+            ),
+            return_exceptions=True
+        )
+
+        await asyncio.to_thread(self._record_results, emails, results)
+
+        return len(emails)
+
+    def _claim_batch(self):
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+
+            rows = db.query(EmailOutbox).filter(
+                or_(
+                    EmailOutbox.status == "pending",
+                    and_(
+                        EmailOutbox.status == "sending",
+                        EmailOutbox.claimed_at < now - self.CLAIM_TIMEOUT
+                    )
+                )
+            ).order_by(
+                EmailOutbox.created_at.asc()
+            ).limit(self.BATCH_SIZE).with_for_update(skip_locked=True).all()
+
+            claimed = []
+            for row in rows:
+                row.status = "sending"
+                row.claimed_at = now
+                row.attempts += 1
+                claimed.append((row.id, row.to_email, row.template, row.context, row.attempts))
+
+            db.commit()
+
+            return claimed
+        finally:
+            db.close()
+
+    def _record_results(self, emails, results):
+        if not emails:
+            return
+
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+
+            sent_ids = [
+                email[0] for email, result in zip(emails, results)
+                if not isinstance(result, BaseException)
+            ]
+
+            if sent_ids:
+                db.query(EmailOutbox).filter(
+                    EmailOutbox.id.in_(sent_ids)
+                ).update(
+                    {"status": "sent", "sent_at": now, "context": None},
+                    synchronize_session=False
+                )
+
+            for (email_id, _, _, _, attempts), result in zip(emails, results):
+                if not isinstance(result, BaseException):
+                    continue
+
+                logger.warning("Email %s failed: %s", email_id, result)
+
+                values = {"status": "pending", "last_error": str(result)[:1000]}
+                if isinstance(result, PermanentEmailError) or attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                    values.update({"status": "failed", "context": None})
+
+                db.query(EmailOutbox).filter(
+                    EmailOutbox.id == email_id
+                ).update(values, synchronize_session=False)
+
+            db.commit()
+        finally:
+            db.close()
+
+    @retry(
+        retry=retry_if_exception_type((httpx.TransportError, RetryableEmailError)),
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=0.5, max=5),
+        reraise=True,
+    )
+    async def _send(self, to_email: str, template: str, context: dict):
+        subject, html = render_email(template, context)
+
+        response = await self._client.post(
+            "/emails",
+            json={
+                "from": settings.EMAIL_FROM,
+                "to": to_email,
+                "subject": subject,
+                "html": html,
+            },
+        )
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableEmailError(f"Resend returned {response.status_code}")
+
+        if response.status_code >= 400:
+            raise PermanentEmailError(f"Failed to send email: {response.status_code} {response.text}")
+
+
+email_dispatcher = EmailDispatcher()
@@ -0,0 +1,637 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException, UploadFile
+from PIL import Image, ImageOps
+from sqlalchemy import Integer, Uuid, column, delete, func, literal, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.models.media_blob import MediaBlob
+from app.models.memory_media import MemoryMedia
+from app.models.seed_media import SeedMedia
+from app.models.vault import Vault
+from app.services.storage import storage
+from app.services.storage_quota import charge_vault_storage, check_vault_quota
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Largest single media file, through the API or a signed upload URL
+MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB
+
+# Longest edge in pixels of each derivative
+DERIVATIVE_SIZES = {
+    "medium": 1280,
+    "thumb": 320,
+}
+
+DERIVATIVE_SOURCE_TYPES = {"image/jpeg", "image/png", "image/webp"}
+
+# Claim and reference rounds before an upload racing deletes of the same bytes gives up
+BLOB_CLAIM_ATTEMPTS = 3
+
+# Blobs resubmitted per sweep
+DERIVATIVE_SWEEP_BATCH_SIZE = 100
+
+
+def _spool_chunk(tmp, hasher, chunk: bytes):
+    tmp.write(chunk)
+    hasher.update(chunk)
+
+
+@asynccontextmanager
+async def spooled_upload(file: UploadFile, max_size: int):
+    """
+    Copy an upload to a temporary file one chunk at a time.
+
+    Yields the temp file path, the size in bytes and the SHA-256 hex
+    digest of the contents, hashed as the chunks go by, so memory use per
+    upload stays at one chunk whatever the file size. The temp file is
+    removed on exit.
+
+    By the time an UploadFile reaches a handler the form parser has
+    already received the whole body, so the max_size check here only
+    pins the exact limit for the file part. Oversized requests are cut
+    off while they stream in, by UploadSizeLimitMiddleware.
+    """
+    tmp = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+    hasher = hashlib.sha256()
+
+    try:
+        size = 0
+
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+
+            if size > max_size:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File too large (max {max_size // (1024 * 1024)}MB)"
+                )
+
+            await run_in_threadpool(_spool_chunk, tmp, hasher, chunk)
+
+        tmp.close()
+
+        yield tmp.name, size, hasher.hexdigest()
+    finally:
+        tmp.close()
+        os.unlink(tmp.name)
+
+
+async def verify_direct_upload(path: str, allowed_types: set[str], max_size: int) -> dict:
+    """
+    Check an object uploaded straight to storage through a signed URL.
+
+    Objects that break the type or size rules are removed before the
+    request is rejected, so they do not linger in the bucket.
+    """
+    info = await storage.stat(path)
+
+    if info is None:
+        raise HTTPException(status_code=400, detail="Upload not found")
+
+    if info["content_type"] not in allowed_types:
+        await storage.remove([path])
+        raise HTTPException(status_code=400, detail="Unsupported file type")
+
+    if info["size"] is None or info["size"] > max_size:
+        await storage.remove([path])
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large (max {max_size // (1024 * 1024)}MB)"
+        )
+
+    return info
+
+
+_BLOB_COLUMNS = (
+    MediaBlob.id,
+    MediaBlob.file_path,
+    MediaBlob.file_type,
+    MediaBlob.size,
+    MediaBlob.derivatives_ready,
+)
+
+
+def blob_path(content_hash: str, extension: str) -> str:
+    return f"blobs/{content_hash[:2]}/{content_hash}.{extension.lower()}"
+
+
+def claim_blob(db: Session, vault_id, content_hash: str, extension: str, file_type: str, size: int) -> tuple[str, bool]:
+    """
+    Make sure a blob row exists for these bytes before they are transferred.
+
+    Returns the blob's file_path and whether the caller has to upload the
+    object, which is the case unless an earlier upload already stored it.
+    A new row is committed straight away as an unstored claim with no
+    references, so no row lock is held during the transfer. Concurrent
+    uploads of the same unstored bytes each upload them (the key and the
+    bytes are the same) rather than wait for one another.
+    """
+    check_vault_quota(db.get(Vault, vault_id), size)
+
+    claimed = db.execute(
+        pg_insert(MediaBlob).values(
+            id=uuid.uuid4(),
+            content_hash=content_hash,
+            file_path=blob_path(content_hash, extension),
+            file_type=file_type,
+            size=size,
+            ref_count=0,
+            stored=False,
+            derivatives_ready=False
+        ).on_conflict_do_nothing(
+            index_elements=[MediaBlob.content_hash]
+        ).returning(MediaBlob.file_path, MediaBlob.stored)
+    ).first()
+
+    if claimed is None:
+        claimed = db.execute(
+            select(MediaBlob.file_path, MediaBlob.stored).where(
+                MediaBlob.content_hash == content_hash
+            )
+        ).first()
+
+    db.commit()
+
+    # Deleted since the conflict: claim it again on the next attempt
+    if claimed is None:
+        return blob_path(content_hash, extension), True
+
+    return claimed.file_path, not claimed.stored
+
+
+def reference_blob(db: Session, content_hash: str, file_path: str, file_type: str, size: int, uploaded: bool):
+    """
+    Take a reference on a claimed blob once its bytes are in storage.
+
+    uploaded says whether this request transferred the bytes itself.
+    Returns the blob row with a `created` flag (true when this request
+    uploaded it), or None, rolled back, if the bytes turn out not to be
+    stored: the blob this request found stored was deleted and claimed
+    again by an upload still in flight. Not committed.
+    """
+    stmt = pg_insert(MediaBlob).values(
+        id=uuid.uuid4(),
+        content_hash=content_hash,
+        file_path=file_path,
+        file_type=file_type,
+        size=size,
+        ref_count=1,
+        stored=True,
+        derivatives_ready=False
+    )
+
+    blob = db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[MediaBlob.content_hash],
+            set_={
+                "ref_count": MediaBlob.ref_count + 1,
+                "stored": MediaBlob.stored | literal(uploaded),
+            }
+        ).returning(
+            *_BLOB_COLUMNS,
+            MediaBlob.stored,
+            literal(uploaded).label("created")
+        )
+    ).one()
+
+    if not blob.stored:
+        db.rollback()
+        return None
+
+    return blob
+
+
+def release_blob_claim(db: Session, content_hash: str):
+    """
+    Drop the claim of an upload that failed, unless another upload has
+    stored the bytes since. The object, if any, is left to the storage GC:
+    a concurrent upload of the same bytes may be writing that key.
+    """
+    db.rollback()
+
+    db.execute(
+        delete(MediaBlob).where(
+            MediaBlob.content_hash == content_hash,
+            MediaBlob.ref_count == 0,
+            MediaBlob.stored == False
+        )
+    )
+    db.commit()
+
+
+def register_blob(db: Session, file_path: str, file_type: str, size: int):
+    """
+    Record a direct upload as a blob. It has no content hash, so it is never shared.
+
+    Returns None if the path is already registered: a concurrent finalize
+    of the same upload waits on the unique file_path and then inserts
+    nothing, so the object is recorded and charged once.
+    """
+    return db.execute(
+        pg_insert(MediaBlob).values(
+            id=uuid.uuid4(),
+            file_path=file_path,
+            file_type=file_type,
+            size=size,
+            ref_count=1,
+            derivatives_ready=False
+        ).on_conflict_do_nothing(
+            index_elements=[MediaBlob.file_path]
+        ).returning(
+            *_BLOB_COLUMNS,
+            literal(True).label("created")
+        )
+    ).first()
+
+
+def _attach_blob(db: Session, vault_id, content_hash: str, file_path: str, file_type: str, size: int, uploaded: bool, attach):
+    blob = reference_blob(db, content_hash, file_path, file_type, size, uploaded)
+
+    if blob is None:
+        return None
+
+    # After the blob, so locks are taken in the same order as on delete
+    charge_vault_storage(db, vault_id, size)
+    attach(db, blob)
+    db.commit()
+
+    return blob
+
+
+async def store_upload(db: Session, file: UploadFile, max_size: int, vault_id, attach):
+    """
+    Spool an upload, store it under its content-addressed key and record it.
+
+    attach(db, blob) adds the rows that point at the blob. It runs in the
+    threadpool, in the transaction that takes the blob reference and
+    charges the size to the vault's storage quota, which is committed
+    here. Returns the blob.
+
+    Identical bytes uploaded earlier are not sent to storage again; the
+    existing blob just gains a reference. Uploads that clearly would not
+    fit are refused before anything is stored. The database is only
+    touched before and after the transfer, never during it, and if the
+    charge or attach fails the claim on a new blob is dropped again.
+    """
+    extension = file.filename.split(".")[-1]
+
+    async with spooled_upload(file, max_size) as (tmp_path, size, content_hash):
+        for _ in range(BLOB_CLAIM_ATTEMPTS):
+            file_path, must_upload = await run_in_threadpool(
+                claim_blob, db, vault_id, content_hash, extension, file.content_type, size
+            )
+
+            try:
+                if must_upload:
+                    await storage.upload(file_path, tmp_path, file.content_type)
+
+                blob = await run_in_threadpool(
+                    _attach_blob, db, vault_id, content_hash, file_path, file.content_type, size, must_upload, attach
+                )
+            except Exception:
+                if must_upload:
+                    await run_in_threadpool(release_blob_claim, db, content_hash)
+                raise
+
+            if blob is not None:
+                return blob
+
+    raise HTTPException(status_code=409, detail="Upload conflicted with another upload, please retry")
+
+
+def blob_media_fields(blob) -> dict:
+    """Column values for a MemoryMedia or SeedMedia row pointing at blob."""
+    fields = {
+        "blob_id": blob.id,
+        "file_path": blob.file_path,
+        "file_url": storage.get_public_url(blob.file_path),
+        "size": blob.size,
+    }
+
+    if blob.derivatives_ready:
+        fields.update(derivative_urls(blob.file_path))
+
+    return fields
+
+
+def delete_media_row(db: Session, media) -> list[str]:
+    """
+    Delete a MemoryMedia or SeedMedia row and drop its blob reference.
+
+    Returns the storage paths nobody references any more, for the caller
+    to pass to remove_objects() once it has committed. Content-addressed
+    blobs are not returned: after the commit an upload of the same bytes
+    may already be writing that key again, so their objects are left to
+    the storage GC, which skips recently written objects.
+    """
+    blob_id = media.blob_id
+    legacy_paths = media_storage_paths(media)
+
+    db.delete(media)
+    db.flush()
+
+    if blob_id is None:
+        return legacy_paths
+
+    blob = db.execute(
+        update(MediaBlob).where(
+            MediaBlob.id == blob_id
+        ).values(
+            ref_count=MediaBlob.ref_count - 1
+        ).returning(
+            MediaBlob.ref_count, MediaBlob.file_path, MediaBlob.file_type, MediaBlob.content_hash
+        )
+    ).one()
+
+    if blob.ref_count > 0:
+        return []
+
+    db.execute(delete(MediaBlob).where(MediaBlob.id == blob_id))
+
+    if blob.content_hash is not None:
+        return []
+
+    return media_storage_paths(blob)
+
+
+async def remove_objects(paths: list[str]):
+    """
+    Remove storage objects whose rows are already deleted and committed.
+
+    Best-effort: a failure is logged and the objects are left for the
+    storage GC, since the database no longer references them.
+    """
+    if not paths:
+        return
+
+    try:
+        await storage.remove(paths)
+    except Exception:
+        logger.warning("Could not remove %d storage objects; leaving them to the GC", len(paths), exc_info=True)
+
+
+def release_blob_refs(db: Session, released: dict) -> None:
+    """
+    Drop references in bulk, given {blob_id: count}, and delete blob rows
+    nobody uses any more. Their objects are left for the storage GC.
+    Nothing is committed.
+    """
+    if not released:
+        return
+
+    counts = values(
+        column("blob_id", Uuid),
+        column("released", Integer),
+        name="released_refs"
+    ).data(list(released.items()))
+
+    db.execute(
+        update(MediaBlob).where(
+            MediaBlob.id == counts.c.blob_id
+        ).values(
+            ref_count=MediaBlob.ref_count - counts.c.released
+        )
+    )
+
+    db.execute(
+        delete(MediaBlob).where(
+            MediaBlob.id.in_(list(released)),
+            MediaBlob.ref_count <= 0
+        )
+    )
+
+
+def derivative_path(file_path: str, name: str) -> str:
+    # memories/{id}/{uuid}.jpg -> memories/{id}/{uuid}.thumb.webp
+    return f"{file_path.rsplit('.', 1)[0]}.{name}.webp"
+
+
+def derivative_urls(file_path: str) -> dict[str, str]:
+    return {
+        "thumbnail_url": storage.get_public_url(derivative_path(file_path, "thumb")),
+        "medium_url": storage.get_public_url(derivative_path(file_path, "medium")),
+    }
+
+
+def media_storage_paths(media) -> list[str]:
+    """Every storage object behind a media or blob row: the original and its derivatives."""
+    paths = [media.file_path]
+
+    if media.file_type in DERIVATIVE_SOURCE_TYPES:
+        paths += [derivative_path(media.file_path, name) for name in DERIVATIVE_SIZES]
+
+    return paths
+
+
+def render_derivatives(data: bytes) -> dict[str, bytes]:
+    """
+    Resize an image into every DERIVATIVE_SIZES entry, encoded as WebP.
+
+    Runs in a worker process. Sizes are rendered largest first, each one
+    downscaled from the previous, and JPEGs are decoded straight at a
+    reduced scale, so a 20MB original is never fully decoded for a thumb.
+    """
+    rendered = {}
+
+    with Image.open(io.BytesIO(data)) as image:
+        largest = max(DERIVATIVE_SIZES.values())
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+
+        for name, size in sorted(DERIVATIVE_SIZES.items(), key=lambda item: -item[1]):
+            image.thumbnail((size, size))
+
+            output = io.BytesIO()
+            image.save(output, "WEBP", quality=80)
+            rendered[name] = output.getvalue()
+
+    return rendered
+
+
+class DerivativePipeline:
+    """
+    Builds thumb and medium WebP copies of uploaded images.
+
+    Upload endpoints call submit() after committing a new blob and
+    return straight away. Queued jobs download the original, resize it in
+    a process pool (Pillow work is CPU bound and would hold the GIL),
+    store the results next to the original and fill in thumbnail_url and
+    medium_url on every media row sharing the blob. Until then those
+    columns are null and clients fall back to file_url.
+
+    The queue lives in memory, so jobs still queued at shutdown or a crash
+    are lost. A sweep at startup and every MEDIA_DERIVATIVE_SWEEP_SECONDS
+    requeues blobs that have waited longer than
+    MEDIA_DERIVATIVE_RETRY_SECONDS, up to MEDIA_DERIVATIVE_MAX_ATTEMPTS
+    times, so an image Pillow cannot read is eventually left alone.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue | None = None
+        self._pool: ProcessPoolExecutor | None = None
+        self._workers: list[asyncio.Task] = []
+        # Blob ids queued or being processed by this worker
+        self._pending: set = set()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._pool = ProcessPoolExecutor(max_workers=settings.MEDIA_DERIVATIVE_WORKERS)
+        self._workers = [
+            asyncio.create_task(self._run())
+            for _ in range(settings.MEDIA_DERIVATIVE_WORKERS)
+        ]
+        self._workers.append(asyncio.create_task(self._sweep_periodically()))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._pending.clear()
+
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+        self._queue = None
+
+    def submit(self, blob):
+        """Queue derivative generation for a newly committed blob."""
+        if not blob.created or blob.file_type not in DERIVATIVE_SOURCE_TYPES or self._queue is None:
+            return
+
+        self._enqueue(blob.id, blob.file_path)
+
+    def _enqueue(self, blob_id, file_path: str):
+        self._pending.add(blob_id)
+        self._queue.put_nowait((blob_id, file_path))
+
+    async def _sweep_periodically(self):
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self.claim_stale, list(self._pending))
+            except Exception:
+                logger.exception("Derivative sweep failed")
+            else:
+                if claimed:
+                    logger.info("Requeued derivative generation for %d blobs", len(claimed))
+
+                for blob_id, file_path in claimed:
+                    self._enqueue(blob_id, file_path)
+
+            await asyncio.sleep(settings.MEDIA_DERIVATIVE_SWEEP_SECONDS)
+
+    def claim_stale(self, skip: list) -> list[tuple]:
+        """
+        Claim blobs whose derivatives are overdue, as (id, file_path) pairs.
+
+        A blob is overdue once MEDIA_DERIVATIVE_RETRY_SECONDS have passed
+        since it was created or last claimed. Claiming stamps the attempt
+        and commits, and SKIP LOCKED keeps two workers sweeping at once
+        from taking the same rows. skip holds the ids already queued here.
+        """
+        now = datetime.now(timezone.utc)
+        retry_before = now - timedelta(seconds=settings.MEDIA_DERIVATIVE_RETRY_SECONDS)
+
+        stale = select(MediaBlob.id).where(
+            MediaBlob.derivatives_ready == False,
+            MediaBlob.stored == True,
+            MediaBlob.file_type.in_(DERIVATIVE_SOURCE_TYPES),
+            MediaBlob.derivative_attempts < settings.MEDIA_DERIVATIVE_MAX_ATTEMPTS,
+            func.coalesce(MediaBlob.derivatives_attempted_at, MediaBlob.created_at) < retry_before
+        ).order_by(
+            MediaBlob.created_at
+        ).limit(
+            DERIVATIVE_SWEEP_BATCH_SIZE
+        ).with_for_update(skip_locked=True)
+
+        if skip:
+            stale = stale.where(MediaBlob.id.not_in(skip))
+
+        db = SessionLocal()
+        try:
+            claimed = db.execute(
+                update(MediaBlob).where(
+                    MediaBlob.id.in_(stale.scalar_subquery())
+                ).values(
+                    derivative_attempts=MediaBlob.derivative_attempts + 1,
+                    derivatives_attempted_at=now
+                ).returning(
+                    MediaBlob.id, MediaBlob.file_path
+                )
+            ).all()
+            db.commit()
+        finally:
+            db.close()
+
+        return [tuple(row) for row in claimed]
+
+    async def _run(self):
+        while True:
+            blob_id, file_path = await self._queue.get()
+
+            try:
+                await self._process(blob_id, file_path)
+            except Exception:
+                logger.exception("Derivative generation failed for %s", file_path)
+            finally:
+                self._pending.discard(blob_id)
+                self._queue.task_done()
+
+    async def _process(self, blob_id, file_path: str):
+        data = await storage.download(file_path)
+
+        loop = asyncio.get_running_loop()
+        rendered = await loop.run_in_executor(self._pool, render_derivatives, data)
+
+        for name, content in rendered.items():
+            await storage.upload(derivative_path(file_path, name), content, "image/webp")
+
+        await asyncio.to_thread(self._record, blob_id, derivative_urls(file_path))
+
+    def _record(self, blob_id, urls: dict[str, str]):
+        db = SessionLocal()
+        try:
+            # Blob first: it is locked until the upload request commits,
+            # so the media rows below are visible by the time this returns
+            db.execute(
+                update(MediaBlob).where(
+                    MediaBlob.id == blob_id
+                ).values(
+                    derivatives_ready=True
+                )
+            )
+
+            for model in (MemoryMedia, SeedMedia):
+                db.execute(
+                    update(model).where(
+                        model.blob_id == blob_id
+                    ).values(**urls)
+                )
+
+            db.commit()
+        finally:
+            db.close()
+
+
+derivative_pipeline = DerivativePipeline()
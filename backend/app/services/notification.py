@@ -1,6 +1,10 @@
 import uuid
+from collections import Counter
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.models.notification import Notification
+from app.services.push import queue_push
+from app.services.unread_counts import bump_unread_counts
 from datetime import datetime, timezone
 
 
@@ -14,12 +18,57 @@ def create_notification(
     reference_id: uuid.UUID = None,
 ):
     notification = Notification(
+        id=uuid.uuid4(),
         user_id=user_id,
         type=type,
         title=title,
         message=message,
         reference_type=reference_type,
         reference_id=reference_id,
+        is_read=False,
+        created_at=datetime.now(timezone.utc),
     )
 
     db.add(notification)
+    bump_unread_counts(db, user_id, notifications=1)
+    queue_push(db, user_id, "notification", notification_payload(notification))
+
+
+def create_notifications(db: Session, notifications: list[dict]):
+    """
+    Insert many notifications in one multi-row INSERT.
+
+    Each dict takes the same fields as create_notification. Like
+    create_notification, this does not commit.
+    """
+    if not notifications:
+        return
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"id": uuid.uuid4(), "is_read": False, "created_at": now, **notification}
+        for notification in notifications
+    ]
+
+    db.execute(insert(Notification), rows)
+
+    for user_id, count in Counter(row["user_id"] for row in rows).items():
+        bump_unread_counts(db, user_id, notifications=count)
+
+    for row in rows:
+        queue_push(db, row["user_id"], "notification", notification_payload(Notification(**row)))
+
+
+def notification_payload(notification: Notification) -> dict:
+    """The fields of a notification as the list endpoint returns them."""
+    return {
+        "id": notification.id,
+        "user_id": notification.user_id,
+        "type": notification.type,
+        "title": notification.title,
+        "message": notification.message,
+        "reference_type": notification.reference_type,
+        "reference_id": notification.reference_id,
+        "is_read": notification.is_read,
+        "created_at": notification.created_at,
+    }
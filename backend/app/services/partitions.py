@@ -0,0 +1,177 @@
+import asyncio
+import logging
+from datetime import date, datetime, timezone
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.services.background import PeriodicService
+from app.services.unread_counts import UNREAD_COUNTS_LOCK_KEY, bump_unread_counts
+from app.utils.time import add_months, month_start
+
+logger = logging.getLogger(__name__)
+
+# Tables range-partitioned by month on created_at, with the setting
+# holding how many months of each to keep
+PARTITIONED_TABLES = {
+    "notifications": "NOTIFICATION_RETENTION_MONTHS",
+    "thinking_signals": "SIGNAL_RETENTION_MONTHS",
+}
+
+# Arbitrary key for pg_try_advisory_xact_lock, so only one app worker runs DDL at a time
+PARTITION_LOCK_KEY = 7345902
+
+# table -> (user column, flag set once the row stops counting, unread counter)
+UNREAD_COLUMNS = {
+    "notifications": ("user_id", "is_read", "notifications"),
+    "thinking_signals": ("recipient_id", "is_seen", "signals"),
+}
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def create_partition(db: Session, table: str, month: date):
+    # The explicit UTC offset is ignored for timestamp columns and
+    # pins the bound for timestamptz ones
+    db.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+        f"PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{add_months(month, 1)} 00:00:00+00')"
+    ))
+
+
+def list_partitions(db: Session, table: str) -> dict[date, str]:
+    """Monthly partitions attached to table, keyed by the month they hold."""
+    names = db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": table}
+    ).scalars()
+
+    partitions = {}
+    prefix = f"{table}_p"
+
+    for name in names:
+        try:
+            month = datetime.strptime(name.removeprefix(prefix), "%Y_%m").date()
+        except ValueError:
+            continue
+
+        partitions[month] = name
+
+    return partitions
+
+
+def subtract_unread(db: Session, table: str, name: str):
+    """Take the unread rows of partition name off their users' counters. Not committed."""
+    user_column, read_column, counter = UNREAD_COLUMNS[table]
+
+    rows = db.execute(text(
+        f"SELECT {user_column}, count(*) FROM {name} "
+        f"WHERE NOT {read_column} GROUP BY {user_column}"
+    )).all()
+
+    for user_id, count in rows:
+        bump_unread_counts(db, user_id, **{counter: -count})
+
+
+class PartitionMaintainer(PeriodicService):
+    """
+    Keeps the monthly partitions of notifications and thinking_signals.
+
+    Runs at startup and then every PARTITION_MAINTENANCE_SECONDS. Each run
+    creates the partitions for the current month and the next
+    PARTITION_PREMAKE_MONTHS, so inserts always have somewhere to go, and
+    retires every partition that ended more than the table's retention
+    ago. Retired partitions are dropped, or detached into standalone
+    tables when PARTITION_DETACH_EXPIRED is set, so old rows go without a
+    DELETE, dead tuples or vacuum work.
+
+    Retired rows may still be unread, so before the DDL their count per
+    user is taken off the unread counters, in the same short transaction.
+    That waits for the unread counts repair: while it runs, retiring is
+    left for the next run.
+    """
+
+    name = "Partition maintenance"
+    run_at_start = True
+
+    def interval(self) -> float:
+        return settings.PARTITION_MAINTENANCE_SECONDS
+
+    async def tick(self):
+        await asyncio.to_thread(self.run_once)
+
+    def run_once(self) -> dict | None:
+        """
+        Create upcoming partitions and retire expired ones. Returns the
+        retired partition names per table, or None if another worker
+        holds the lock.
+        """
+        db = SessionLocal()
+        try:
+            if not db.execute(select(func.pg_try_advisory_xact_lock(PARTITION_LOCK_KEY))).scalar():
+                return None
+
+            current = month_start(datetime.now(timezone.utc))
+            expired = {}
+
+            for table, retention_setting in PARTITIONED_TABLES.items():
+                partitions = list_partitions(db, table)
+
+                for offset in range(settings.PARTITION_PREMAKE_MONTHS + 1):
+                    month = add_months(current, offset)
+                    if month not in partitions:
+                        create_partition(db, table, month)
+
+                cutoff = add_months(current, -getattr(settings, retention_setting))
+                expired[table] = [
+                    name for month, name in sorted(partitions.items())
+                    if add_months(month, 1) <= cutoff
+                ]
+
+            retired = {table: [] for table in PARTITIONED_TABLES}
+
+            # The repair locks the counters and then reads these tables,
+            # the opposite order to the one below
+            if any(expired.values()):
+                if db.execute(select(func.pg_try_advisory_xact_lock(UNREAD_COUNTS_LOCK_KEY))).scalar():
+                    retired = expired
+                else:
+                    logger.info("Unread counts repair running, retiring partitions next run")
+
+            for table, names in retired.items():
+                if not names:
+                    continue
+
+                # Up front, as the DDL would lock it anyway: nothing can
+                # mark a row read between the count and the drop
+                db.execute(text(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE"))
+
+                for name in names:
+                    subtract_unread(db, table, name)
+
+                    if settings.PARTITION_DETACH_EXPIRED:
+                        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                    else:
+                        db.execute(text(f"DROP TABLE {name}"))
+
+            db.commit()
+        finally:
+            db.close()
+
+        for table, names in retired.items():
+            if names:
+                logger.info("Retired %s partitions: %s", table, ", ".join(names))
+
+        return retired
+
+
+partition_maintainer = PartitionMaintainer()
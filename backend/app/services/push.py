@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+
+from fastapi import WebSocket
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.services.unread_counts import load_unread_counts
+
+logger = logging.getLogger(__name__)
+
+
+def queue_push(db: Session, user_id: uuid.UUID, event_type: str | None = None, data: dict | None = None):
+    """
+    Push an event to a user's open sockets once db commits.
+
+    Leave event_type out when only the user's unread counts changed.
+    Fresh unread counts follow every push either way. Nothing is sent if
+    the transaction rolls back.
+    """
+    message = None if event_type is None else jsonable_encoder({"type": event_type, "data": data})
+    db.info.setdefault("push", []).append((user_id, message))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(db: Session):
+    pushes = db.info.pop("push", None)
+
+    if pushes:
+        push_hub.publish(pushes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(db: Session):
+    db.info.pop("push", None)
+
+
+class PushConnection:
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        # None is the close sentinel, queued when the client falls behind
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.PUSH_QUEUE_SIZE)
+
+    def send(self, message: dict) -> bool:
+        """Queue a message without waiting. Returns False if the client has fallen behind."""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        # Drop the backlog and close: the client reconnects and reloads,
+        # which is cheaper than buffering for a socket that cannot keep up
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+        self.queue.put_nowait(None)
+        return False
+
+
+class PushHub:
+    """
+    Per-user registry of open /ws sockets in this process.
+
+    Handlers queue events with queue_push() inside their transaction; a
+    Session after_commit hook hands them to publish(), which is safe to
+    call from any thread. Each connection has a bounded send queue
+    drained by its own task, so a slow client never holds up the others:
+    once its queue is full it is closed with 1013 and reconnects. A ping
+    is sent whenever a socket has been idle for PUSH_HEARTBEAT_SECONDS,
+    which keeps proxies from dropping it and lets clients spot a dead
+    connection.
+
+    Events for users without an open socket are dropped without touching
+    the database.
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._connections: dict[uuid.UUID, set[PushConnection]] = defaultdict(set)
+        # The loop only keeps weak references to tasks, so running count
+        # pushes are held here until they finish
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        for connections in list(self._connections.values()):
+            for connection in list(connections):
+                connection.send(None)
+
+        self._loop = None
+
+        for task in list(self._tasks):
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def publish(self, pushes: list[tuple]):
+        """Deliver (user_id, message) pairs queued by queue_push(). Safe to call from any thread."""
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._dispatch, pushes)
+
+    def get_stats(self) -> dict:
+        return {
+            "users": len(self._connections),
+            "connections": sum(len(connections) for connections in self._connections.values()),
+        }
+
+    def _dispatch(self, pushes: list[tuple]):
+        recipients = set()
+
+        for user_id, message in pushes:
+            connections = self._connections.get(user_id)
+
+            if not connections:
+                continue
+
+            recipients.add(user_id)
+
+            if message is not None:
+                for connection in list(connections):
+                    connection.send(message)
+
+        if recipients:
+            task = asyncio.create_task(self._push_counts(list(recipients)))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _push_counts(self, user_ids: list):
+        try:
+            counts = await asyncio.to_thread(self._load_counts, user_ids)
+        except Exception:
+            logger.exception("Failed to load unread counts")
+            return
+
+        for user_id, data in counts.items():
+            for connection in list(self._connections.get(user_id, ())):
+                connection.send({"type": "unread_counts", "data": data})
+
+    def _load_counts(self, user_ids: list) -> dict:
+        """Unread counts per user, signals persisted plus those still buffered."""
+        # Imported here: the signal buffer queues its pushes through this module
+        from app.services.signal_buffer import signal_buffer
+
+        db = SessionLocal()
+        try:
+            counts = load_unread_counts(db, user_ids)
+        finally:
+            db.close()
+
+        for user_id, data in counts.items():
+            data["signals"] += signal_buffer.pending_count(user_id)
+
+        return counts
+
+    async def serve(self, user_id: uuid.UUID, websocket: WebSocket):
+        """Run an accepted socket until either side closes it."""
+        connection = PushConnection(websocket)
+        self._connections[user_id].add(connection)
+
+        sender = asyncio.create_task(self._send_loop(connection))
+        receiver = asyncio.create_task(self._receive_loop(websocket))
+
+        try:
+            # Registered first, so no change between this snapshot and
+            # the first pushed event goes missing
+            await self._push_counts([user_id])
+
+            await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sender.cancel()
+            receiver.cancel()
+            await asyncio.gather(sender, receiver, return_exceptions=True)
+
+            connections = self._connections.get(user_id)
+            if connections is not None:
+                connections.discard(connection)
+                if not connections:
+                    del self._connections[user_id]
+
+    async def _send_loop(self, connection: PushConnection):
+        websocket = connection.websocket
+
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    connection.queue.get(),
+                    timeout=settings.PUSH_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                message = {"type": "ping"}
+
+            try:
+                if message is None:
+                    await websocket.close(code=1013)
+                    return
+
+                await asyncio.wait_for(
+                    websocket.send_json(message),
+                    timeout=settings.PUSH_SEND_TIMEOUT_SECONDS
+                )
+            except Exception:
+                # Timed out or the socket is already gone
+                return
+
+    async def _receive_loop(self, websocket: WebSocket):
+        # Clients send nothing; reading only notices the disconnect
+        while True:
+            message = await websocket.receive()
+
+            if message["type"] == "websocket.disconnect":
+                return
+
+
+push_hub = PushHub()
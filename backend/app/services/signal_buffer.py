@@ -0,0 +1,276 @@
+import asyncio
+import logging
+import uuid
+from collections import Counter, defaultdict, deque
+from datetime import datetime
+from threading import Lock
+
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.models.thinking_signal import ThinkingSignal
+from app.services.background import BackgroundService
+from app.services.push import queue_push
+from app.services.signal_rollups import record_signal_rollups
+from app.services.unread_counts import bump_unread_counts
+from app.services.vault_stats import bump_vault_stats
+
+logger = logging.getLogger(__name__)
+
+
+class SignalBuffer(BackgroundService):
+    """
+    Write-behind buffer for thinking signals.
+
+    send_signal appends a row and returns without touching the database.
+    A background task writes the buffer to thinking_signals in one
+    multi-row INSERT every SIGNAL_FLUSH_INTERVAL_MS, or as soon as
+    SIGNAL_FLUSH_MAX_ROWS are waiting, together with the vault stats,
+    unread counter and rollup updates for the whole batch. Pushes to the
+    recipients go out when that transaction commits.
+
+    The buffer holds at most SIGNAL_BUFFER_SIZE rows; past that add()
+    refuses new signals rather than dropping accepted ones. Whatever is
+    left is flushed on shutdown, or logged as lost if that flush fails.
+    Signals waiting in the buffer count towards their recipient's unread
+    count, and marking signals as seen covers them too, including a batch
+    that is being written: rows it reaches after their INSERT are marked
+    seen once the batch commits.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = Lock()
+        self._rows: deque[dict] = deque()
+        # Rows taken by a flush and not written yet, by id
+        self._in_flight: dict[uuid.UUID, dict] = {}
+        # Unseen buffered signals per recipient
+        self._pending: Counter = Counter()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        await super().start()
+
+    async def stop(self):
+        await super().stop()
+        self._loop = None
+
+        # Drain everything accepted before shutdown. With the database
+        # down that is not possible, and the rest of shutdown must go on.
+        try:
+            while await asyncio.to_thread(self.flush):
+                pass
+        except Exception:
+            with self._lock:
+                lost = len(self._rows)
+            logger.exception("Signal flush on shutdown failed, %d buffered signals lost", lost)
+
+    def add(self, vault_id: uuid.UUID, sender_id: uuid.UUID, recipient_id: uuid.UUID) -> bool:
+        """Accept a signal for writing. Returns False if the buffer is full."""
+        row = {
+            "id": uuid.uuid4(),
+            "vault_id": vault_id,
+            "sender_id": sender_id,
+            "recipient_id": recipient_id,
+            "created_at": datetime.utcnow(),
+            "is_seen": False,
+            "seen_at": None,
+        }
+
+        with self._lock:
+            if len(self._rows) >= settings.SIGNAL_BUFFER_SIZE:
+                return False
+
+            self._rows.append(row)
+            self._pending[recipient_id] += 1
+            full_batch = len(self._rows) >= settings.SIGNAL_FLUSH_MAX_ROWS
+
+        if full_batch and self._loop:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+        return True
+
+    def pending_count(self, recipient_id: uuid.UUID) -> int:
+        """Unseen signals for recipient_id that are not written yet."""
+        with self._lock:
+            return self._pending.get(recipient_id, 0)
+
+    def mark_seen(self, recipient_id: uuid.UUID) -> int:
+        """Mark a recipient's buffered signals as seen, so they are written that way."""
+        seen_at = datetime.utcnow()
+
+        with self._lock:
+            count = self._pending.pop(recipient_id, 0)
+
+            if count:
+                for row in (*self._rows, *self._in_flight.values()):
+                    if row["recipient_id"] == recipient_id and not row["is_seen"]:
+                        row["is_seen"] = True
+                        row["seen_at"] = seen_at
+
+        return count
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "buffered": len(self._rows),
+                "pending_recipients": len(self._pending),
+            }
+
+    async def _run(self):
+        interval = settings.SIGNAL_FLUSH_INTERVAL_MS / 1000
+
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wake.clear()
+
+            try:
+                # Keep going while full batches are waiting
+                while await asyncio.to_thread(self.flush) >= settings.SIGNAL_FLUSH_MAX_ROWS:
+                    pass
+            except Exception:
+                logger.exception("Signal flush failed")
+
+    def flush(self) -> int:
+        """Write up to SIGNAL_FLUSH_MAX_ROWS buffered signals. Returns how many were taken."""
+        with self._lock:
+            batch = [
+                self._rows.popleft()
+                for _ in range(min(len(self._rows), settings.SIGNAL_FLUSH_MAX_ROWS))
+            ]
+            self._in_flight.update((row["id"], row) for row in batch)
+
+        if not batch:
+            return 0
+
+        try:
+            self._write(batch)
+        except IntegrityError:
+            # A vault or user was deleted while its signal waited; write
+            # the rest one by one so it does not take the batch down
+            self._write_each(batch)
+        except Exception:
+            self._requeue(batch)
+            raise
+
+        return len(batch)
+
+    def _write_each(self, rows: list[dict]):
+        for index, row in enumerate(rows):
+            try:
+                self._write([row])
+            except IntegrityError:
+                logger.warning("Dropping signal %s for a deleted vault or user", row["id"])
+                with self._lock:
+                    self._forget([row])
+            except Exception:
+                # Anything else fails the flush; the rows before this one
+                # are committed, so only the rest go back
+                self._requeue(rows[index:])
+                raise
+
+    def _requeue(self, rows: list[dict]):
+        with self._lock:
+            for row in rows:
+                self._in_flight.pop(row["id"], None)
+
+            self._rows.extendleft(reversed(rows))
+
+    def _write(self, rows: list[dict]):
+        with self._lock:
+            # mark_seen may still flip these rows; write them as they are now
+            written = [dict(row) for row in rows]
+
+        db = SessionLocal()
+        try:
+            db.execute(insert(ThinkingSignal).values(written))
+            record_signal_rollups(db, written)
+
+            for vault_id, count in Counter(row["vault_id"] for row in written).items():
+                bump_vault_stats(db, vault_id, total_signals=count)
+
+            unseen = [row for row in written if not row["is_seen"]]
+
+            for recipient_id, count in Counter(row["recipient_id"] for row in unseen).items():
+                bump_unread_counts(db, recipient_id, signals=count)
+
+            for row in unseen:
+                queue_push(db, row["recipient_id"], "signal", {
+                    "id": row["id"],
+                    "vault_id": row["vault_id"],
+                    "sender_id": row["sender_id"],
+                    "created_at": row["created_at"],
+                })
+
+            db.commit()
+        finally:
+            db.close()
+
+        # Past this point mark_seen no longer reaches the rows and the
+        # mark-seen UPDATE does; rows it flipped before then are fixed here
+        with self._lock:
+            seen_late = [
+                row for row, copy in zip(rows, written)
+                if row["is_seen"] and not copy["is_seen"]
+            ]
+            self._forget(rows)
+
+        if seen_late:
+            # The rows are committed, so a failure here must not fail the flush
+            try:
+                self._mark_written_seen(seen_late)
+            except Exception:
+                logger.exception("Failed to mark %d written signals as seen", len(seen_late))
+
+    def _mark_written_seen(self, rows: list[dict]):
+        """Mark signals seen that mark_seen reached while they were being written."""
+        by_recipient = defaultdict(list)
+        for row in rows:
+            by_recipient[row["recipient_id"]].append(row)
+
+        db = SessionLocal()
+        try:
+            for recipient_id, recipient_rows in by_recipient.items():
+                # Skips rows the mark-seen UPDATE already caught after the commit
+                seen = db.execute(
+                    update(ThinkingSignal).where(
+                        tuple_(ThinkingSignal.id, ThinkingSignal.created_at).in_(
+                            [(row["id"], row["created_at"]) for row in recipient_rows]
+                        ),
+                        ThinkingSignal.is_seen == False
+                    ).values(
+                        is_seen=True,
+                        seen_at=recipient_rows[0]["seen_at"]
+                    ).execution_options(synchronize_session=False)
+                ).rowcount
+
+                if seen:
+                    bump_unread_counts(db, recipient_id, signals=-seen)
+                    queue_push(db, recipient_id)
+
+            db.commit()
+        finally:
+            db.close()
+
+    def _forget(self, rows: list[dict]):
+        # Written (or dropped) rows stop counting as pending and in
+        # flight. Called with the lock held.
+        for row in rows:
+            self._in_flight.pop(row["id"], None)
+
+            if not row["is_seen"]:
+                self._pending[row["recipient_id"]] -= 1
+                if self._pending[row["recipient_id"]] <= 0:
+                    del self._pending[row["recipient_id"]]
+
+
+signal_buffer = SignalBuffer()
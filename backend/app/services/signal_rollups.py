@@ -0,0 +1,141 @@
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.signal_daily_rollup import SignalDailyRollup
+from app.models.signal_hourly_rollup import SignalHourlyRollup
+
+# Bucket name -> (rollup model, its time column, bucket length, default range)
+BUCKETS = {
+    "hour": (SignalHourlyRollup, SignalHourlyRollup.hour, timedelta(hours=1), timedelta(hours=48)),
+    "day": (SignalDailyRollup, SignalDailyRollup.day, timedelta(days=1), timedelta(days=30)),
+}
+
+MAX_BUCKETS = 2000
+
+
+def _upsert_counts(db: Session, model, time_column: str, counts: Counter):
+    if not counts:
+        return
+
+    stmt = pg_insert(model).values([
+        {"vault_id": vault_id, "sender_id": sender_id, time_column: bucket, "count": count}
+        for (vault_id, sender_id, bucket), count in counts.items()
+    ])
+
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[model.vault_id, getattr(model, time_column), model.sender_id],
+        set_={"count": model.count + stmt.excluded.count}
+    ))
+
+
+def record_signal_rollups(db: Session, signals: list[dict]):
+    """
+    Count a batch of new signals into the hourly and daily rollups.
+
+    signals are thinking_signals rows as dicts. One multi-row upsert per
+    table, not committed.
+    """
+    hourly = Counter(
+        (signal["vault_id"], signal["sender_id"], signal["created_at"].replace(minute=0, second=0, microsecond=0))
+        for signal in signals
+    )
+    daily = Counter(
+        (signal["vault_id"], signal["sender_id"], signal["created_at"].date())
+        for signal in signals
+    )
+
+    _upsert_counts(db, SignalHourlyRollup, "hour", hourly)
+    _upsert_counts(db, SignalDailyRollup, "day", daily)
+
+
+def _as_utc_naive(value: datetime) -> datetime:
+    # Signal times are stored as naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _floor(value: datetime, bucket: str) -> datetime:
+    value = value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if bucket == "day" else value
+
+
+def signal_histogram(
+    db: Session,
+    vault_id: uuid.UUID,
+    bucket: str,
+    start: datetime | None,
+    end: datetime | None
+) -> dict:
+    """
+    Signals sent in a vault between start and end, per bucket and sender.
+
+    The range is aligned to whole buckets, start inclusive and end
+    exclusive, and every bucket in it is listed, empty ones included.
+    Reads only the rollup rows in the range.
+    """
+    if bucket not in BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of: {', '.join(BUCKETS)}")
+
+    model, time_column, step, default_range = BUCKETS[bucket]
+
+    if end:
+        end = _as_utc_naive(end)
+        if _floor(end, bucket) != end:
+            end = _floor(end, bucket) + step
+    else:
+        # Up to and including the current bucket
+        end = _floor(datetime.utcnow(), bucket) + step
+
+    start = _floor(_as_utc_naive(start), bucket) if start else end - default_range
+
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    if (end - start) / step > MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range spans more than {MAX_BUCKETS} buckets")
+
+    rows = db.execute(
+        select(time_column, model.sender_id, model.count).where(
+            model.vault_id == vault_id,
+            time_column >= (start.date() if bucket == "day" else start),
+            time_column < (end.date() if bucket == "day" else end)
+        )
+    ).all()
+
+    by_bucket = defaultdict(dict)
+    totals = Counter()
+
+    for bucket_start, sender_id, count in rows:
+        if bucket == "day":
+            bucket_start = datetime.combine(bucket_start, datetime.min.time())
+
+        by_bucket[bucket_start][str(sender_id)] = count
+        totals[str(sender_id)] += count
+
+    series = []
+    bucket_start = start
+
+    while bucket_start < end:
+        senders = by_bucket.get(bucket_start, {})
+        series.append({
+            "start": bucket_start,
+            "total": sum(senders.values()),
+            "by_sender": senders,
+        })
+        bucket_start += step
+
+    return {
+        "bucket": bucket,
+        "start": start,
+        "end": end,
+        "total": sum(totals.values()),
+        "by_sender": dict(totals),
+        "series": series,
+    }
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from fastapi import HTTPException
+
+from app.config.config import settings
+from app.services.storage_backends import StorageBackend, build_storage_backend
+
+
+class StorageGateway:
+    """
+    Async front for a synchronous StorageBackend (Supabase or local disk,
+    picked by STORAGE_BACKEND).
+
+    Blocking storage calls run on a small dedicated executor, so a slow
+    transfer never stalls the event loop or the shared request threadpool.
+    Every call is bounded by STORAGE_TIMEOUT_SECONDS and its latency is
+    recorded per operation.
+    """
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.STORAGE_WORKERS,
+            thread_name_prefix="storage"
+        )
+        self._stats_lock = Lock()
+        self._stats: dict[str, dict] = {}
+
+    def _record(self, op: str, elapsed: float, failed: bool):
+        with self._stats_lock:
+            stats = self._stats.setdefault(
+                op,
+                {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            elapsed_ms = elapsed * 1000
+            stats["count"] += 1
+            stats["errors"] += int(failed)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    async def _call(self, op: str, fn, *args):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        failed = True
+
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, fn, *args),
+                timeout=settings.STORAGE_TIMEOUT_SECONDS
+            )
+            failed = False
+            return result
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Storage request timed out")
+        finally:
+            self._record(op, time.perf_counter() - started, failed)
+
+    async def upload(self, path: str, file, content_type: str):
+        return await self._call("upload", self.backend.upload, path, file, content_type)
+
+    async def download(self, path: str) -> bytes:
+        return await self._call("download", self.backend.download, path)
+
+    async def remove(self, paths: list[str]):
+        return await self._call("remove", self.backend.remove, paths)
+
+    async def list_folder(self, prefix: str) -> list[dict]:
+        return await self._call("list", self.backend.list_folder, prefix)
+
+    async def create_signed_upload_url(self, path: str) -> dict:
+        signed = await self._call(
+            "create_signed_upload_url",
+            self.backend.create_signed_upload_url,
+            path
+        )
+        return {"path": path, **signed}
+
+    async def stat(self, path: str) -> dict | None:
+        """Return the size and content type of an object, or None if it is missing."""
+        return await self._call("info", self.backend.info, path)
+
+    def get_public_url(self, path: str) -> str:
+        # Never touches the network
+        return self.backend.get_public_url(path)
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                op: {
+                    **stats,
+                    "avg_ms": stats["total_ms"] / stats["count"] if stats["count"] else 0.0,
+                }
+                for op, stats in self._stats.items()
+            }
+
+
+storage = StorageGateway(build_storage_backend("vault-media"))
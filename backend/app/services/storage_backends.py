@@ -0,0 +1,262 @@
+import hashlib
+import hmac
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote, urlencode
+
+from app.config.config import settings
+
+LIST_PAGE_SIZE = 1000
+
+
+class StorageBackend(ABC):
+    """
+    Blocking object storage operations used by the StorageGateway.
+
+    Paths are bucket-relative keys such as memories/{id}/{uuid}.jpg.
+    """
+
+    @abstractmethod
+    def upload(self, path: str, file, content_type: str):
+        """Store a local file path or bytes under path."""
+
+    @abstractmethod
+    def download(self, path: str) -> bytes:
+        """Return the object's bytes."""
+
+    @abstractmethod
+    def remove(self, paths: list[str]):
+        """Delete the objects; missing ones are not an error."""
+
+    @abstractmethod
+    def list_folder(self, prefix: str) -> list[dict]:
+        """
+        List the entries directly under a folder.
+
+        Each entry is {"path", "is_folder", "size", "updated_at"}; size and
+        updated_at are None for folders.
+        """
+
+    @abstractmethod
+    def create_signed_upload_url(self, path: str) -> dict:
+        """Return {"signed_url", "token"} for a direct client upload."""
+
+    @abstractmethod
+    def info(self, path: str) -> dict | None:
+        """Return {"size", "content_type"}, or None if there is no such object."""
+
+    @abstractmethod
+    def get_public_url(self, path: str) -> str:
+        """Return the object's URL, without a network call."""
+
+
+class SupabaseStorageBackend(StorageBackend):
+
+    def __init__(self, bucket: str):
+        # Imported here so the local backend runs without Supabase settings
+        from app.config.supabase import supabase
+
+        self.bucket = bucket
+        self._client = supabase
+
+    def _bucket_api(self):
+        return self._client.storage.from_(self.bucket)
+
+    def upload(self, path: str, file, content_type: str):
+        # Upsert, so a content-addressed blob re-uploaded after the storage
+        # GC dropped its row but before it removed the object still succeeds
+        return self._bucket_api().upload(
+            path,
+            file,
+            {"content-type": content_type, "upsert": "true"}
+        )
+
+    def download(self, path: str) -> bytes:
+        return self._bucket_api().download(path)
+
+    def remove(self, paths: list[str]):
+        return self._bucket_api().remove(paths)
+
+    def list_folder(self, prefix: str) -> list[dict]:
+        entries = []
+        offset = 0
+
+        while True:
+            page = self._bucket_api().list(
+                prefix,
+                {"limit": LIST_PAGE_SIZE, "offset": offset, "sortBy": {"column": "name", "order": "asc"}}
+            )
+
+            for item in page:
+                # Folders come back without an id
+                is_folder = item.get("id") is None
+                metadata = item.get("metadata") or {}
+
+                entries.append({
+                    "path": f"{prefix}/{item['name']}",
+                    "is_folder": is_folder,
+                    "size": None if is_folder else metadata.get("size"),
+                    "updated_at": None if is_folder else datetime.fromisoformat(item["updated_at"]),
+                })
+
+            if len(page) < LIST_PAGE_SIZE:
+                return entries
+
+            offset += LIST_PAGE_SIZE
+
+    def create_signed_upload_url(self, path: str) -> dict:
+        signed = self._bucket_api().create_signed_upload_url(path)
+        return {"signed_url": signed["signed_url"], "token": signed["token"]}
+
+    def info(self, path: str) -> dict | None:
+        from storage3.exceptions import StorageApiError
+
+        try:
+            info = self._bucket_api().info(path)
+        except StorageApiError as exc:
+            if str(exc.status) in ("400", "404"):
+                return None
+            raise
+
+        metadata = info.get("metadata") or {}
+
+        return {
+            "size": info.get("size", metadata.get("size")),
+            "content_type": info.get("content_type", metadata.get("mimetype")),
+        }
+
+    def get_public_url(self, path: str) -> str:
+        # Built locally by the client, no network call
+        return self._bucket_api().get_public_url(path)
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Stores objects under a directory on local disk.
+
+    Files are served by app/api/files.py, and signed uploads are
+    HMAC-signed PUT URLs handled by the same router. Content types are
+    derived from the file extension.
+    """
+
+    def __init__(self, root: str, public_base_url: str):
+        self.root = Path(root).resolve()
+        self.public_base_url = public_base_url.rstrip("/")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def local_path(self, path: str) -> Path:
+        full_path = (self.root / path).resolve()
+
+        if not full_path.is_relative_to(self.root) or full_path == self.root:
+            raise ValueError("Invalid storage path")
+
+        return full_path
+
+    def upload(self, path: str, file, content_type: str):
+        full_path = self.local_path(path)
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write next to the target and rename, so readers never see a
+        # partially written object
+        fd, tmp_path = tempfile.mkstemp(dir=full_path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                if isinstance(file, (bytes, bytearray)):
+                    tmp.write(file)
+                else:
+                    with open(file, "rb") as source:
+                        # A plain chunked copy; copyfileobj does not use sendfile
+                        shutil.copyfileobj(source, tmp)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        return {"path": path}
+
+    def download(self, path: str) -> bytes:
+        return self.local_path(path).read_bytes()
+
+    def remove(self, paths: list[str]):
+        for path in paths:
+            self.local_path(path).unlink(missing_ok=True)
+
+        return [{"name": path} for path in paths]
+
+    def list_folder(self, prefix: str) -> list[dict]:
+        try:
+            folder = self.local_path(prefix)
+        except ValueError:
+            return []
+
+        if not folder.is_dir():
+            return []
+
+        entries = []
+
+        with os.scandir(folder) as scan:
+            for entry in scan:
+                is_folder = entry.is_dir()
+                stat_result = None if is_folder else entry.stat()
+
+                entries.append({
+                    "path": f"{prefix}/{entry.name}",
+                    "is_folder": is_folder,
+                    "size": None if is_folder else stat_result.st_size,
+                    "updated_at": None if is_folder else datetime.fromtimestamp(
+                        stat_result.st_mtime, timezone.utc
+                    ),
+                })
+
+        return sorted(entries, key=lambda entry: entry["path"])
+
+    def _sign(self, path: str, expires: int) -> str:
+        message = f"{path}:{expires}".encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+    def verify_upload_token(self, path: str, expires: int, token: str) -> bool:
+        if expires < time.time():
+            return False
+
+        return hmac.compare_digest(self._sign(path, expires), token)
+
+    def create_signed_upload_url(self, path: str) -> dict:
+        expires = int(time.time()) + settings.STORAGE_SIGNED_UPLOAD_TTL_SECONDS
+        token = self._sign(path, expires)
+        query = urlencode({"expires": expires, "token": token})
+
+        return {
+            "signed_url": f"{self.public_base_url}/files/upload/{quote(path)}?{query}",
+            "token": token,
+        }
+
+    def info(self, path: str) -> dict | None:
+        try:
+            stat_result = self.local_path(path).stat()
+        except (FileNotFoundError, ValueError):
+            return None
+
+        return {
+            "size": stat_result.st_size,
+            "content_type": mimetypes.guess_type(path)[0],
+        }
+
+    def get_public_url(self, path: str) -> str:
+        return f"{self.public_base_url}/files/{quote(path)}"
+
+
+def build_storage_backend(bucket: str) -> StorageBackend:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorageBackend(
+            settings.STORAGE_LOCAL_ROOT,
+            settings.STORAGE_PUBLIC_BASE_URL
+        )
+
+    return SupabaseStorageBackend(bucket)
@@ -0,0 +1,263 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select, union
+
+from app.config.config import settings
+from app.config.database import SessionLocal, engine
+from app.models.media_blob import MediaBlob
+from app.models.memory import Memory
+from app.models.memory_media import MemoryMedia
+from app.models.seed import Seed
+from app.models.seed_media import SeedMedia
+from app.services.background import PeriodicService
+from app.services.media_service import DERIVATIVE_SIZES, release_blob_refs
+from app.services.storage import storage
+
+logger = logging.getLogger(__name__)
+
+# Top-level folders of the bucket that hold media objects
+GC_PREFIXES = ("memories", "seeds", "blobs")
+
+# Arbitrary key for pg_try_advisory_lock, so only one app worker collects at a time
+GC_LOCK_KEY = 7345901
+
+LOOKUP_CHUNK_SIZE = 1000
+PURGE_BATCH_SIZE = 500
+
+
+def object_stem(path: str) -> tuple[str, bool]:
+    """Split a storage path into its stem and whether it is a derivative."""
+    for name in DERIVATIVE_SIZES:
+        suffix = f".{name}.webp"
+        if path.endswith(suffix):
+            return path[:-len(suffix)], True
+
+    return path.rsplit(".", 1)[0], False
+
+
+class StorageGC(PeriodicService):
+    """
+    Removes storage objects that no media row references any more.
+
+    A run has two phases:
+
+    1. Media rows of soft-deleted memories and cancelled seeds are
+       deleted in batches, releasing their blob references, and so are
+       blob claims of uploads that never finished.
+    2. The bucket is walked one folder at a time. The originals in each
+       folder are looked up against memory_media, seed_media and
+       media_blobs, and every object whose stem is not referenced (the
+       original and its derivatives) is an orphan. Only one folder is
+       held in memory at once.
+
+    Objects younger than STORAGE_GC_MIN_AGE_SECONDS are skipped, so uploads
+    whose row is not committed yet (and direct uploads awaiting finalize)
+    survive. Orphans are removed in bulk calls of STORAGE_GC_REMOVE_BATCH_SIZE
+    paths, at most STORAGE_GC_REMOVES_PER_SECOND calls per second, folder
+    by folder. Every batch after a folder's first is checked again just
+    before its removal, so a re-upload during the throttle's pauses is kept.
+    """
+
+    name = "Storage GC run"
+
+    def interval(self) -> float:
+        return settings.STORAGE_GC_INTERVAL_SECONDS
+
+    async def tick(self):
+        await self.run_once()
+
+    async def run_once(self) -> dict | None:
+        """
+        Run one collection and return its report, or None if another
+        worker holds the GC lock.
+        """
+        # A connection of its own, since a session would hand it back to
+        # the pool on commit and the unlock could run on another one
+        lock_conn = await asyncio.to_thread(engine.connect)
+        try:
+            acquired = await asyncio.to_thread(self._lock, lock_conn)
+
+            if not acquired:
+                return None
+
+            try:
+                return await self._collect()
+            finally:
+                await asyncio.to_thread(self._unlock, lock_conn)
+        finally:
+            await asyncio.to_thread(lock_conn.close)
+
+    def _lock(self, lock_conn) -> bool:
+        acquired = lock_conn.execute(select(func.pg_try_advisory_lock(GC_LOCK_KEY))).scalar()
+
+        # The lock belongs to the connection, not the transaction, so it
+        # need not sit idle in a transaction for the whole run
+        lock_conn.commit()
+
+        return acquired
+
+    def _unlock(self, lock_conn):
+        lock_conn.execute(select(func.pg_advisory_unlock(GC_LOCK_KEY)))
+        lock_conn.commit()
+
+    async def _collect(self) -> dict:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.STORAGE_GC_MIN_AGE_SECONDS)
+
+        report = {
+            "purged_media_rows": await asyncio.to_thread(self._purge_dead_media),
+            "abandoned_blob_claims": await asyncio.to_thread(self._purge_abandoned_claims, cutoff),
+            "scanned_objects": 0,
+            "orphaned_objects": 0,
+            "reclaimed_bytes": 0,
+        }
+
+        folders = list(GC_PREFIXES)
+        batch_size = settings.STORAGE_GC_REMOVE_BATCH_SIZE
+
+        while folders:
+            folder = folders.pop()
+            objects = []
+
+            for entry in await storage.list_folder(folder):
+                if entry["is_folder"]:
+                    folders.append(entry["path"])
+                else:
+                    objects.append(entry)
+
+            if not objects:
+                continue
+
+            report["scanned_objects"] += len(objects)
+
+            orphans = await self._find_orphans(objects, cutoff)
+
+            for start in range(0, len(orphans), batch_size):
+                batch = orphans[start:start + batch_size]
+
+                if start:
+                    # The throttle has slept since the check, long enough
+                    # for an upload to reference or rewrite one of these
+                    batch = await self._still_orphaned(folder, batch, cutoff)
+
+                if not batch:
+                    continue
+
+                report["orphaned_objects"] += len(batch)
+                report["reclaimed_bytes"] += sum(obj["size"] or 0 for obj in batch)
+
+                await self._remove([obj["path"] for obj in batch])
+
+        logger.info(
+            "Storage GC removed %d of %d objects (%d bytes), purged %d media rows",
+            report["orphaned_objects"],
+            report["scanned_objects"],
+            report["reclaimed_bytes"],
+            report["purged_media_rows"]
+        )
+
+        return report
+
+    async def _find_orphans(self, objects: list[dict], cutoff: datetime) -> list[dict]:
+        """The objects of one folder whose stem nothing references, written before cutoff."""
+        originals = [obj["path"] for obj in objects if not object_stem(obj["path"])[1]]
+        referenced = await asyncio.to_thread(self._referenced_paths, originals)
+        live_stems = {object_stem(path)[0] for path in referenced}
+
+        return [
+            obj for obj in objects
+            if object_stem(obj["path"])[0] not in live_stems and obj["updated_at"] <= cutoff
+        ]
+
+    async def _still_orphaned(self, folder: str, batch: list[dict], cutoff: datetime) -> list[dict]:
+        """Check a batch again against a fresh listing of its folder and the database."""
+        objects = [entry for entry in await storage.list_folder(folder) if not entry["is_folder"]]
+        orphans = {obj["path"] for obj in await self._find_orphans(objects, cutoff)}
+
+        return [obj for obj in batch if obj["path"] in orphans]
+
+    async def _remove(self, paths: list[str]):
+        await storage.remove(paths)
+        await asyncio.sleep(1 / settings.STORAGE_GC_REMOVES_PER_SECOND)
+
+    def _referenced_paths(self, paths: list[str]) -> set[str]:
+        db = SessionLocal()
+        try:
+            found = set()
+
+            for start in range(0, len(paths), LOOKUP_CHUNK_SIZE):
+                chunk = paths[start:start + LOOKUP_CHUNK_SIZE]
+
+                found.update(db.execute(union(
+                    select(MemoryMedia.file_path).where(MemoryMedia.file_path.in_(chunk)),
+                    select(SeedMedia.file_path).where(SeedMedia.file_path.in_(chunk)),
+                    select(MediaBlob.file_path).where(MediaBlob.file_path.in_(chunk))
+                )).scalars())
+
+            return found
+        finally:
+            db.close()
+
+    def _purge_abandoned_claims(self, cutoff: datetime) -> int:
+        """
+        Delete blob claims left by uploads that died mid-transfer. Their
+        objects, if any, are then orphans for the walk that follows.
+        """
+        db = SessionLocal()
+        try:
+            purged = db.execute(
+                delete(MediaBlob).where(
+                    MediaBlob.stored == False,
+                    MediaBlob.ref_count == 0,
+                    MediaBlob.created_at < cutoff
+                )
+            ).rowcount
+            db.commit()
+
+            return purged
+        finally:
+            db.close()
+
+    def _purge_dead_media(self) -> int:
+        """Delete media rows whose memory or seed is gone for good."""
+        dead_parents = (
+            (MemoryMedia, MemoryMedia.memory_id.in_(
+                select(Memory.id).where(Memory.is_deleted == True)
+            )),
+            (SeedMedia, SeedMedia.seed_id.in_(
+                select(Seed.id).where(Seed.status == "cancelled")
+            )),
+        )
+
+        db = SessionLocal()
+        try:
+            purged = 0
+
+            for model, is_dead in dead_parents:
+                while True:
+                    blob_ids = db.execute(
+                        delete(model).where(
+                            model.id.in_(
+                                select(model.id).where(is_dead).limit(PURGE_BATCH_SIZE)
+                            )
+                        ).returning(model.blob_id)
+                    ).scalars().all()
+
+                    if not blob_ids:
+                        break
+
+                    release_blob_refs(db, Counter(
+                        blob_id for blob_id in blob_ids if blob_id is not None
+                    ))
+                    db.commit()
+
+                    purged += len(blob_ids)
+
+            return purged
+        finally:
+            db.close()
+
+
+storage_gc = StorageGC()
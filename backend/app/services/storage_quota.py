@@ -0,0 +1,54 @@
+from fastapi import HTTPException
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+from app.models.vault import Vault
+
+
+def _quota_exceeded():
+    return HTTPException(status_code=400, detail="Vault storage quota exceeded")
+
+
+def check_vault_quota(vault: Vault, size: int):
+    """Cheap early check against the already loaded vault, before any bytes are stored."""
+    if vault.storage_used_bytes + size > settings.VAULT_STORAGE_QUOTA_BYTES:
+        raise _quota_exceeded()
+
+
+def charge_vault_storage(db: Session, vault_id, size: int | None):
+    """
+    Add size bytes to the vault's usage, or refuse if that passes the quota.
+
+    A single conditional UPDATE on the vault row, so two concurrent
+    uploads cannot both slip under the limit. Not committed; call it just
+    before the commit that records the media row.
+    """
+    if not size:
+        return
+
+    charged = db.execute(
+        update(Vault).where(
+            Vault.id == vault_id,
+            Vault.storage_used_bytes + size <= settings.VAULT_STORAGE_QUOTA_BYTES
+        ).values(
+            storage_used_bytes=Vault.storage_used_bytes + size
+        ).returning(Vault.id)
+    ).first()
+
+    if charged is None:
+        raise _quota_exceeded()
+
+
+def release_vault_storage(db: Session, vault_id, size: int | None):
+    """Give size bytes back to the vault. Not committed."""
+    if not size:
+        return
+
+    db.execute(
+        update(Vault).where(
+            Vault.id == vault_id
+        ).values(
+            storage_used_bytes=func.greatest(Vault.storage_used_bytes - size, 0)
+        )
+    )
@@ -0,0 +1,206 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+from app.config.database import SessionLocal, engine
+from app.models.notification import Notification
+from app.models.thinking_signal import ThinkingSignal
+from app.models.user import User
+from app.models.user_unread_counts import UserUnreadCounts
+from app.services.background import PeriodicService
+
+COUNTER_COLUMNS = ("notifications", "signals")
+
+# Advisory lock key held for the whole repair, across its batch commits
+UNREAD_COUNTS_LOCK_KEY = 7345904
+
+# Users recomputed per transaction by the repair
+UNREAD_COUNTS_REPAIR_BATCH_SIZE = 1000
+
+
+def bump_unread_counts(db: Session, user_id, **deltas: int):
+    """
+    Add deltas to a user's counters, e.g. bump_unread_counts(db, user_id, signals=1).
+
+    The caller commits, so a counter moves together with the notification
+    or signal it counts. Counters never go below zero.
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+
+    if not deltas:
+        return
+
+    stmt = pg_insert(UserUnreadCounts).values(
+        user_id=user_id,
+        updated_at=datetime.utcnow(),
+        **{column: max(delta, 0) for column, delta in deltas.items()}
+    )
+
+    changes = {
+        column: func.greatest(getattr(UserUnreadCounts, column) + delta, 0)
+        for column, delta in deltas.items()
+    }
+    changes["updated_at"] = stmt.excluded.updated_at
+
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserUnreadCounts.user_id],
+        set_=changes
+    ))
+
+
+def load_unread_counts(db: Session, user_ids: list) -> dict:
+    """Unread notification and signal counts for each user, by primary key."""
+    counts = {
+        user_id: {"notifications": 0, "signals": 0}
+        for user_id in user_ids
+    }
+
+    rows = db.execute(
+        select(
+            UserUnreadCounts.user_id,
+            UserUnreadCounts.notifications,
+            UserUnreadCounts.signals
+        ).where(UserUnreadCounts.user_id.in_(user_ids))
+    ).all()
+
+    for user_id, notifications, signals in rows:
+        counts[user_id] = {"notifications": notifications, "signals": signals}
+
+    return counts
+
+
+def get_unread_counts(db: Session, user_id) -> dict:
+    return load_unread_counts(db, [user_id])[user_id]
+
+
+def recompute_unread_counts(db: Session, after=None, through=None):
+    """
+    Reset users' counters to the unread notifications and unseen signals
+    actually stored, for every user or those with after < id <= through.
+    Not committed.
+
+    The counters table is locked against bump_unread_counts until the
+    transaction ends. Otherwise a bump committed after the SELECT took its
+    snapshot would be overwritten by a count that does not include it, so
+    keep the range small and commit soon. Callers that write the source
+    tables themselves must do so before calling this, as every bump does,
+    so the two cannot deadlock.
+    """
+    # SHARE ROW EXCLUSIVE conflicts with the ROW EXCLUSIVE lock every
+    # upsert takes: this waits for in-flight bumps to commit, so the
+    # SELECT below sees them, and holds off new ones until commit
+    db.execute(text("LOCK TABLE user_unread_counts IN SHARE ROW EXCLUSIVE MODE"))
+
+    def in_range(user_id):
+        bounds = []
+        if after is not None:
+            bounds.append(user_id > after)
+        if through is not None:
+            bounds.append(user_id <= through)
+        return bounds
+
+    notifications = select(
+        Notification.user_id,
+        func.count().label("notifications")
+    ).where(
+        Notification.is_read == False,
+        *in_range(Notification.user_id)
+    ).group_by(Notification.user_id).subquery()
+
+    signals = select(
+        ThinkingSignal.recipient_id.label("user_id"),
+        func.count().label("signals")
+    ).where(
+        ThinkingSignal.is_seen == False,
+        *in_range(ThinkingSignal.recipient_id)
+    ).group_by(ThinkingSignal.recipient_id).subquery()
+
+    rows = select(
+        User.id,
+        func.coalesce(notifications.c.notifications, 0),
+        func.coalesce(signals.c.signals, 0),
+        func.timezone("utc", func.now())
+    ).outerjoin(
+        notifications, notifications.c.user_id == User.id
+    ).outerjoin(
+        signals, signals.c.user_id == User.id
+    ).where(
+        *in_range(User.id)
+    )
+
+    columns = ["user_id", *COUNTER_COLUMNS, "updated_at"]
+    stmt = pg_insert(UserUnreadCounts).from_select(columns, rows)
+
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserUnreadCounts.user_id],
+        set_={column: stmt.excluded[column] for column in columns[1:]}
+    ))
+
+
+class UnreadCountsRepair(PeriodicService):
+    """
+    Recomputes every user's unread counters every UNREAD_COUNTS_REPAIR_SECONDS.
+
+    Every app worker runs one, so a run first takes an advisory lock and
+    is skipped if another worker holds it. Users are recomputed
+    UNREAD_COUNTS_REPAIR_BATCH_SIZE at a time, each batch committed on its
+    own, so bumps only ever wait for one batch.
+    """
+
+    name = "Unread counts repair"
+
+    def interval(self) -> float:
+        return settings.UNREAD_COUNTS_REPAIR_SECONDS
+
+    async def tick(self):
+        await asyncio.to_thread(self.repair)
+
+    def repair(self) -> bool:
+        """Recompute every user's counters, unless another worker is already doing it."""
+        # The batches commit one by one, so the lock is held by a
+        # connection of its own rather than any one transaction
+        with engine.connect() as lock_conn:
+            acquired = lock_conn.execute(select(func.pg_try_advisory_lock(UNREAD_COUNTS_LOCK_KEY))).scalar()
+            lock_conn.commit()
+
+            if not acquired:
+                return False
+
+            try:
+                self._recompute_in_batches()
+            finally:
+                lock_conn.execute(select(func.pg_advisory_unlock(UNREAD_COUNTS_LOCK_KEY)))
+                lock_conn.commit()
+
+        return True
+
+    def _recompute_in_batches(self):
+        db = SessionLocal()
+        try:
+            after = None
+
+            while True:
+                # The last id of the batch, from users alone, outside the
+                # lock. None once fewer than a batch are left.
+                last = select(User.id).order_by(User.id).offset(UNREAD_COUNTS_REPAIR_BATCH_SIZE - 1).limit(1)
+                if after is not None:
+                    last = last.where(User.id > after)
+
+                through = db.execute(last).scalar()
+
+                recompute_unread_counts(db, after, through)
+                db.commit()
+
+                if through is None:
+                    return
+
+                after = through
+        finally:
+            db.close()
+
+
+unread_counts_repair = UnreadCountsRepair()
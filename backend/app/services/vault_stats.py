@@ -0,0 +1,192 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.models.memory import Memory
+from app.models.memory_media import MemoryMedia
+from app.models.seed import Seed
+from app.models.signal_daily_rollup import SignalDailyRollup
+from app.models.vault import Vault
+from app.models.vault_stats import VaultStats
+from app.services.background import PeriodicService
+from app.utils.aggregates import count_if
+
+# Transaction-level advisory lock key: a second worker skips the repair instead of waiting
+VAULT_STATS_LOCK_KEY = 7345903
+
+COUNTER_COLUMNS = (
+    "total_memories",
+    "total_seeds",
+    "total_images",
+    "total_videos",
+    "total_signals",
+)
+
+
+def media_stats_delta(file_type: str, delta: int) -> dict[str, int]:
+    """Counter change for adding (1) or removing (-1) a memory media file."""
+    if file_type.startswith("image"):
+        return {"total_images": delta}
+    if file_type.startswith("video"):
+        return {"total_videos": delta}
+    return {}
+
+
+def bump_vault_stats(db: Session, vault_id, memory_at: datetime | None = None, **deltas: int):
+    """
+    Add deltas to a vault's counters, e.g. bump_vault_stats(db, vault_id, total_seeds=1).
+
+    memory_at is the created_at of a new memory and widens the first/last
+    memory dates. One upsert, not committed, so the counters change in
+    the same transaction as the rows they count.
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+
+    if not deltas and memory_at is None:
+        return
+
+    values = {"vault_id": vault_id, "updated_at": datetime.utcnow(), **deltas}
+    if memory_at is not None:
+        values["first_memory_at"] = memory_at
+        values["last_activity_at"] = memory_at
+
+    stmt = pg_insert(VaultStats).values(**values)
+
+    changes = {
+        column: getattr(VaultStats, column) + stmt.excluded[column]
+        for column in deltas
+    }
+    changes["updated_at"] = stmt.excluded.updated_at
+
+    if memory_at is not None:
+        # LEAST/GREATEST skip NULLs, so the first memory sets both dates
+        changes["first_memory_at"] = func.least(VaultStats.first_memory_at, stmt.excluded.first_memory_at)
+        changes["last_activity_at"] = func.greatest(VaultStats.last_activity_at, stmt.excluded.last_activity_at)
+
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[VaultStats.vault_id],
+        set_=changes
+    ))
+
+
+def get_vault_stats(db: Session, vault_id) -> dict:
+    stats = db.get(VaultStats, vault_id)
+
+    return {
+        "total_memories": stats.total_memories if stats else 0,
+        "total_seeds": stats.total_seeds if stats else 0,
+        "total_images": stats.total_images if stats else 0,
+        "total_videos": stats.total_videos if stats else 0,
+        "total_signals": stats.total_signals if stats else 0,
+        "first_memory_date": stats.first_memory_at if stats else None,
+        "last_activity_date": stats.last_activity_at if stats else None,
+    }
+
+
+def recompute_vault_stats(db: Session):
+    """
+    Rebuild every vault's stats from memories, seeds, memory media and
+    the signal rollups, replacing the running totals. Not committed.
+
+    vault_stats is locked against bump_vault_stats until the transaction
+    ends, or a bump committed after the source tables were read would be
+    overwritten by totals that miss it.
+    """
+    # Waits for in-flight bumps (each holds ROW EXCLUSIVE until it
+    # commits) and keeps new ones out until this transaction ends
+    db.execute(text("LOCK TABLE vault_stats IN SHARE ROW EXCLUSIVE MODE"))
+
+    memories = select(
+        Memory.vault_id,
+        count_if(Memory.is_deleted == False).label("total_memories"),
+        func.min(Memory.created_at).label("first_memory_at"),
+        func.max(Memory.created_at).label("last_activity_at")
+    ).group_by(Memory.vault_id).subquery()
+
+    seeds = select(
+        Seed.vault_id,
+        func.count().label("total_seeds")
+    ).group_by(Seed.vault_id).subquery()
+
+    media = select(
+        Memory.vault_id,
+        count_if(MemoryMedia.file_type.like("image%")).label("total_images"),
+        count_if(MemoryMedia.file_type.like("video%")).label("total_videos")
+    ).join(
+        Memory, MemoryMedia.memory_id == Memory.id
+    ).where(
+        Memory.is_deleted == False
+    ).group_by(Memory.vault_id).subquery()
+
+    # From the rollups, which outlive retired signal partitions
+    signals = select(
+        SignalDailyRollup.vault_id,
+        func.sum(SignalDailyRollup.count).label("total_signals")
+    ).group_by(SignalDailyRollup.vault_id).subquery()
+
+    rows = select(
+        Vault.id,
+        func.coalesce(memories.c.total_memories, 0),
+        func.coalesce(seeds.c.total_seeds, 0),
+        func.coalesce(media.c.total_images, 0),
+        func.coalesce(media.c.total_videos, 0),
+        func.coalesce(signals.c.total_signals, 0),
+        memories.c.first_memory_at,
+        memories.c.last_activity_at,
+        func.timezone("utc", func.now())
+    ).outerjoin(
+        memories, memories.c.vault_id == Vault.id
+    ).outerjoin(
+        seeds, seeds.c.vault_id == Vault.id
+    ).outerjoin(
+        media, media.c.vault_id == Vault.id
+    ).outerjoin(
+        signals, signals.c.vault_id == Vault.id
+    )
+
+    columns = ["vault_id", *COUNTER_COLUMNS, "first_memory_at", "last_activity_at", "updated_at"]
+    stmt = pg_insert(VaultStats).from_select(columns, rows)
+
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[VaultStats.vault_id],
+        set_={column: stmt.excluded[column] for column in columns[1:]}
+    ))
+
+
+class VaultStatsRepair(PeriodicService):
+    """
+    Rebuilds vault_stats from scratch every VAULT_STATS_REPAIR_SECONDS,
+    correcting any drift in the incremental counters. Vaults are few and
+    small, so it is one transaction, run by whichever worker gets the
+    advisory lock first; the others skip that round.
+    """
+
+    name = "Vault stats repair"
+
+    def interval(self) -> float:
+        return settings.VAULT_STATS_REPAIR_SECONDS
+
+    async def tick(self):
+        await asyncio.to_thread(self.repair)
+
+    def repair(self) -> bool:
+        """Recompute the stats, unless another worker is already doing it."""
+        db = SessionLocal()
+        try:
+            if not db.execute(select(func.pg_try_advisory_xact_lock(VAULT_STATS_LOCK_KEY))).scalar():
+                return False
+
+            recompute_vault_stats(db)
+            db.commit()
+
+            return True
+        finally:
+            db.close()
+
+
+vault_stats_repair = VaultStatsRepair()
@@ -0,0 +1,40 @@
+from sqlalchemy import Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class count_if(FunctionElement):
+    """
+    Number of rows matching a condition, for use next to other aggregates.
+    Compiles to COUNT(*) FILTER (WHERE ...).
+    """
+    name = "count_if"
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(count_if)
+def _count_if_filter(element, compiler, **kw):
+    condition, = element.clauses
+    return "count(*) FILTER (WHERE %s)" % compiler.process(condition, **kw)
+
+
+def aggregate(db: Session, *filters, **measures) -> dict:
+    """
+    Evaluate several aggregates over the rows matching filters in one scan.
+
+        aggregate(
+            db,
+            Seed.vault_id == vault_id,
+            total=func.count(),
+            bloomed=count_if(Seed.status == "bloomed")
+        )
+
+    Returns a dict keyed by measure name.
+    """
+    row = db.query(
+        *(expression.label(name) for name, expression in measures.items())
+    ).filter(*filters).one()
+
+    return row._asdict()
@@ -0,0 +1,73 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from math import ceil
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+MAX_PAGE_SIZE = 50
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    raw = json.dumps({"t": created_at.isoformat(), "id": str(row_id)})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["t"]), uuid.UUID(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(query, model, page: int | None, page_size: int, cursor: str | None = None):
+    """
+    Page through a query ordered newest first on (created_at, id).
+
+    Passing `page` keeps the old page-number mode (OFFSET plus a COUNT) for
+    existing clients. Otherwise the query is keyset-paginated: `cursor` is
+    the opaque `next_cursor` of the previous page, and each page costs one
+    index range scan however deep it is.
+
+    Returns the rows and the pagination fields for the response body.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+
+    if page is not None:
+        page = max(page, 1)
+        total = query.order_by(None).count()
+
+        rows = query.offset((page - 1) * page_size)\
+                    .limit(page_size)\
+                    .all()
+
+        return rows, {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": ceil(total / page_size)
+        }
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(model.created_at, model.id) < tuple_(created_at, row_id)
+        )
+
+    rows = query.limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return rows, {
+        "page_size": page_size,
+        "next_cursor": next_cursor
+    }
@@ -0,0 +1,84 @@
+"""add vault stats
+
+Revision ID: 0a7d3e5f9b12
+Revises: f2b6c9d04e18
+Create Date: 2026-10-18 17:08:45.317904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a7d3e5f9b12'
+down_revision: Union[str, None] = 'f2b6c9d04e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('vault_stats',
+    sa.Column('vault_id', sa.UUID(), nullable=False),
+    sa.Column('total_memories', sa.Integer(), nullable=False),
+    sa.Column('total_seeds', sa.Integer(), nullable=False),
+    sa.Column('total_images', sa.Integer(), nullable=False),
+    sa.Column('total_videos', sa.Integer(), nullable=False),
+    sa.Column('total_signals', sa.Integer(), nullable=False),
+    sa.Column('first_memory_at', sa.DateTime(), nullable=True),
+    sa.Column('last_activity_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['vault_id'], ['vaults.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('vault_id')
+    )
+
+    # Backfill; same aggregates as recompute_vault_stats
+    op.execute("""
+        INSERT INTO vault_stats (
+            vault_id, total_memories, total_seeds, total_images, total_videos,
+            total_signals, first_memory_at, last_activity_at, updated_at
+        )
+        SELECT
+            v.id,
+            COALESCE(m.total_memories, 0),
+            COALESCE(s.total_seeds, 0),
+            COALESCE(mm.total_images, 0),
+            COALESCE(mm.total_videos, 0),
+            COALESCE(ts.total_signals, 0),
+            m.first_memory_at,
+            m.last_activity_at,
+            timezone('utc', now())
+        FROM vaults v
+        LEFT JOIN (
+            SELECT vault_id,
+                   count(*) FILTER (WHERE NOT is_deleted) AS total_memories,
+                   min(created_at) AS first_memory_at,
+                   max(created_at) AS last_activity_at
+            FROM memories
+            GROUP BY vault_id
+        ) m ON m.vault_id = v.id
+        LEFT JOIN (
+            SELECT vault_id, count(*) AS total_seeds
+            FROM seeds
+            GROUP BY vault_id
+        ) s ON s.vault_id = v.id
+        LEFT JOIN (
+            SELECT memories.vault_id,
+                   count(*) FILTER (WHERE memory_media.file_type LIKE 'image%') AS total_images,
+                   count(*) FILTER (WHERE memory_media.file_type LIKE 'video%') AS total_videos
+            FROM memory_media
+            JOIN memories ON memories.id = memory_media.memory_id
+            WHERE NOT memories.is_deleted
+            GROUP BY memories.vault_id
+        ) mm ON mm.vault_id = v.id
+        LEFT JOIN (
+            SELECT vault_id, count(*) AS total_signals
+            FROM thinking_signals
+            GROUP BY vault_id
+        ) ts ON ts.vault_id = v.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('vault_stats')
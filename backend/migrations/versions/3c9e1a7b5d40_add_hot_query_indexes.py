@@ -0,0 +1,67 @@
+"""add hot query indexes
+
+Revision ID: 3c9e1a7b5d40
+Revises: 0a7d3e5f9b12
+Create Date: 2026-10-18 18:02:19.451630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e1a7b5d40'
+down_revision: Union[str, None] = '0a7d3e5f9b12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('idx_journal_user_visibility_live', 'journals', ['user_id', 'visibility', 'created_at', 'id'], 'NOT is_deleted'),
+    ('idx_journal_vault_visibility_live', 'journals', ['vault_id', 'visibility', 'created_at', 'id'], 'NOT is_deleted'),
+    ('idx_seed_vault_status_bloom', 'seeds', ['vault_id', 'status', 'bloom_at'], None),
+    ('idx_seed_pending_bloom', 'seeds', ['bloom_at'], "status = 'scheduled' AND NOT bloom_notified"),
+    ('idx_notification_user_unread', 'notifications', ['user_id'], 'NOT is_read'),
+    ('idx_signal_recipient_unseen', 'thinking_signals', ['recipient_id'], 'NOT is_seen'),
+    ('idx_membership_user_active', 'vault_memberships', ['user_id'], 'left_at IS NULL'),
+    ('idx_membership_vault_active', 'vault_memberships', ['vault_id'], 'left_at IS NULL'),
+    ('idx_refresh_token_user_id', 'refresh_tokens', ['user_id'], None),
+    ('idx_password_reset_user_id', 'password_reset_tokens', ['user_id'], None),
+]
+
+
+def _is_invalid(name: str) -> bool:
+    return bool(op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": name}
+    ).scalar())
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY does not block writes, but cannot run
+    # inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            # A failed concurrent build leaves an INVALID index behind,
+            # which IF NOT EXISTS alone would take for a finished one
+            if _is_invalid(name):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,36 @@
+"""add media blob derivative attempts
+
+Revision ID: 4d8f2a6c1e95
+Revises: c6a9e4d21f87
+Create Date: 2026-10-18 21:14:09.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8f2a6c1e95'
+down_revision: Union[str, None] = 'c6a9e4d21f87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('media_blobs', sa.Column('derivative_attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('media_blobs', sa.Column('derivatives_attempted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'idx_media_blob_derivatives_pending',
+        'media_blobs',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text('NOT derivatives_ready')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_media_blob_derivatives_pending', table_name='media_blobs')
+    op.drop_column('media_blobs', 'derivatives_attempted_at')
+    op.drop_column('media_blobs', 'derivative_attempts')
@@ -0,0 +1,40 @@
+"""add email outbox table
+
+Revision ID: 5b8e1f0c2d47
+Revises: 1a42aad37169
+Create Date: 2026-10-18 09:12:41.503216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e1f0c2d47'
+down_revision: Union[str, None] = '1a42aad37169'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('email_outbox',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('to_email', sa.String(length=255), nullable=False),
+    sa.Column('template', sa.String(length=50), nullable=False),
+    sa.Column('context', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_email_outbox_status_created_at', 'email_outbox', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_email_outbox_status_created_at', table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,56 @@
+"""add user unread counts
+
+Revision ID: 5e2f8b1c7a63
+Revises: 3c9e1a7b5d40
+Create Date: 2026-10-18 18:41:07.286514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2f8b1c7a63'
+down_revision: Union[str, None] = '3c9e1a7b5d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_unread_counts',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('notifications', sa.Integer(), nullable=False),
+    sa.Column('signals', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill; same aggregates as recompute_unread_counts
+    op.execute("""
+        INSERT INTO user_unread_counts (user_id, notifications, signals, updated_at)
+        SELECT
+            u.id,
+            COALESCE(n.notifications, 0),
+            COALESCE(ts.signals, 0),
+            timezone('utc', now())
+        FROM users u
+        LEFT JOIN (
+            SELECT user_id, count(*) AS notifications
+            FROM notifications
+            WHERE NOT is_read
+            GROUP BY user_id
+        ) n ON n.user_id = u.id
+        LEFT JOIN (
+            SELECT recipient_id, count(*) AS signals
+            FROM thinking_signals
+            WHERE NOT is_seen
+            GROUP BY recipient_id
+        ) ts ON ts.recipient_id = u.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_unread_counts')
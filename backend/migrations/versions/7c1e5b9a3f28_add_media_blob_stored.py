@@ -0,0 +1,27 @@
+"""add media blob stored
+
+Revision ID: 7c1e5b9a3f28
+Revises: 4d8f2a6c1e95
+Create Date: 2026-10-18 22:03:51.740126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e5b9a3f28'
+down_revision: Union[str, None] = '4d8f2a6c1e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every existing blob was recorded after its object was stored
+    op.add_column('media_blobs', sa.Column('stored', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('media_blobs', 'stored')
@@ -0,0 +1,135 @@
+"""partition notifications and signals by month
+
+Revision ID: 8b4d6f2e0c35
+Revises: 5e2f8b1c7a63
+Create Date: 2026-10-18 19:26:52.904117
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4d6f2e0c35'
+down_revision: Union[str, None] = '5e2f8b1c7a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Months after the current one to create up front; the partition
+# maintainer keeps this window moving
+PREMAKE_MONTHS = 3
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def notification_columns():
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('type', sa.String(length=50), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('reference_type', sa.String(length=50), nullable=True),
+        sa.Column('reference_id', sa.UUID(), nullable=True),
+        sa.Column('is_read', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    ]
+
+
+def signal_columns():
+    return [
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('vault_id', sa.Uuid(), nullable=False),
+        sa.Column('sender_id', sa.Uuid(), nullable=False),
+        sa.Column('recipient_id', sa.Uuid(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('is_seen', sa.Boolean(), nullable=False),
+        sa.Column('seen_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['recipient_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['vault_id'], ['vaults.id'], ondelete='CASCADE'),
+    ]
+
+
+# table -> (column factory, [(index name, columns, partial index predicate)])
+TABLES = {
+    'notifications': (notification_columns, [
+        ('idx_notification_user_id', ['user_id'], None),
+        ('idx_notification_user_created', ['user_id', 'created_at', 'id'], None),
+        ('idx_notification_user_unread', ['user_id'], 'NOT is_read'),
+    ]),
+    'thinking_signals': (signal_columns, [
+        ('idx_signal_vault_id', ['vault_id'], None),
+        ('idx_signal_recipient', ['recipient_id'], None),
+        ('idx_signal_recipient_unseen', ['recipient_id'], 'NOT is_seen'),
+    ]),
+}
+
+
+def create_indexes(table, indexes):
+    for name, columns, where in indexes:
+        op.create_index(
+            name,
+            table,
+            columns,
+            unique=False,
+            postgresql_where=sa.text(where) if where else None
+        )
+
+
+def rebuild(table, columns, indexes, partitioned):
+    """Swap table for a copy that is (or is no longer) partitioned, moving the rows over."""
+    old = f'{table}_old'
+
+    # Free the names the new table needs
+    op.rename_table(table, old)
+    op.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+    for name, _, _ in indexes:
+        op.drop_index(name, table_name=old)
+
+    if partitioned:
+        op.create_table(
+            table,
+            *columns(),
+            sa.PrimaryKeyConstraint('id', 'created_at'),
+            postgresql_partition_by='RANGE (created_at)'
+        )
+
+        first = op.get_bind().execute(sa.text(f'SELECT min(created_at) FROM {old}')).scalar()
+        now = datetime.now(timezone.utc)
+        month = date((first or now).year, (first or now).month, 1)
+        last = add_months(date(now.year, now.month, 1), PREMAKE_MONTHS)
+
+        while month <= last:
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{add_months(month, 1)} 00:00:00+00')"
+            )
+            month = add_months(month, 1)
+    else:
+        op.create_table(table, *columns(), sa.PrimaryKeyConstraint('id'))
+
+    names = ', '.join(column.name for column in columns() if isinstance(column, sa.Column))
+    op.execute(f'INSERT INTO {table} ({names}) SELECT {names} FROM {old}')
+    op.drop_table(old)
+
+    # Created on the parent, so every partition gets them
+    create_indexes(table, indexes)
+
+
+def upgrade() -> None:
+    for table, (columns, indexes) in TABLES.items():
+        rebuild(table, columns, indexes, partitioned=True)
+
+
+def downgrade() -> None:
+    for table, (columns, indexes) in TABLES.items():
+        rebuild(table, columns, indexes, partitioned=False)
@@ -0,0 +1,34 @@
+"""add keyset pagination indexes
+
+Revision ID: 9c3d7a21e6f4
+Revises: 5b8e1f0c2d47
+Create Date: 2026-10-18 10:03:27.118452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3d7a21e6f4'
+down_revision: Union[str, None] = '5b8e1f0c2d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_memory_vault_created', 'memories', ['vault_id', 'created_at', 'id'], unique=False)
+    op.create_index('idx_seed_vault_created', 'seeds', ['vault_id', 'created_at', 'id'], unique=False)
+    op.create_index('idx_journal_user_created', 'journals', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('idx_journal_vault_created', 'journals', ['vault_id', 'created_at', 'id'], unique=False)
+    op.create_index('idx_notification_user_created', 'notifications', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_notification_user_created', table_name='notifications')
+    op.drop_index('idx_journal_vault_created', table_name='journals')
+    op.drop_index('idx_journal_user_created', table_name='journals')
+    op.drop_index('idx_seed_vault_created', table_name='seeds')
+    op.drop_index('idx_memory_vault_created', table_name='memories')
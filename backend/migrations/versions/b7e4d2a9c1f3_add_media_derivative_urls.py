@@ -0,0 +1,32 @@
+"""add media derivative urls
+
+Revision ID: b7e4d2a9c1f3
+Revises: 9c3d7a21e6f4
+Create Date: 2026-10-18 13:41:09.562187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d2a9c1f3'
+down_revision: Union[str, None] = '9c3d7a21e6f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('memory_media', sa.Column('thumbnail_url', sa.String(length=500), nullable=True))
+    op.add_column('memory_media', sa.Column('medium_url', sa.String(length=500), nullable=True))
+    op.add_column('seed_media', sa.Column('thumbnail_url', sa.String(length=500), nullable=True))
+    op.add_column('seed_media', sa.Column('medium_url', sa.String(length=500), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('seed_media', 'medium_url')
+    op.drop_column('seed_media', 'thumbnail_url')
+    op.drop_column('memory_media', 'medium_url')
+    op.drop_column('memory_media', 'thumbnail_url')
@@ -0,0 +1,58 @@
+"""add signal rollups
+
+Revision ID: c6a9e4d21f87
+Revises: 8b4d6f2e0c35
+Create Date: 2026-10-18 20:03:41.662085
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6a9e4d21f87'
+down_revision: Union[str, None] = '8b4d6f2e0c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('signal_hourly_rollups',
+    sa.Column('vault_id', sa.Uuid(), nullable=False),
+    sa.Column('hour', sa.DateTime(), nullable=False),
+    sa.Column('sender_id', sa.Uuid(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['vault_id'], ['vaults.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('vault_id', 'hour', 'sender_id')
+    )
+    op.create_table('signal_daily_rollups',
+    sa.Column('vault_id', sa.Uuid(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('sender_id', sa.Uuid(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['vault_id'], ['vaults.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('vault_id', 'day', 'sender_id')
+    )
+
+    # Backfill from the signals still kept
+    op.execute("""
+        INSERT INTO signal_hourly_rollups (vault_id, hour, sender_id, count)
+        SELECT vault_id, date_trunc('hour', created_at), sender_id, count(*)
+        FROM thinking_signals
+        GROUP BY 1, 2, 3
+    """)
+    op.execute("""
+        INSERT INTO signal_daily_rollups (vault_id, day, sender_id, count)
+        SELECT vault_id, CAST(hour AS date), sender_id, sum(count)
+        FROM signal_hourly_rollups
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('signal_daily_rollups')
+    op.drop_table('signal_hourly_rollups')
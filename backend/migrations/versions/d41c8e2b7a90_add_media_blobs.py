@@ -0,0 +1,55 @@
+"""add media blobs
+
+Revision ID: d41c8e2b7a90
+Revises: b7e4d2a9c1f3
+Create Date: 2026-10-18 14:52:36.204719
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41c8e2b7a90'
+down_revision: Union[str, None] = 'b7e4d2a9c1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('media_blobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=True),
+    sa.Column('file_path', sa.String(length=500), nullable=False),
+    sa.Column('file_type', sa.String(length=50), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('derivatives_ready', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('file_path')
+    )
+    op.create_index('uq_media_blob_content_hash', 'media_blobs', ['content_hash'], unique=True)
+
+    op.add_column('memory_media', sa.Column('blob_id', sa.UUID(), nullable=True))
+    op.create_foreign_key('memory_media_blob_id_fkey', 'memory_media', 'media_blobs', ['blob_id'], ['id'])
+    op.create_index('idx_media_blob_id', 'memory_media', ['blob_id'], unique=False)
+
+    op.add_column('seed_media', sa.Column('blob_id', sa.UUID(), nullable=True))
+    op.create_foreign_key('seed_media_blob_id_fkey', 'seed_media', 'media_blobs', ['blob_id'], ['id'])
+    op.create_index('idx_seed_media_blob_id', 'seed_media', ['blob_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_seed_media_blob_id', table_name='seed_media')
+    op.drop_constraint('seed_media_blob_id_fkey', 'seed_media', type_='foreignkey')
+    op.drop_column('seed_media', 'blob_id')
+
+    op.drop_index('idx_media_blob_id', table_name='memory_media')
+    op.drop_constraint('memory_media_blob_id_fkey', 'memory_media', type_='foreignkey')
+    op.drop_column('memory_media', 'blob_id')
+
+    op.drop_index('uq_media_blob_content_hash', table_name='media_blobs')
+    op.drop_table('media_blobs')
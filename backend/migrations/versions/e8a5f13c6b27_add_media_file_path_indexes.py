@@ -0,0 +1,28 @@
+"""add media file path indexes
+
+Revision ID: e8a5f13c6b27
+Revises: d41c8e2b7a90
+Create Date: 2026-10-18 15:37:58.910342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a5f13c6b27'
+down_revision: Union[str, None] = 'd41c8e2b7a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_media_file_path', 'memory_media', ['file_path'], unique=False)
+    op.create_index('idx_seed_media_file_path', 'seed_media', ['file_path'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_seed_media_file_path', table_name='seed_media')
+    op.drop_index('idx_media_file_path', table_name='memory_media')
@@ -0,0 +1,30 @@
+"""add media size and vault storage usage
+
+Revision ID: f2b6c9d04e18
+Revises: e8a5f13c6b27
+Create Date: 2026-10-18 16:24:11.738205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6c9d04e18'
+down_revision: Union[str, None] = 'e8a5f13c6b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('memory_media', sa.Column('size', sa.BigInteger(), nullable=True))
+    op.add_column('seed_media', sa.Column('size', sa.BigInteger(), nullable=True))
+    op.add_column('vaults', sa.Column('storage_used_bytes', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('vaults', 'storage_used_bytes')
+    op.drop_column('seed_media', 'size')
+    op.drop_column('memory_media', 'size')
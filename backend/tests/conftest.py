@@ -0,0 +1,184 @@
+import os
+import secrets
+from contextlib import contextmanager
+import tempfile
+import uuid
+
+import pytest
+
+# The suite runs against a real Postgres database that it is free to wipe:
+#
+#   TEST_DATABASE_URL=postgresql://localhost/vault_test python -m pytest
+#
+# Tests that need the database are skipped when it is not set.
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+# Settings are read when app.config.config is imported, so the
+# environment has to be in place before anything from app/ is
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or "postgresql://localhost/unused"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "15")
+os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "1")
+os.environ.setdefault("RESEND_API_KEY", "test")
+os.environ.setdefault("EMAIL_FROM", "vault@example.com")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["STORAGE_LOCAL_ROOT"] = tempfile.mkdtemp(prefix="vault-test-storage-")
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from app.api import deps
+from app.config.database import Base, SessionLocal, engine
+from app.config.rate_limit import limiter
+from app.config.security import create_access_token, hash_password
+from app.main import app
+from app.models.user import User
+from app.models.vault import Vault
+from app.models.vault_membership import VaultMembership
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEST_PASSWORD = "correct horse battery"
+
+# Hashing once keeps fixtures from paying bcrypt's cost per user
+_TEST_PASSWORD_HASH = hash_password(TEST_PASSWORD)
+
+
+def pytest_collection_modifyitems(config, items):
+    # Wall-clock assertions are too noisy for every run:
+    #
+    #   RUN_BENCHMARKS=1 python -m pytest -m benchmark
+    if os.environ.get("RUN_BENCHMARKS"):
+        return
+
+    skip = pytest.mark.skip(reason="benchmark; set RUN_BENCHMARKS=1 to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """A test database migrated to head from an empty schema."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.set_main_option("sqlalchemy.url", TEST_DATABASE_URL.replace("%", "%%"))
+    command.upgrade(config, "head")
+
+    # The per-IP limits would trip on the test client's fixed address
+    limiter.enabled = False
+
+    yield engine
+
+    limiter.enabled = True
+
+
+def truncate_all():
+    """Empty every table, and the caches that could remember their rows."""
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    with engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {tables} CASCADE"))
+
+    deps._principal_cache.clear()
+
+
+@pytest.fixture
+def db(database):
+    session = SessionLocal()
+
+    yield session
+
+    session.close()
+    truncate_all()
+
+
+@pytest.fixture
+def client(db):
+    # Not entered as a context manager, so the lifespan's background
+    # workers stay off and tests drive them directly
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_user(db):
+    def make(display_name: str = "User") -> User:
+        user = User(
+            email=f"{uuid.uuid4().hex[:12]}@example.com",
+            password_hash=_TEST_PASSWORD_HASH,
+            display_name=display_name,
+        )
+        db.add(user)
+        db.commit()
+        return user
+
+    return make
+
+
+@pytest.fixture
+def make_vault(db):
+    def make(*members: User) -> Vault:
+        vault = Vault(
+            invite_code=secrets.token_hex(4),
+            status="active" if len(members) > 1 else "pending",
+            created_by=members[0].id,
+        )
+        db.add(vault)
+        db.flush()
+
+        for member in members:
+            db.add(VaultMembership(vault_id=vault.id, user_id=member.id))
+
+        db.commit()
+        return vault
+
+    return make
+
+
+@pytest.fixture
+def count_queries(database):
+    """
+    Context manager collecting every statement sent to the database:
+
+        with count_queries() as statements:
+            ...
+        assert len(statements) == 3
+    """
+    @contextmanager
+    def count():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return count
+
+
+@pytest.fixture
+def password():
+    """The plain password of every user from make_user."""
+    return TEST_PASSWORD
+
+
+def auth_headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+
+@pytest.fixture
+def headers():
+    return auth_headers
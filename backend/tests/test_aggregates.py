@@ -0,0 +1,162 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, text
+
+from app.api.journal import my_journal_analytics, vault_journal_analytics
+from app.api.seed import seed_summary
+from app.models.journal import Journal
+from app.models.seed import Seed
+
+# 10k by default; set AGGREGATE_BENCHMARK_ROWS=1000000 for the large run
+ROWS = int(os.environ.get("AGGREGATE_BENCHMARK_ROWS", 10_000))
+
+
+def populate(db, users, vaults):
+    """ROWS journals and ROWS seeds, spread evenly over every user and vault."""
+    params = {"rows": ROWS, "users": [user.id for user in users], "vaults": [vault.id for vault in vaults]}
+
+    # users[i] belongs to vaults[i // 2]
+    db.execute(text("""
+        INSERT INTO journals (id, user_id, vault_id, title, content, visibility, status, created_at, is_deleted)
+        SELECT gen_random_uuid(),
+               (CAST(:users AS uuid[]))[1 + i % 4],
+               CASE WHEN i % 3 = 0 THEN NULL ELSE (CAST(:vaults AS uuid[]))[1 + (i % 4) / 2] END,
+               'Entry', '...',
+               CASE WHEN i % 3 = 0 THEN 'private' ELSE 'shared' END,
+               CASE WHEN i % 5 = 0 THEN 'converted' ELSE 'active' END,
+               now() - make_interval(mins => i),
+               i % 11 = 0
+        FROM generate_series(1, :rows) AS i
+    """), params)
+
+    db.execute(text("""
+        INSERT INTO seeds (id, vault_id, created_by, title, content, bloom_at, created_at, status, bloom_notified)
+        SELECT gen_random_uuid(),
+               (CAST(:vaults AS uuid[]))[1 + i % 2],
+               (CAST(:users AS uuid[]))[1 + 2 * (i % 2)],
+               'Seed', '...',
+               now() + make_interval(hours => i % 7 - 3),
+               now() - make_interval(mins => i),
+               (ARRAY['scheduled', 'scheduled', 'bloomed', 'cancelled'])[1 + i % 4],
+               false
+        FROM generate_series(1, :rows) AS i
+    """), params)
+
+    db.commit()
+    db.execute(text("ANALYZE journals"))
+    db.execute(text("ANALYZE seeds"))
+
+
+# The queries the endpoints ran before the single-pass rewrite
+
+def legacy_my_journal_analytics(db, user_id):
+    live = (Journal.user_id == user_id, Journal.is_deleted == False)
+
+    first_entry = db.query(Journal.created_at).filter(*live).order_by(Journal.created_at.asc()).first()
+    latest_entry = db.query(Journal.created_at).filter(*live).order_by(Journal.created_at.desc()).first()
+
+    return {
+        "total_entries": db.query(Journal).filter(*live).count(),
+        "private_entries": db.query(Journal).filter(*live, Journal.visibility == "private").count(),
+        "shared_entries": db.query(Journal).filter(*live, Journal.visibility == "shared").count(),
+        "converted_entries": db.query(Journal).filter(*live, Journal.status == "converted").count(),
+        "first_entry_date": first_entry[0] if first_entry else None,
+        "latest_entry_date": latest_entry[0] if latest_entry else None,
+    }
+
+
+def legacy_vault_journal_analytics(db, vault_id):
+    live = (Journal.vault_id == vault_id, Journal.is_deleted == False)
+
+    return {
+        "total_shared_journals": db.query(Journal).filter(*live, Journal.visibility == "shared").count(),
+        "converted_to_memories": db.query(Journal).filter(*live, Journal.status == "converted").count(),
+    }
+
+
+def legacy_seed_summary(db, vault_id, now):
+    def count(*conditions):
+        return db.query(func.count(Seed.id)).filter(Seed.vault_id == vault_id, *conditions).scalar()
+
+    return {
+        "total": count(Seed.status != "cancelled"),
+        "growing": count(Seed.status == "scheduled", Seed.bloom_at > now),
+        "ready": count(Seed.status == "scheduled", Seed.bloom_at <= now),
+        "bloomed": count(Seed.status == "bloomed"),
+    }
+
+
+def timed(fn, *args, repeat: int = 5):
+    best = float("inf")
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+
+    return result, best
+
+
+def test_endpoints_match_the_old_queries_per_tenant(client, db, make_user, make_vault, headers):
+    users = [make_user() for _ in range(4)]
+    vaults = [make_vault(users[0], users[1]), make_vault(users[2], users[3])]
+    populate(db, users, vaults)
+
+    now = datetime.now(timezone.utc)
+
+    for user, vault in ((users[0], vaults[0]), (users[2], vaults[1])):
+        auth = headers(user)
+
+        mine = client.get("/journals/analytics/me", headers=auth).json()
+        expected = legacy_my_journal_analytics(db, user.id)
+        # Scoped to the user: a quarter of the live rows, not all of them
+        assert 0 < expected["total_entries"] < db.query(Journal).filter(Journal.is_deleted == False).count()
+        assert mine["total_entries"] == expected["total_entries"]
+        assert mine["shared_entries"] == expected["shared_entries"]
+        assert mine["private_entries"] == expected["private_entries"]
+        assert mine["converted_entries"] == expected["converted_entries"]
+
+        shared = client.get("/journals/analytics/vault", headers=auth).json()
+        assert shared == legacy_vault_journal_analytics(db, vault.id)
+
+        summary = client.get("/seeds/summary", headers=auth).json()
+        expected = legacy_seed_summary(db, vault.id, now)
+        assert 0 < expected["total"] < db.query(Seed).filter(Seed.status != "cancelled").count()
+        assert summary["total"] == expected["total"]
+        assert summary["bloomed"] == expected["bloomed"]
+
+
+@pytest.mark.benchmark
+def test_single_pass_benchmark(db, make_user, make_vault, count_queries):
+    """Old multi-query analytics against the single-pass ones, on ROWS journals and seeds."""
+    users = [make_user() for _ in range(4)]
+    vaults = [make_vault(users[0], users[1]), make_vault(users[2], users[3])]
+    populate(db, users, vaults)
+
+    now = datetime.now(timezone.utc)
+    cases = (
+        ("journal analytics (me)", legacy_my_journal_analytics, my_journal_analytics, users[0].id),
+        ("journal analytics (vault)", legacy_vault_journal_analytics, vault_journal_analytics, vaults[0].id),
+        ("seed summary", lambda db, vault_id: legacy_seed_summary(db, vault_id, now),
+         lambda db, vault_id: seed_summary(db, vault_id, now), vaults[0].id),
+    )
+
+    for name, legacy, single_pass, scope in cases:
+        with count_queries() as legacy_statements:
+            legacy_result = legacy(db, scope)
+        with count_queries() as single_pass_statements:
+            single_pass_result = single_pass(db, scope)
+
+        assert single_pass_result == legacy_result
+        assert len(single_pass_statements) == 1 < len(legacy_statements)
+
+        _, legacy_time = timed(legacy, db, scope)
+        _, single_pass_time = timed(single_pass, db, scope)
+
+        assert single_pass_time < legacy_time, (
+            f"{name} on {ROWS} rows: {len(legacy_statements)} queries {legacy_time * 1000:.1f}ms, "
+            f"1 query {single_pass_time * 1000:.1f}ms"
+        )
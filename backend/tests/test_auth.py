@@ -0,0 +1,82 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api import auth
+from app.config.database import engine
+from app.models.password_reset import PasswordResetToken
+
+
+@pytest.fixture
+def pool_checked_out_while_hashing(monkeypatch):
+    """Connections the pool had handed out each time a hash was computed."""
+    checked_out = []
+    hash_password_async = auth.hash_password_async
+    verify_password_async = auth.verify_password_async
+
+    async def hash_password(password):
+        checked_out.append(engine.pool.checkedout())
+        return await hash_password_async(password)
+
+    async def verify_password(password, password_hash):
+        checked_out.append(engine.pool.checkedout())
+        return await verify_password_async(password, password_hash)
+
+    monkeypatch.setattr(auth, "hash_password_async", hash_password)
+    monkeypatch.setattr(auth, "verify_password_async", verify_password)
+    return checked_out
+
+
+def login(client, user, password):
+    return client.post("/auth/login", data={"username": user.email, "password": password})
+
+
+def test_change_password_hashes_without_a_connection(client, db, make_user, headers, password, pool_checked_out_while_hashing):
+    user = make_user()
+    auth_headers = headers(user)
+
+    # Loading the user above left the test's own session holding a connection
+    db.rollback()
+
+    response = client.post(
+        "/auth/change-password",
+        json={"old_password": password, "new_password": "a new password"},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    assert pool_checked_out_while_hashing == [0, 0]
+    assert login(client, user, "a new password").status_code == 200
+
+
+def test_change_password_rejects_the_wrong_old_password(client, make_user, headers, password):
+    user = make_user()
+
+    response = client.post(
+        "/auth/change-password",
+        json={"old_password": "not it", "new_password": "a new password"},
+        headers=headers(user)
+    )
+
+    assert response.status_code == 400
+    assert login(client, user, password).status_code == 200
+
+
+def test_reset_password_uses_the_otp_once(client, db, make_user, pool_checked_out_while_hashing):
+    user = make_user()
+    db.add(PasswordResetToken(
+        user_id=user.id,
+        otp_hash=hashlib.sha256(b"123456").hexdigest(),
+        expires_at=datetime.now(timezone.utc) + timedelta(minutes=10)
+    ))
+    db.commit()
+
+    body = {"email": user.email, "otp": "123456", "new_password": "a new password"}
+    db.rollback()
+
+    assert client.post("/auth/reset-password", json=body).status_code == 200
+    assert pool_checked_out_while_hashing == [0]
+    assert login(client, user, "a new password").status_code == 200
+
+    assert client.post("/auth/reset-password", json=body).status_code == 400
@@ -0,0 +1,53 @@
+import asyncio
+
+from app.services.background import PeriodicService
+
+
+class Flaky(PeriodicService):
+    """Fails its first tick and records the ones after it."""
+
+    name = "Flaky task"
+
+    def __init__(self, run_at_start):
+        super().__init__()
+        self.run_at_start = run_at_start
+        self.ticks = 0
+
+    def interval(self) -> float:
+        return 0.05
+
+    async def tick(self):
+        self.ticks += 1
+        if self.ticks == 1:
+            raise RuntimeError("first tick fails")
+
+
+def test_failed_tick_is_logged_and_the_loop_goes_on(caplog):
+    service = Flaky(run_at_start=True)
+
+    async def run():
+        await service.start()
+        await asyncio.sleep(0.12)
+        await service.stop()
+
+    asyncio.run(run())
+
+    assert service.ticks >= 2
+    assert "Flaky task failed" in caplog.text
+    assert service._task is None
+
+
+def test_first_tick_waits_an_interval_unless_run_at_start():
+    eager, lazy = Flaky(run_at_start=True), Flaky(run_at_start=False)
+
+    async def run():
+        await eager.start()
+        await lazy.start()
+        await asyncio.sleep(0.02)
+        await eager.stop()
+        await lazy.stop()
+
+    asyncio.run(run())
+
+    assert eager.ticks == 1
+    assert lazy.ticks == 0
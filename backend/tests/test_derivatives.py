@@ -0,0 +1,152 @@
+import asyncio
+import io
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from app.config.config import settings
+from app.models.media_blob import MediaBlob
+from app.models.memory import Memory
+from app.models.memory_media import MemoryMedia
+from app.services.media_service import DerivativePipeline, derivative_path
+from app.services.storage import storage
+
+# Images per benchmark run, at a typical phone camera size
+BENCHMARK_IMAGES = 24
+BENCHMARK_SIZE = (4000, 3000)
+
+
+def jpeg(size=(64, 48)) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", size, (200, 120, 40)).save(output, "JPEG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def make_blob(db):
+    def make(age=timedelta(hours=1), file_type="image/jpeg", data=None, **columns) -> MediaBlob:
+        blob_id = uuid.uuid4()
+        blob = MediaBlob(
+            id=blob_id,
+            file_path=f"blobs/{blob_id.hex[:2]}/{blob_id.hex}.jpg",
+            file_type=file_type,
+            size=len(data) if data else 0,
+            ref_count=1,
+            created_at=datetime.now(timezone.utc) - age,
+            **{"derivatives_ready": False, **columns}
+        )
+        db.add(blob)
+        db.commit()
+
+        if data is not None:
+            storage.backend.upload(blob.file_path, data, file_type)
+
+        return blob
+
+    return make
+
+
+def test_sweep_claims_only_overdue_blobs(db, make_blob):
+    overdue = make_blob()
+    queued_here = make_blob()
+    make_blob(age=timedelta(seconds=10))
+    make_blob(derivatives_ready=True)
+    make_blob(file_type="video/mp4")
+    make_blob(derivative_attempts=settings.MEDIA_DERIVATIVE_MAX_ATTEMPTS)
+    make_blob(derivatives_attempted_at=datetime.now(timezone.utc) - timedelta(seconds=10))
+
+    pipeline = DerivativePipeline()
+
+    claimed = pipeline.claim_stale([queued_here.id])
+
+    assert claimed == [(overdue.id, overdue.file_path)]
+
+    db.expire_all()
+    assert overdue.derivative_attempts == 1
+    assert overdue.derivatives_attempted_at is not None
+
+    # Claimed just now, so not due again until the retry delay has passed
+    assert pipeline.claim_stale([queued_here.id]) == []
+
+
+def test_pipeline_start_builds_derivatives_left_over_from_a_restart(db, make_user, make_vault, make_blob):
+    user = make_user()
+    vault = make_vault(user, make_user())
+
+    memory = Memory(vault_id=vault.id, created_by=user.id, title="Trip", content="...")
+    db.add(memory)
+    db.commit()
+
+    # Committed by an upload whose queued job died with the previous process
+    blob = make_blob(data=jpeg())
+    db.add(MemoryMedia(
+        memory_id=memory.id,
+        blob_id=blob.id,
+        file_path=blob.file_path,
+        file_url=storage.get_public_url(blob.file_path),
+        file_type="image/jpeg",
+    ))
+    db.commit()
+
+    blob_id = blob.id
+    db.rollback()
+
+    async def run():
+        pipeline = DerivativePipeline()
+        await pipeline.start()
+        try:
+            for _ in range(200):
+                await asyncio.sleep(0.05)
+                if not pipeline._pending and pipeline._queue.empty() and (await asyncio.to_thread(ready, blob_id)):
+                    return
+        finally:
+            await pipeline.stop()
+
+    def ready(blob_id):
+        db.expire_all()
+        ready = db.get(MediaBlob, blob_id).derivatives_ready
+        db.rollback()
+        return ready
+
+    asyncio.run(run())
+
+    media = db.query(MemoryMedia).one()
+    assert media.thumbnail_url == storage.get_public_url(derivative_path(media.file_path, "thumb"))
+    assert storage.backend.info(derivative_path(media.file_path, "medium"))["content_type"] == "image/webp"
+
+
+@pytest.mark.benchmark
+def test_derivative_pipeline_throughput(db, make_blob):
+    """Images per second through download, resize, upload and record."""
+    data = jpeg(BENCHMARK_SIZE)
+    blobs = [make_blob(age=timedelta(0), data=data) for _ in range(BENCHMARK_IMAGES)]
+    jobs = [SimpleNamespace(id=blob.id, file_path=blob.file_path, file_type=blob.file_type, created=True) for blob in blobs]
+    db.rollback()
+
+    async def run():
+        pipeline = DerivativePipeline()
+        await pipeline.start()
+        try:
+            started = time.perf_counter()
+
+            for job in jobs:
+                pipeline.submit(job)
+            await pipeline._queue.join()
+
+            return time.perf_counter() - started
+        finally:
+            await pipeline.stop()
+
+    elapsed = asyncio.run(run())
+
+    assert db.query(MediaBlob).filter(MediaBlob.derivatives_ready == True).count() == BENCHMARK_IMAGES
+
+    per_second = BENCHMARK_IMAGES / elapsed
+    assert per_second > 2, (
+        f"{BENCHMARK_IMAGES} {BENCHMARK_SIZE[0]}x{BENCHMARK_SIZE[1]} JPEGs on "
+        f"{settings.MEDIA_DERIVATIVE_WORKERS} workers: {per_second:.1f} images/s"
+    )
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.config.config import settings
+from app.models.email_outbox import EmailOutbox
+from app.services.email import EmailDispatcher, enqueue_otp_email
+
+
+class ResendStub(BaseHTTPRequestHandler):
+    """
+    Stands in for POST /emails. The recipient picks the answer:
+    rejected@ gets 422, flaky@ gets one 503 and then 200, anyone else 200.
+    """
+
+    requests: Counter
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        to_email = body["to"]
+        self.requests[to_email] += 1
+
+        if to_email.startswith("rejected@"):
+            status, reply = 422, {"message": "Invalid `to` field"}
+        elif to_email.startswith("flaky@") and self.requests[to_email] == 1:
+            status, reply = 503, {"message": "Unavailable"}
+        else:
+            status, reply = 200, {"id": "stub"}
+
+        payload = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def resend_stub(monkeypatch):
+    requests = Counter()
+    handler = type("Handler", (ResendStub,), {"requests": requests})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setattr(settings, "RESEND_API_URL", f"http://127.0.0.1:{server.server_port}")
+
+    yield requests
+
+    server.shutdown()
+    server.server_close()
+
+
+def run_dispatcher_until_settled(db, timeout: float = 10.0):
+    async def run():
+        dispatcher = EmailDispatcher()
+        await dispatcher.start()
+        try:
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+                db.expire_all()
+                unsettled = db.query(EmailOutbox).filter(
+                    EmailOutbox.status.in_(["pending", "sending"])
+                ).count()
+                db.rollback()
+                if not unsettled:
+                    return
+            pytest.fail("Outbox did not settle")
+        finally:
+            await dispatcher.stop()
+
+    asyncio.run(run())
+
+
+def test_rejected_email_fails_without_retrying(db, resend_stub):
+    enqueue_otp_email(db, "ok@example.com", "123456")
+    enqueue_otp_email(db, "rejected@example.com", "123456")
+    enqueue_otp_email(db, "flaky@example.com", "123456")
+    db.commit()
+
+    run_dispatcher_until_settled(db)
+
+    emails = {email.to_email: email for email in db.query(EmailOutbox)}
+
+    assert emails["ok@example.com"].status == "sent"
+    assert emails["flaky@example.com"].status == "sent"
+
+    rejected = emails["rejected@example.com"]
+    assert rejected.status == "failed"
+    assert rejected.attempts == 1
+    assert "422" in rejected.last_error
+    assert rejected.context is None
+
+    assert resend_stub == {
+        "ok@example.com": 1,
+        "rejected@example.com": 1,
+        # A 5xx is retried in place
+        "flaky@example.com": 2,
+    }
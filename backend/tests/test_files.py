@@ -0,0 +1,85 @@
+import os
+from urllib.parse import urlsplit
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.storage import storage
+
+DATA = os.urandom(4096)
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def stored_path():
+    path = "memories/files-test/photo.png"
+    storage.backend.upload(path, DATA, "image/png")
+
+    yield path
+
+    storage.backend.remove([path])
+
+
+def test_serves_the_file_with_a_strong_etag(client, stored_path):
+    response = client.get(f"/files/{stored_path}")
+
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["etag"].startswith('"')
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_range_request_returns_partial_content(client, stored_path):
+    response = client.get(f"/files/{stored_path}", headers={"Range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.content == DATA[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(DATA)}"
+
+
+def test_matching_etag_returns_304(client, stored_path):
+    etag = client.get(f"/files/{stored_path}").headers["etag"]
+
+    response = client.get(f"/files/{stored_path}", headers={"If-None-Match": f'"other", {etag}'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_replaced_file_gets_a_new_etag(client, stored_path):
+    etag = client.get(f"/files/{stored_path}").headers["etag"]
+    storage.backend.upload(stored_path, DATA[::-1], "image/png")
+
+    response = client.get(f"/files/{stored_path}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.content == DATA[::-1]
+
+
+@pytest.mark.parametrize("path", ["memories/files-test/missing.png", "..%2F..%2Fetc%2Fpasswd"])
+def test_missing_or_outside_paths_are_404(client, path):
+    assert client.get(f"/files/{path}").status_code == 404
+
+
+def test_signed_upload_round_trip(client):
+    path = "memories/files-test/direct.png"
+    signed = storage.backend.create_signed_upload_url(path)
+    url = urlsplit(signed["signed_url"])
+
+    response = client.put(f"{url.path}?{url.query}", content=DATA, headers={"Content-Type": "image/png"})
+
+    assert response.status_code == 200
+    assert client.get(f"/files/{path}").content == DATA
+
+    forged = client.put(f"{url.path}?{url.query}".replace(signed["token"], "0" * 64), content=DATA)
+    assert forged.status_code == 403
+
+    storage.backend.remove([path])
@@ -0,0 +1,62 @@
+import asyncio
+import statistics
+import time
+
+import httpx
+import pytest
+
+from app.config.config import settings
+from app.main import app
+
+# Two logins per hashing worker keeps the executor queued for the whole run
+LOGINS = 2 * settings.PASSWORD_HASH_WORKERS
+PROBES = 40
+PROBE_SPACING_SECONDS = 0.05
+
+
+def p99(samples: list[float]) -> float:
+    return statistics.quantiles(samples, n=100)[98]
+
+
+@pytest.mark.benchmark
+def test_login_storm_keeps_cheap_endpoints_fast(make_user, headers, password):
+    """p99 of /notifications/unread-count while LOGINS logins are in flight."""
+    user = make_user()
+    probe_headers = headers(user)
+
+    async def login(client):
+        started = time.perf_counter()
+        response = await client.post("/auth/login", data={"username": user.email, "password": password})
+        assert response.status_code == 200
+        return time.perf_counter() - started
+
+    async def probe(client, delay):
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        response = await client.get("/notifications/unread-count", headers=probe_headers)
+        assert response.status_code == 200
+        return time.perf_counter() - started
+
+    async def storm():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Warm up the connection pool and the principal cache
+            idle = [await probe(client, 0) for _ in range(10)]
+
+            logins = [asyncio.create_task(login(client)) for _ in range(LOGINS)]
+            probes = [
+                asyncio.create_task(probe(client, i * PROBE_SPACING_SECONDS))
+                for i in range(PROBES)
+            ]
+
+            return idle, await asyncio.gather(*logins), await asyncio.gather(*probes)
+
+    idle, login_times, probe_times = asyncio.run(storm())
+
+    # Cheap requests must not queue behind the hashing backlog
+    assert p99(probe_times) < p99(login_times) / 4, (
+        f"{LOGINS} logins on {settings.PASSWORD_HASH_WORKERS} hashing workers: "
+        f"login p99 {p99(login_times) * 1000:.0f}ms, "
+        f"unread-count p99 {p99(probe_times) * 1000:.0f}ms "
+        f"(idle max {max(idle) * 1000:.0f}ms)"
+    )
@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import os
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.api import media as media_api
+from app.config.config import settings
+from app.config.database import SessionLocal
+from app.main import app
+from app.models.media_blob import MediaBlob
+from app.models.memory import Memory
+from app.models.memory_media import MemoryMedia
+from app.models.vault import Vault
+from app.services import media_service
+from app.services.media_service import blob_path
+from app.services.storage import storage
+
+
+def test_upload_drops_its_blob_claim_when_quota_charge_fails(client, db, make_user, make_vault, headers, monkeypatch):
+    user = make_user()
+    vault = make_vault(user, make_user())
+
+    memory = Memory(vault_id=vault.id, created_by=user.id, title="Trip", content="...")
+    db.add(memory)
+    db.commit()
+
+    data = os.urandom(1024)
+    path = blob_path(hashlib.sha256(data).hexdigest(), "png")
+
+    # A concurrent upload took the room between the early check and the charge
+    monkeypatch.setattr(media_service, "check_vault_quota", lambda vault, size: None)
+    db.query(Vault).filter(Vault.id == vault.id).update(
+        {"storage_used_bytes": settings.VAULT_STORAGE_QUOTA_BYTES - 10}
+    )
+    db.commit()
+
+    response = client.post(
+        f"/media/{memory.id}",
+        files={"file": ("photo.png", data, "image/png")},
+        headers=headers(user)
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Vault storage quota exceeded"
+    # The claim is dropped; the object is the storage GC's to remove, as a
+    # concurrent upload of the same bytes could be writing the same key
+    assert db.query(MediaBlob).count() == 0
+    assert db.query(MemoryMedia).count() == 0
+    assert os.path.exists(os.path.join(settings.STORAGE_LOCAL_ROOT, path))
+
+
+def test_delete_commits_before_removing_objects(client, db, make_user, make_vault, headers, monkeypatch):
+    user = make_user()
+    vault = make_vault(user, make_user())
+
+    memory = Memory(vault_id=vault.id, created_by=user.id, title="Trip", content="...")
+    db.add(memory)
+    db.flush()
+
+    # Uploaded before blobs existed, so its object is removed inline
+    media = MemoryMedia(
+        memory_id=memory.id,
+        file_url="https://files.example.com/memories/trip.mp4",
+        file_path="memories/trip.mp4",
+        file_type="video/mp4",
+    )
+    db.add(media)
+    db.commit()
+
+    media_id = media.id
+    removed = []
+
+    async def failing_remove(paths):
+        # The row must already be gone for everyone else
+        check = SessionLocal()
+        try:
+            assert check.get(MemoryMedia, media_id) is None
+        finally:
+            check.close()
+
+        removed.append(paths)
+        raise RuntimeError("storage is down")
+
+    monkeypatch.setattr(storage, "remove", failing_remove)
+
+    response = client.delete(f"/media/{media_id}", headers=headers(user))
+
+    assert response.status_code == 200
+    assert removed == [["memories/trip.mp4"]]
+
+    db.expire_all()
+    assert db.get(MemoryMedia, media_id) is None
+
+
+def test_concurrent_finalizes_record_the_upload_once(db, make_user, make_vault, headers, monkeypatch):
+    user = make_user()
+    vault = make_vault(user, make_user())
+
+    memory = Memory(vault_id=vault.id, created_by=user.id, title="Trip", content="...")
+    db.add(memory)
+    db.commit()
+
+    path = f"memories/{memory.id}/direct.png"
+    storage.backend.upload(path, os.urandom(1024), "image/png")
+
+    memory_id, vault_id, auth = memory.id, vault.id, headers(user)
+    db.rollback()
+
+    # Both requests pass the storage check before either records the blob
+    barrier = threading.Barrier(2)
+    verify_direct_upload = media_api.verify_direct_upload
+
+    async def verify_then_wait(*args):
+        info = await verify_direct_upload(*args)
+        await asyncio.to_thread(barrier.wait, 10)
+        return info
+
+    monkeypatch.setattr(media_api, "verify_direct_upload", verify_then_wait)
+
+    statuses = []
+
+    def finalize():
+        # One client per thread, so each request runs on its own event loop
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.post(f"/media/{memory_id}/finalize", json={"path": path}, headers=auth)
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=finalize) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    assert sorted(statuses) == [200, 400]
+    assert db.query(MediaBlob).filter(MediaBlob.file_path == path).count() == 1
+    assert db.query(MemoryMedia).count() == 1
+    assert db.get(Vault, vault_id).storage_used_bytes == 1024
+
+
+def test_same_bytes_upload_does_not_wait_on_a_transfer_in_flight(db, make_user, make_vault, headers, monkeypatch):
+    user = make_user()
+    vault = make_vault(user, make_user())
+
+    memory = Memory(vault_id=vault.id, created_by=user.id, title="Trip", content="...")
+    db.add(memory)
+    db.commit()
+
+    memory_id, vault_id, auth = memory.id, vault.id, headers(user)
+    db.rollback()
+
+    data = os.urandom(1024)
+
+    # The first transfer stalls until the second upload has finished
+    first_entered = threading.Event()
+    release = threading.Event()
+    upload = storage.backend.upload
+
+    def stalling_upload(*args):
+        if not first_entered.is_set():
+            first_entered.set()
+            release.wait(timeout=10)
+        return upload(*args)
+
+    monkeypatch.setattr(storage.backend, "upload", stalling_upload)
+
+    statuses = []
+
+    def post():
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.post(
+            f"/media/{memory_id}",
+            files={"file": ("photo.png", data, "image/png")},
+            headers=auth
+        )
+        statuses.append(response.status_code)
+
+    first = threading.Thread(target=post)
+    first.start()
+    assert first_entered.wait(timeout=10)
+
+    try:
+        # No row lock is held during the transfer, so this completes
+        second = threading.Thread(target=post)
+        second.start()
+        second.join(timeout=5)
+
+        assert statuses == [200]
+    finally:
+        release.set()
+        first.join(timeout=10)
+
+    assert statuses == [200, 200]
+
+    blob = db.query(MediaBlob).one()
+    assert blob.ref_count == 2
+    assert blob.stored
+    assert db.query(MemoryMedia).filter(MemoryMedia.blob_id == blob.id).count() == 2
+    assert db.get(Vault, vault_id).storage_used_bytes == 2048
@@ -0,0 +1,100 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.api.notifications import MAX_READ_BATCH
+from app.models.notification import Notification
+from app.services.notification import create_notifications
+from app.services.unread_counts import get_unread_counts
+from app.utils.pagination import encode_cursor
+
+
+def notify(db, user, count: int) -> list[Notification]:
+    """count unread notifications for user, a second apart, oldest first."""
+    now = datetime.now(timezone.utc)
+    create_notifications(db, [
+        {
+            "user_id": user.id,
+            "type": "test",
+            "title": "Title",
+            "message": "Message",
+            "created_at": now - timedelta(seconds=count - i),
+        }
+        for i in range(count)
+    ])
+    db.commit()
+
+    return db.scalars(
+        select(Notification).where(Notification.user_id == user.id).order_by(Notification.created_at)
+    ).all()
+
+
+def unread_ids(db, user) -> set:
+    db.expire_all()
+    return set(db.scalars(
+        select(Notification.id).where(Notification.user_id == user.id, Notification.is_read == False)
+    ))
+
+
+def test_read_by_ids_skips_other_users_and_read_rows(db, client, make_user, headers):
+    me, other = make_user(), make_user()
+    mine = notify(db, me, 3)
+    theirs = notify(db, other, 1)
+
+    ids = [str(mine[0].id), str(mine[1].id), str(theirs[0].id)]
+
+    response = client.patch("/notifications/read", json={"ids": ids}, headers=headers(me))
+    assert response.json() == {"marked_read": 2}
+
+    assert unread_ids(db, me) == {mine[2].id}
+    assert unread_ids(db, other) == {theirs[0].id}
+
+    # Already read now, so a repeat marks nothing and leaves the counter alone
+    response = client.patch("/notifications/read", json={"ids": ids}, headers=headers(me))
+    assert response.json() == {"marked_read": 0}
+
+    assert get_unread_counts(db, me.id)["notifications"] == 1
+    assert get_unread_counts(db, other.id)["notifications"] == 1
+
+
+def test_read_before_cursor_includes_the_cursor_row(db, client, make_user, headers):
+    me, other = make_user(), make_user()
+    mine = notify(db, me, 3)
+    notify(db, other, 2)
+
+    cursor = encode_cursor(mine[1].created_at, mine[1].id)
+
+    response = client.patch("/notifications/read", json={"before": cursor}, headers=headers(me))
+    assert response.json() == {"marked_read": 2}
+
+    assert unread_ids(db, me) == {mine[2].id}
+    assert get_unread_counts(db, me.id)["notifications"] == 1
+    assert get_unread_counts(db, other.id)["notifications"] == 2
+
+
+def test_read_takes_at_most_a_batch_of_ids(db, client, make_user, headers):
+    me = make_user()
+    notify(db, me, 1)
+
+    ids = [str(uuid.uuid4()) for _ in range(MAX_READ_BATCH + 1)]
+
+    response = client.patch("/notifications/read", json={"ids": ids}, headers=headers(me))
+    assert response.status_code == 400
+
+    response = client.patch("/notifications/read", json={"ids": ids[:MAX_READ_BATCH]}, headers=headers(me))
+    assert response.json() == {"marked_read": 0}
+
+    assert get_unread_counts(db, me.id)["notifications"] == 1
+
+
+def test_read_needs_exactly_one_of_ids_or_before(db, client, make_user, headers):
+    me = make_user()
+    mine = notify(db, me, 1)
+    cursor = encode_cursor(mine[0].created_at, mine[0].id)
+
+    for body in ({}, {"ids": [str(mine[0].id)], "before": cursor}):
+        response = client.patch("/notifications/read", json=body, headers=headers(me))
+        assert response.status_code == 400
+
+    assert unread_ids(db, me) == {mine[0].id}
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.config.database import SessionLocal, engine
+from app.services.notification import create_notifications
+from app.services.partitions import PartitionMaintainer, create_partition, list_partitions, partition_name
+from app.services.unread_counts import UNREAD_COUNTS_LOCK_KEY, get_unread_counts
+from app.utils.time import add_months, month_start
+
+
+@pytest.fixture
+def expired_month(db):
+    """A notifications partition well past retention, dropped again after the test."""
+    month = add_months(month_start(datetime.now(timezone.utc)), -14)
+
+    session = SessionLocal()
+    create_partition(session, "notifications", month)
+    session.commit()
+    session.close()
+
+    yield month
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {partition_name('notifications', month)}"))
+
+
+def notify(db, user, created_at: datetime, count: int = 1):
+    create_notifications(db, [
+        {"user_id": user.id, "type": "test", "title": "Title", "message": "Message", "created_at": created_at}
+        for _ in range(count)
+    ])
+    db.commit()
+
+
+def test_retiring_subtracts_its_unread_rows(db, make_user, expired_month, count_queries):
+    alice, bob = make_user(), make_user()
+    old = datetime.combine(expired_month, datetime.min.time(), timezone.utc) + timedelta(days=3)
+
+    notify(db, alice, old, count=2)
+    notify(db, alice, datetime.now(timezone.utc))
+    notify(db, bob, old)
+
+    with count_queries() as statements:
+        retired = PartitionMaintainer().run_once()
+
+    assert retired["notifications"] == [partition_name("notifications", expired_month)]
+    assert expired_month not in list_partitions(db, "notifications")
+
+    # Subtracted, not recomputed
+    assert not any("user_unread_counts IN SHARE ROW EXCLUSIVE" in statement for statement in statements)
+
+    db.expire_all()
+    assert get_unread_counts(db, alice.id)["notifications"] == 1
+    assert get_unread_counts(db, bob.id)["notifications"] == 0
+
+
+def test_retiring_waits_for_the_unread_counts_repair(db, make_user, expired_month):
+    user = make_user()
+    notify(db, user, datetime.combine(expired_month, datetime.min.time(), timezone.utc))
+
+    with engine.connect() as holder:
+        holder.execute(select(func.pg_advisory_lock(UNREAD_COUNTS_LOCK_KEY)))
+
+        retired = PartitionMaintainer().run_once()
+
+        holder.execute(select(func.pg_advisory_unlock(UNREAD_COUNTS_LOCK_KEY)))
+
+    assert retired["notifications"] == []
+    assert expired_month in list_partitions(db, "notifications")
+
+    db.expire_all()
+    assert get_unread_counts(db, user.id)["notifications"] == 1
@@ -0,0 +1,104 @@
+import asyncio
+import gc
+import threading
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.main import app
+from app.services import signal_buffer as signal_buffer_module
+from app.services.push import PushConnection, PushHub, push_hub
+from app.services.signal_buffer import SignalBuffer
+
+
+@pytest.mark.parametrize("query", ["?token=not-a-jwt", ""])
+def test_rejected_token_closes_with_1008_after_accept(query):
+    client = TestClient(app)
+
+    # The handshake completes, so browsers see the 1008 rather than a bare 1006
+    with client.websocket_connect(f"/ws{query}") as socket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            socket.receive_json()
+
+    assert closed.value.code == 1008
+
+
+def test_socket_starts_with_unread_counts(client, make_user, headers):
+    user = make_user()
+    token = headers(user)["Authorization"].removeprefix("Bearer ")
+
+    with client.websocket_connect(f"/ws?token={token}") as socket:
+        assert socket.receive_json() == {
+            "type": "unread_counts",
+            "data": {"notifications": 0, "signals": 0},
+        }
+
+        # Let the hub see the disconnect before the test client tears
+        # the session down, which would otherwise cancel it mid-cleanup
+        socket.close()
+        deadline = time.monotonic() + 5
+        while push_hub.get_stats()["connections"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert push_hub.get_stats()["connections"] == 0
+
+
+def test_socket_counts_include_buffered_signals(monkeypatch, client, make_user, make_vault, headers):
+    sender, recipient = make_user(), make_user()
+    vault = make_vault(sender, recipient)
+
+    buffer = SignalBuffer()
+    monkeypatch.setattr(signal_buffer_module, "signal_buffer", buffer)
+    buffer.add(vault.id, sender.id, recipient.id)
+
+    token = headers(recipient)["Authorization"].removeprefix("Bearer ")
+
+    with client.websocket_connect(f"/ws?token={token}") as socket:
+        # Not written yet, but already counted by GET /signals/unread-count
+        assert socket.receive_json() == {
+            "type": "unread_counts",
+            "data": {"notifications": 0, "signals": 1},
+        }
+
+        socket.close()
+        deadline = time.monotonic() + 5
+        while push_hub.get_stats()["connections"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+def test_hub_holds_its_count_pushes_until_they_finish(monkeypatch):
+    user_id = uuid.uuid4()
+    release = threading.Event()
+
+    def load_counts(user_ids):
+        release.wait(timeout=5)
+        return {user_id: {"notifications": 1, "signals": 0} for user_id in user_ids}
+
+    async def run():
+        hub = PushHub()
+        monkeypatch.setattr(hub, "_load_counts", load_counts)
+        await hub.start()
+
+        connection = PushConnection(websocket=None)
+        hub._connections[user_id].add(connection)
+
+        hub.publish([(user_id, None)])
+        await asyncio.sleep(0.05)
+
+        # Only the hub refers to the task while it waits on the database
+        assert len(hub._tasks) == 1
+        gc.collect()
+
+        release.set()
+        message = await asyncio.wait_for(connection.queue.get(), timeout=5)
+        await asyncio.sleep(0)
+
+        assert message == {"type": "unread_counts", "data": {"notifications": 1, "signals": 0}}
+        assert hub._tasks == set()
+
+        await hub.stop()
+
+    asyncio.run(run())
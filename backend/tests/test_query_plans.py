@@ -0,0 +1,273 @@
+"""
+EXPLAIN regression checks for the hot queries.
+
+The tables are filled with enough rows, spread over enough users and
+vaults, for the planner to prefer an index whenever a usable one
+exists. Each case captures the statements a request (or a background
+job) actually sends, EXPLAINs them with the same parameters, and fails
+on a sequential scan of any large table (or partition) or if the index
+added for that query goes unused.
+"""
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, text
+
+from app.config.database import SessionLocal, engine
+from app.main import app
+from app.models.user import User
+from app.models.vault import Vault
+from app.models.vault_membership import VaultMembership
+from app.services.bloom_scheduler import bloom_scheduler
+from app.utils.pagination import encode_cursor
+from conftest import auth_headers, truncate_all
+
+USERS = 2000
+ROWS = 40_000
+
+# Scanning anything smaller than this is not worth flagging; it also
+# spares the empty partitions made ahead of time
+LARGE_TABLE_ROWS = 1000
+
+FILLED_TABLES = {
+    "users", "vaults", "vault_memberships", "journals", "seeds", "notifications",
+    "thinking_signals", "password_reset_tokens", "refresh_tokens",
+}
+
+
+@pytest.fixture(scope="module")
+def hot_data(database):
+    """USERS users paired into vaults, and ROWS rows in every hot table."""
+    user_ids = [uuid.uuid4() for _ in range(USERS)]
+    vault_ids = [uuid.uuid4() for _ in range(USERS // 2)]
+    now = datetime.utcnow()
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [
+            {"id": user_id, "email": f"{user_id}@example.com", "password_hash": "x", "display_name": "User"}
+            for user_id in user_ids
+        ])
+        db.execute(insert(Vault), [
+            {"id": vault_id, "invite_code": vault_id.hex[:8], "status": "active", "storage_used_bytes": 0}
+            for vault_id in vault_ids
+        ])
+        # users[k] is in vaults[k // 2], and also left an older vault
+        db.execute(insert(VaultMembership), [
+            {"vault_id": vault_ids[k // 2], "user_id": user_id, "joined_at": now}
+            for k, user_id in enumerate(user_ids)
+        ] + [
+            {"vault_id": vault_ids[(k // 2 + 1) % len(vault_ids)], "user_id": user_id,
+             "joined_at": now - timedelta(days=30), "left_at": now - timedelta(days=1)}
+            for k, user_id in enumerate(user_ids)
+        ])
+
+        params = {"rows": ROWS, "users": user_ids, "vaults": vault_ids, "count": USERS}
+
+        for statement in (
+            """
+            INSERT INTO journals (id, user_id, vault_id, title, content, visibility, status, created_at, is_deleted)
+            SELECT gen_random_uuid(), (CAST(:users AS uuid[]))[1 + i % :count],
+                   (CAST(:vaults AS uuid[]))[1 + (i % :count) / 2], 'Entry', '...',
+                   CASE WHEN i % 3 = 0 THEN 'private' ELSE 'shared' END,
+                   CASE WHEN i % 5 = 0 THEN 'converted' ELSE 'active' END,
+                   now() - make_interval(mins => i), i % 13 = 0
+            FROM generate_series(1, :rows) AS i
+            """,
+            # Mostly bloomed and notified, as in a vault that has been in use a while
+            """
+            INSERT INTO seeds (id, vault_id, created_by, title, content, bloom_at, created_at, status, bloom_notified)
+            SELECT gen_random_uuid(), (CAST(:vaults AS uuid[]))[1 + (i % :count) / 2],
+                   (CAST(:users AS uuid[]))[1 + i % :count], 'Seed', '...',
+                   now() + make_interval(days => i % 400 - 380), now() - make_interval(mins => i),
+                   CASE WHEN i % 20 = 0 THEN 'scheduled' WHEN i % 20 = 1 THEN 'cancelled' ELSE 'bloomed' END,
+                   i % 20 <> 0 OR i % 400 >= 380
+            FROM generate_series(1, :rows) AS i
+            """,
+            # Inside the current month, so the partitions made by the migration hold them
+            """
+            INSERT INTO notifications (id, user_id, type, title, message, is_read, created_at)
+            SELECT gen_random_uuid(), (CAST(:users AS uuid[]))[1 + i % :count], 'memory', 'New memory', '...',
+                   i % 10 <> 0, date_trunc('month', now()) + make_interval(secs => i)
+            FROM generate_series(1, :rows) AS i
+            """,
+            """
+            INSERT INTO thinking_signals (id, vault_id, sender_id, recipient_id, created_at, is_seen)
+            SELECT gen_random_uuid(), (CAST(:vaults AS uuid[]))[1 + (i % :count) / 2],
+                   (CAST(:users AS uuid[]))[1 + (i + 1) % :count], (CAST(:users AS uuid[]))[1 + i % :count],
+                   date_trunc('month', timezone('utc', now())) + make_interval(secs => i), i % 10 <> 0
+            FROM generate_series(1, :rows) AS i
+            """,
+            """
+            INSERT INTO password_reset_tokens (id, user_id, otp_hash, expires_at)
+            SELECT gen_random_uuid(), (CAST(:users AS uuid[]))[1 + i % :count], md5(i::text) || md5(i::text),
+                   now() + interval '10 minutes'
+            FROM generate_series(1, :count) AS i
+            """,
+            """
+            INSERT INTO refresh_tokens (id, user_id, expires_at, created_at)
+            SELECT gen_random_uuid(), (CAST(:users AS uuid[]))[1 + i % :count], now() + interval '1 day', now()
+            FROM generate_series(1, :rows) AS i
+            """,
+        ):
+            db.execute(text(statement), params)
+
+        db.commit()
+
+        for table in FILLED_TABLES:
+            db.execute(text(f"ANALYZE {table}"))
+        db.commit()
+
+        user = db.get(User, user_ids[0])
+        db.expunge(user)
+    finally:
+        db.close()
+
+    yield {"user": user, "headers": auth_headers(user), "client": TestClient(app)}
+
+    truncate_all()
+
+
+def large_relations() -> set[str]:
+    with engine.connect() as conn:
+        return set(conn.execute(
+            text("SELECT relname FROM pg_class WHERE relkind = 'r' AND reltuples >= :rows"),
+            {"rows": LARGE_TABLE_ROWS}
+        ).scalars())
+
+
+def partition_index_parents() -> dict[str, str]:
+    """Index names on partitions mapped to the index they were created from."""
+    with engine.connect() as conn:
+        return dict(conn.execute(text(
+            "SELECT child.relname, parent.relname FROM pg_inherits i "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "WHERE child.relkind = 'i'"
+        )).all())
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain_statements(run) -> list[tuple[str, list[dict]]]:
+    """Run run() and EXPLAIN every statement it sent, returning (sql, plan nodes) pairs."""
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE", "WITH"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in captured:
+            plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            plans.append((statement, list(plan_nodes(plan[0]["Plan"]))))
+
+    return plans
+
+
+def notifications_cursor():
+    return encode_cursor(datetime.utcnow() + timedelta(days=40), uuid.UUID(int=0))
+
+
+# (name, run(client, headers, user), indexes the plans must use)
+CASES = [
+    ("vault context", lambda client, headers, user: client.get("/vaults/me", headers=headers),
+     {"idx_membership_user_active"}),
+    ("private journals", lambda client, headers, user: client.get("/journals/private", headers=headers),
+     {"idx_journal_user_visibility_live"}),
+    ("shared journals", lambda client, headers, user: client.get("/journals/shared", headers=headers),
+     {"idx_journal_vault_visibility_live"}),
+    ("journal analytics", lambda client, headers, user: client.get("/journals/analytics/me", headers=headers),
+     set()),
+    ("vault journal analytics", lambda client, headers, user: client.get("/journals/analytics/vault", headers=headers),
+     set()),
+    ("active seeds", lambda client, headers, user: client.get("/seeds/active", headers=headers),
+     {"idx_seed_vault_status_bloom"}),
+    ("seed listing", lambda client, headers, user: client.get("/seeds/", headers=headers),
+     {"idx_seed_vault_created"}),
+    ("seed summary", lambda client, headers, user: client.get("/seeds/summary", headers=headers),
+     set()),
+    ("notification listing", lambda client, headers, user: client.get("/notifications/", headers=headers),
+     {"idx_notification_user_created"}),
+    ("mark notifications read",
+     lambda client, headers, user: client.patch("/notifications/read", json={"before": notifications_cursor()}, headers=headers),
+     {"idx_notification_user_unread"}),
+    ("mark signals seen", lambda client, headers, user: client.post("/signals/mark-seen", headers=headers),
+     {"idx_signal_recipient_unseen"}),
+    ("forgot password",
+     lambda client, headers, user: client.post("/auth/forgot-password", json={"email": user.email}),
+     {"idx_password_reset_user_id"}),
+    ("bloom scheduler resync", lambda client, headers, user: bloom_scheduler._resync(datetime.utcnow()),
+     {"idx_seed_pending_bloom"}),
+]
+
+
+@pytest.mark.parametrize("name, run, expected_indexes", CASES, ids=[case[0] for case in CASES])
+def test_hot_query_plans(hot_data, name, run, expected_indexes):
+    large = large_relations()
+    parents = partition_index_parents()
+    used_indexes = set()
+
+    for statement, nodes in explain_statements(
+        lambda: run(hot_data["client"], hot_data["headers"], hot_data["user"])
+    ):
+        for node in nodes:
+            assert not (node["Node Type"] == "Seq Scan" and node.get("Relation Name") in large), \
+                f"Sequential scan of {node['Relation Name']} in:\n{statement}"
+
+            if "Index Name" in node:
+                used_indexes.add(parents.get(node["Index Name"], node["Index Name"]))
+
+    assert expected_indexes <= used_indexes, f"{name} used {sorted(used_indexes)}"
+
+
+def index_scans(index: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT idx_scan FROM pg_stat_user_indexes WHERE indexrelname = :index"),
+            {"index": index}
+        ).scalar()
+
+
+def test_user_delete_cascades_through_the_refresh_token_index(hot_data):
+    # The cascade runs inside the foreign key trigger, out of EXPLAIN's
+    # reach, so this counts the scans of the index instead
+    user_id = uuid.uuid4()
+
+    with engine.connect() as conn:
+        conn.execute(insert(User), [
+            {"id": user_id, "email": f"{user_id}@example.com", "password_hash": "x", "display_name": "User"}
+        ])
+        conn.execute(text(
+            "INSERT INTO refresh_tokens (id, user_id, expires_at, created_at) "
+            "SELECT gen_random_uuid(), :user_id, now() + interval '1 day', now() FROM generate_series(1, 3)"
+        ), {"user_id": user_id})
+        conn.commit()
+
+        before = index_scans("idx_refresh_token_user_id")
+
+        conn.execute(text("DELETE FROM users WHERE id = :user_id"), {"user_id": user_id})
+        conn.execute(text("SELECT pg_stat_force_next_flush()"))
+        conn.commit()
+
+    # Statistics reach the shared view once that backend goes idle
+    for _ in range(50):
+        if index_scans("idx_refresh_token_user_id") > before:
+            break
+        time.sleep(0.05)
+
+    assert index_scans("idx_refresh_token_user_id") > before
@@ -0,0 +1,92 @@
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.memory import Memory
+from app.models.memory_media import MemoryMedia
+from app.models.seed import Seed
+from app.models.seed_media import SeedMedia
+from app.models.seed_view import SeedView
+
+CALLS_PER_USER = 3
+
+
+def make_ready_seed(db, vault, creator) -> Seed:
+    seed = Seed(
+        vault_id=vault.id,
+        created_by=creator.id,
+        title="Open me",
+        content="...",
+        bloom_at=datetime.now(timezone.utc) - timedelta(minutes=1),
+    )
+    db.add(seed)
+    db.flush()
+
+    for n in range(3):
+        db.add(SeedMedia(
+            seed_id=seed.id,
+            file_url=f"https://files.example.com/{seed.id}/{n}.jpg",
+            file_path=f"{seed.id}/{n}.jpg",
+            file_type="image/jpeg",
+        ))
+
+    db.commit()
+    return seed
+
+
+def bloom_in_parallel(seed, users, headers) -> Counter:
+    # Built up front: the users are bound to the test's session, which
+    # the threads must not touch
+    calls = [headers(user) for user in users for _ in range(CALLS_PER_USER)]
+    seed_id = seed.id
+    barrier = threading.Barrier(len(calls))
+    statuses = Counter()
+    errors = []
+
+    def bloom(auth):
+        # One client per thread; each runs its requests on its own portal
+        client = TestClient(app)
+        barrier.wait()
+        try:
+            response = client.post(f"/seeds/{seed_id}/bloom", headers=auth)
+            assert response.status_code == 200, response.text
+            statuses[response.json()["status"]] += 1
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=bloom, args=(auth,)) for auth in calls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors, errors
+    return statuses
+
+
+def test_parallel_blooms_convert_once(db, make_user, make_vault, headers):
+    users = [make_user(), make_user()]
+    vault = make_vault(*users)
+
+    for _ in range(5):
+        seed = make_ready_seed(db, vault, users[0])
+
+        statuses = bloom_in_parallel(seed, users, headers)
+
+        assert statuses["converted_to_memory"] == 1
+        assert sum(statuses.values()) == 2 * CALLS_PER_USER
+
+        db.expire_all()
+        memories = db.query(Memory).filter(Memory.id == db.get(Seed, seed.id).memory_id).all()
+        assert len(memories) == 1
+        assert db.query(MemoryMedia).filter(MemoryMedia.memory_id == memories[0].id).count() == 3
+
+        views = Counter(
+            user_id for (user_id,) in db.query(SeedView.user_id).filter(SeedView.seed_id == seed.id)
+        )
+        assert views == {users[0].id: 1, users[1].id: 1}
+
+    assert db.query(Memory).filter(Memory.vault_id == vault.id).count() == 5
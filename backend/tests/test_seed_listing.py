@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models.seed import Seed
+from app.models.seed_media import SeedMedia
+from app.models.seed_view import SeedView
+
+
+def make_seeds(db, vault, users, count: int):
+    now = datetime.now(timezone.utc)
+
+    for i in range(count):
+        seed = Seed(
+            vault_id=vault.id,
+            created_by=users[0].id,
+            title=f"Seed {i}",
+            content="...",
+            bloom_at=now + timedelta(days=1),
+            created_at=now - timedelta(minutes=i),
+        )
+        db.add(seed)
+        db.flush()
+
+        for n in range(2):
+            db.add(SeedMedia(
+                seed_id=seed.id,
+                file_url=f"https://files.example.com/{seed.id}/{n}.jpg",
+                file_path=f"{seed.id}/{n}.jpg",
+                file_type="image/jpeg",
+            ))
+
+        for user in users:
+            db.add(SeedView(seed_id=seed.id, user_id=user.id))
+
+    db.commit()
+
+
+def test_listing_query_count_does_not_grow_with_page_size(client, db, make_user, make_vault, headers, count_queries):
+    users = [make_user(), make_user()]
+    vault = make_vault(*users)
+    make_seeds(db, vault, users, 12)
+
+    # Fill the principal cache, so every measured request sees it warm
+    client.get("/seeds/", headers=headers(users[0]))
+
+    counts = {}
+
+    for page_size in (1, 10):
+        for mode in ({}, {"page": 1}):
+            with count_queries() as statements:
+                response = client.get(
+                    "/seeds/",
+                    params={"page_size": page_size, **mode},
+                    headers=headers(users[0])
+                )
+
+            assert response.status_code == 200
+            items = response.json()["items"]
+            assert len(items) == page_size
+            assert all(len(item["media"]) == 2 and item["view_count"] == 2 for item in items)
+
+            counts[page_size, "page" in mode] = len(statements)
+
+    assert counts[1, False] == counts[10, False]
+    assert counts[1, True] == counts[10, True]
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.models.thinking_signal import ThinkingSignal
+from app.services import signal_buffer as signal_buffer_module
+from app.services.signal_buffer import SignalBuffer
+from app.services.unread_counts import get_unread_counts
+
+
+def test_failed_row_by_row_retry_requeues_the_unwritten_rows(monkeypatch, make_user, make_vault):
+    sender, recipient = make_user(), make_user()
+    vault = make_vault(sender, recipient)
+
+    buffer = SignalBuffer()
+    for _ in range(3):
+        buffer.add(vault.id, sender.id, recipient.id)
+
+    first, second, third = list(buffer._rows)
+    written = []
+
+    def write(rows):
+        if len(rows) > 1:
+            raise IntegrityError("INSERT", {}, Exception("foreign key"))
+        if rows[0] is second:
+            raise OperationalError("INSERT", {}, Exception("connection lost"))
+
+        written.extend(rows)
+        with buffer._lock:
+            buffer._forget(rows)
+
+    monkeypatch.setattr(buffer, "_write", write)
+
+    with pytest.raises(OperationalError):
+        buffer.flush()
+
+    # The first row was committed; the failed one and the rest wait for the next flush
+    assert written == [first]
+    assert list(buffer._rows) == [second, third]
+    assert buffer.pending_count(recipient.id) == 2
+    assert buffer.get_stats()["buffered"] == 2
+
+
+def test_mark_seen_during_a_flush_covers_the_batch(monkeypatch, db, make_user, make_vault):
+    sender, recipient = make_user(), make_user()
+    vault = make_vault(sender, recipient)
+
+    buffer = SignalBuffer()
+    buffer.add(vault.id, sender.id, recipient.id)
+    buffer.add(vault.id, sender.id, recipient.id)
+
+    record_signal_rollups = signal_buffer_module.record_signal_rollups
+    marked = []
+
+    def record_then_mark_seen(session, rows):
+        # mark-seen arrives after the batch's INSERT, before its commit
+        record_signal_rollups(session, rows)
+        marked.append(buffer.mark_seen(recipient.id))
+
+    monkeypatch.setattr(signal_buffer_module, "record_signal_rollups", record_then_mark_seen)
+
+    assert buffer.flush() == 2
+    assert marked == [2]
+
+    assert db.scalars(select(ThinkingSignal.is_seen)).all() == [True, True]
+    assert get_unread_counts(db, recipient.id) == {"notifications": 0, "signals": 0}
+    assert buffer.pending_count(recipient.id) == 0
+
+
+def test_stop_logs_the_signals_it_cannot_flush(monkeypatch, caplog, make_user, make_vault):
+    sender, recipient = make_user(), make_user()
+    vault = make_vault(sender, recipient)
+
+    buffer = SignalBuffer()
+    buffer.add(vault.id, sender.id, recipient.id)
+    buffer.add(vault.id, sender.id, recipient.id)
+
+    def write(rows):
+        raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(buffer, "_write", write)
+
+    async def run():
+        await buffer.start()
+        # Must not raise, or the rest of the lifespan teardown is skipped
+        await buffer.stop()
+
+    asyncio.run(run())
+
+    assert "2 buffered signals lost" in caplog.text
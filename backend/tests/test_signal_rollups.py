@@ -0,0 +1,114 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.models.signal_daily_rollup import SignalDailyRollup
+from app.models.signal_hourly_rollup import SignalHourlyRollup
+from app.services.signal_rollups import MAX_BUCKETS, record_signal_rollups, signal_histogram
+
+
+def signals(vault, sender, *times: datetime) -> list[dict]:
+    return [{"vault_id": vault.id, "sender_id": sender.id, "created_at": time} for time in times]
+
+
+def test_rollups_count_each_batch_into_hours_and_days(db, make_user, make_vault):
+    alice, bob = make_user(), make_user()
+    vault = make_vault(alice, bob)
+
+    record_signal_rollups(db, signals(
+        vault, alice,
+        datetime(2026, 3, 5, 9, 10), datetime(2026, 3, 5, 9, 50), datetime(2026, 3, 5, 23, 59)
+    ))
+    record_signal_rollups(db, signals(vault, alice, datetime(2026, 3, 5, 9, 30), datetime(2026, 3, 6, 0, 0)))
+    record_signal_rollups(db, signals(vault, bob, datetime(2026, 3, 5, 9, 0)))
+    db.commit()
+
+    hourly = db.execute(
+        select(SignalHourlyRollup.sender_id, SignalHourlyRollup.hour, SignalHourlyRollup.count)
+    ).all()
+    assert sorted(hourly) == sorted([
+        (alice.id, datetime(2026, 3, 5, 9), 3),
+        (alice.id, datetime(2026, 3, 5, 23), 1),
+        (alice.id, datetime(2026, 3, 6, 0), 1),
+        (bob.id, datetime(2026, 3, 5, 9), 1),
+    ])
+
+    daily = db.execute(
+        select(SignalDailyRollup.sender_id, SignalDailyRollup.day, SignalDailyRollup.count)
+    ).all()
+    assert sorted(daily) == sorted([
+        (alice.id, date(2026, 3, 5), 4),
+        (alice.id, date(2026, 3, 6), 1),
+        (bob.id, date(2026, 3, 5), 1),
+    ])
+
+
+def test_hour_histogram_aligns_aware_start_and_rounds_end_up(db, make_user, make_vault):
+    alice = make_user()
+    vault = make_vault(alice)
+
+    record_signal_rollups(db, signals(
+        vault, alice,
+        datetime(2026, 3, 5, 9, 59), datetime(2026, 3, 5, 10, 5), datetime(2026, 3, 5, 13, 40),
+        datetime(2026, 3, 5, 14, 0)
+    ))
+    db.commit()
+
+    # 12:30 at UTC+2 is 10:30 UTC, so the first bucket is 10:00 UTC;
+    # 13:15 is not on an hour, so the 13:00 bucket is kept whole
+    plus_two = timezone(timedelta(hours=2))
+    histogram = signal_histogram(
+        db, vault.id, "hour",
+        datetime(2026, 3, 5, 12, 30, tzinfo=plus_two), datetime(2026, 3, 5, 13, 15)
+    )
+
+    assert histogram["start"] == datetime(2026, 3, 5, 10)
+    assert histogram["end"] == datetime(2026, 3, 5, 14)
+    assert [bucket["start"].hour for bucket in histogram["series"]] == [10, 11, 12, 13]
+    assert [bucket["total"] for bucket in histogram["series"]] == [1, 0, 0, 1]
+    assert histogram["by_sender"] == {str(alice.id): 2}
+
+    # An aligned end stays exclusive
+    histogram = signal_histogram(db, vault.id, "hour", datetime(2026, 3, 5, 10), datetime(2026, 3, 5, 14))
+    assert histogram["total"] == 2
+
+
+def test_day_histogram_keeps_the_day_end_falls_in(db, make_user, make_vault):
+    alice, bob = make_user(), make_user()
+    vault = make_vault(alice, bob)
+
+    record_signal_rollups(db, signals(vault, alice, datetime(2026, 3, 4, 8), datetime(2026, 3, 6, 1)))
+    record_signal_rollups(db, signals(vault, bob, datetime(2026, 3, 5, 22), datetime(2026, 3, 5, 23)))
+    db.commit()
+
+    histogram = signal_histogram(
+        db, vault.id, "day",
+        datetime(2026, 3, 4, 15, tzinfo=timezone.utc), datetime(2026, 3, 5, 10, tzinfo=timezone.utc)
+    )
+
+    # end 03-05 10:00 rounds up to 03-06 00:00, which is excluded again
+    assert histogram["start"] == datetime(2026, 3, 4)
+    assert histogram["end"] == datetime(2026, 3, 6)
+    assert histogram["series"] == [
+        {"start": datetime(2026, 3, 4), "total": 1, "by_sender": {str(alice.id): 1}},
+        {"start": datetime(2026, 3, 5), "total": 2, "by_sender": {str(bob.id): 2}},
+    ]
+    assert histogram["by_sender"] == {str(alice.id): 1, str(bob.id): 2}
+
+
+def test_histogram_rejects_more_than_max_buckets(db, make_user, make_vault):
+    vault = make_vault(make_user())
+    start = datetime(2026, 3, 5)
+
+    histogram = signal_histogram(db, vault.id, "hour", start, start + timedelta(hours=MAX_BUCKETS))
+    assert len(histogram["series"]) == MAX_BUCKETS
+
+    with pytest.raises(HTTPException) as rejected:
+        signal_histogram(db, vault.id, "hour", start, start + timedelta(hours=MAX_BUCKETS, minutes=1))
+    assert rejected.value.status_code == 400
+
+    with pytest.raises(HTTPException) as rejected:
+        signal_histogram(db, vault.id, "day", start, start)
+    assert rejected.value.status_code == 400
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.config.config import settings
+from app.main import app
+from app.models.memory import Memory
+from app.models.memory_media import MemoryMedia
+from app.services.storage import StorageGateway, storage
+from app.services.storage_backends import LocalStorageBackend
+
+
+class SlowStorageBackend(LocalStorageBackend):
+    """Local disk storage whose calls wait until the test releases them."""
+
+    def __init__(self):
+        super().__init__(settings.STORAGE_LOCAL_ROOT, settings.STORAGE_PUBLIC_BASE_URL)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def remove(self, paths):
+        self.entered.set()
+        self.release.wait(timeout=10)
+        return super().remove(paths)
+
+    def upload(self, path, file, content_type):
+        self.entered.set()
+        self.release.wait(timeout=10)
+        return super().upload(path, file, content_type)
+
+
+@pytest.fixture
+def slow_backend(monkeypatch):
+    backend = SlowStorageBackend()
+    monkeypatch.setattr(storage, "backend", backend)
+
+    yield backend
+
+    backend.release.set()
+
+
+def test_slow_storage_does_not_stall_other_requests(db, make_user, make_vault, headers, slow_backend):
+    user = make_user()
+    vault = make_vault(user, make_user())
+
+    memory = Memory(vault_id=vault.id, created_by=user.id, title="Trip", content="...")
+    db.add(memory)
+    db.flush()
+
+    media = MemoryMedia(
+        memory_id=memory.id,
+        file_url="https://files.example.com/memories/trip.mp4",
+        file_path="memories/trip.mp4",
+        file_type="video/mp4",
+    )
+    db.add(media)
+    db.commit()
+
+    media_id = media.id
+    auth = headers(user)
+    db.rollback()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            delete = asyncio.create_task(client.delete(f"/media/{media_id}", headers=auth))
+
+            assert await asyncio.to_thread(slow_backend.entered.wait, 10)
+
+            # The delete is parked in storage; the worker still answers
+            probe = await asyncio.wait_for(
+                client.get("/notifications/unread-count", headers=auth),
+                timeout=5
+            )
+            assert probe.status_code == 200
+            assert not delete.done()
+
+            slow_backend.release.set()
+            return await delete
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert storage.get_stats()["remove"]["count"] >= 1
+
+
+def test_storage_calls_time_out(monkeypatch):
+    backend = SlowStorageBackend()
+    gateway = StorageGateway(backend)
+    monkeypatch.setattr(settings, "STORAGE_TIMEOUT_SECONDS", 0.1)
+
+    try:
+        with pytest.raises(HTTPException) as timed_out:
+            asyncio.run(gateway.upload("memories/slow.png", b"data", "image/png"))
+    finally:
+        backend.release.set()
+
+    assert timed_out.value.status_code == 504
+    assert gateway.get_stats()["upload"]["errors"] == 1
@@ -0,0 +1,108 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.config.config import settings
+from app.config.database import engine
+from app.models.media_blob import MediaBlob
+from app.services.media_service import blob_path
+from app.services.storage import storage
+from app.services.storage_gc import StorageGC
+
+
+def test_gc_drops_abandoned_blob_claims_and_their_objects(db, monkeypatch):
+    old = datetime.now(timezone.utc) - timedelta(seconds=settings.STORAGE_GC_MIN_AGE_SECONDS + 60)
+
+    def claim(created_at):
+        content_hash = uuid.uuid4().hex * 2
+        blob = MediaBlob(
+            content_hash=content_hash,
+            file_path=blob_path(content_hash, "png"),
+            file_type="image/png",
+            size=4,
+            ref_count=0,
+            stored=False,
+            created_at=created_at,
+        )
+        db.add(blob)
+        db.commit()
+        return blob.id, blob.file_path
+
+    # Its upload died mid-transfer, leaving a partial object behind
+    abandoned_id, abandoned_path = claim(old)
+    storage.backend.upload(abandoned_path, b"part", "image/png")
+
+    in_flight_id, _ = claim(datetime.now(timezone.utc))
+    db.rollback()
+
+    # The walk only removes objects older than the minimum age
+    listed = storage.backend.list_folder
+
+    def list_folder(prefix):
+        return [
+            {**entry, "updated_at": old} if not entry["is_folder"] else entry
+            for entry in listed(prefix)
+        ]
+
+    monkeypatch.setattr(storage.backend, "list_folder", list_folder)
+
+    report = asyncio.run(StorageGC().run_once())
+
+    assert report["abandoned_blob_claims"] == 1
+    assert db.get(MediaBlob, abandoned_id) is None
+    assert db.get(MediaBlob, in_flight_id) is not None
+    assert storage.backend.info(abandoned_path) is None
+
+
+def test_gc_checks_a_batch_again_before_removing_it(db, monkeypatch):
+    old = datetime.now(timezone.utc) - timedelta(seconds=settings.STORAGE_GC_MIN_AGE_SECONDS + 60)
+
+    paths = ["memories/gone/first.png", "memories/gone/second.png"]
+    for path in paths:
+        storage.backend.upload(path, b"data", "image/png")
+
+    listed = storage.backend.list_folder
+
+    def list_folder(prefix):
+        return [
+            {**entry, "updated_at": old} if not entry["is_folder"] else entry
+            for entry in listed(prefix)
+        ]
+
+    removed = []
+    idle_in_transaction = []
+    remove = storage.backend.remove
+
+    def remove_then_reupload(batch):
+        with engine.connect() as conn:
+            idle_in_transaction.append(conn.execute(text(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND state = 'idle in transaction'"
+            )).scalar())
+
+        remove(batch)
+        removed.extend(batch)
+
+        # The other object is uploaded again while the GC pauses
+        if len(removed) == 1:
+            other = next(path for path in paths if path not in batch)
+            blob = MediaBlob(file_path=other, file_type="image/png", size=4, ref_count=1)
+            db.add(blob)
+            db.commit()
+
+    monkeypatch.setattr(storage.backend, "list_folder", list_folder)
+    monkeypatch.setattr(storage.backend, "remove", remove_then_reupload)
+    monkeypatch.setattr(settings, "STORAGE_GC_REMOVE_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "STORAGE_GC_REMOVES_PER_SECOND", 100.0)
+
+    report = asyncio.run(StorageGC().run_once())
+
+    assert len(removed) == 1
+    assert report["orphaned_objects"] == 1
+    kept = next(path for path in paths if path not in removed)
+    assert storage.backend.info(kept) is not None
+
+    # Not even the connection holding the GC lock
+    assert idle_in_transaction == [0]
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from sqlalchemy import func, select, update
+
+from app.config.database import SessionLocal, engine
+from app.models.user_unread_counts import UserUnreadCounts
+from app.services import unread_counts
+from app.services.notification import create_notification
+from app.services.unread_counts import (
+    UNREAD_COUNTS_LOCK_KEY,
+    UnreadCountsRepair,
+    get_unread_counts,
+    recompute_unread_counts,
+)
+
+
+def test_recompute_does_not_lose_a_concurrent_bump(db, make_user):
+    user = make_user()
+
+    # Give the user a counter row, so the recompute has a row to overwrite
+    recompute_unread_counts(db)
+    db.commit()
+
+    writer = SessionLocal()
+    create_notification(writer, user.id, "test", "Title", "Message")
+    writer.flush()
+
+    def recompute():
+        session = SessionLocal()
+        try:
+            recompute_unread_counts(session)
+            session.commit()
+        finally:
+            session.close()
+
+    repair = threading.Thread(target=recompute)
+    repair.start()
+
+    # Commit the bump only once the recompute has started, so an
+    # unserialized recompute would count from a snapshot without it
+    time.sleep(0.3)
+    writer.commit()
+    writer.close()
+
+    repair.join(timeout=10)
+    assert not repair.is_alive()
+
+    db.expire_all()
+    assert get_unread_counts(db, user.id) == {"notifications": 1, "signals": 0}
+
+
+def test_repair_recomputes_in_batches(db, make_user, count_queries, monkeypatch):
+    users = [make_user() for _ in range(5)]
+    for user in users:
+        create_notification(db, user.id, "test", "Title", "Message")
+    db.commit()
+
+    # Drifted counters, as the repair would find them
+    db.execute(update(UserUnreadCounts).values(notifications=7, signals=3))
+    db.commit()
+
+    monkeypatch.setattr(unread_counts, "UNREAD_COUNTS_REPAIR_BATCH_SIZE", 2)
+
+    with count_queries() as statements:
+        assert UnreadCountsRepair().repair() is True
+
+    assert sum("LOCK TABLE user_unread_counts" in statement for statement in statements) == 3
+
+    db.expire_all()
+    for user in users:
+        assert get_unread_counts(db, user.id) == {"notifications": 1, "signals": 0}
+
+
+def test_repair_runs_on_one_worker_at_a_time(db):
+    with engine.connect() as holder:
+        holder.execute(select(func.pg_advisory_lock(UNREAD_COUNTS_LOCK_KEY)))
+
+        assert UnreadCountsRepair().repair() is False
+
+        holder.execute(select(func.pg_advisory_unlock(UNREAD_COUNTS_LOCK_KEY)))
+
+    assert UnreadCountsRepair().repair() is True
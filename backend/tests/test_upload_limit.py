@@ -0,0 +1,65 @@
+import asyncio
+
+from app.main import app
+from app.services.media_service import MAX_FILE_SIZE
+
+CHUNK = b"x" * (1024 * 1024)
+
+
+def post_multipart(content_length: int | None, chunks: int) -> tuple[int, int]:
+    """
+    Send a multipart POST of `chunks` 1MB body chunks straight to the app.
+
+    Returns the response status and how many chunks the app read.
+    """
+    headers = [(b"content-type", b"multipart/form-data; boundary=limit")]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/media/00000000-0000-0000-0000-000000000000",
+        "raw_path": b"/media/00000000-0000-0000-0000-000000000000",
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+
+    body = b"--limit\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\nContent-Type: image/png\r\n\r\n"
+    calls = 0
+    sent = {}
+
+    async def receive():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            return {"type": "http.request", "body": body, "more_body": True}
+        return {"type": "http.request", "body": CHUNK, "more_body": calls <= chunks}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+
+    asyncio.run(app(scope, receive, send))
+    return sent["status"], max(calls - 1, 0)
+
+
+def test_declared_oversized_upload_is_refused_unread():
+    status, read = post_multipart(content_length=30 * len(CHUNK), chunks=30)
+
+    assert status == 413
+    assert read == 0
+
+
+def test_streamed_oversized_upload_is_cut_off():
+    # No Content-Length, as with a chunked upload
+    status, read = post_multipart(content_length=None, chunks=30)
+
+    assert status == 413
+    assert read == MAX_FILE_SIZE // len(CHUNK) + 1
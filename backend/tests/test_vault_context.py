@@ -0,0 +1,30 @@
+from app.api.deps import get_principal_cache_stats
+
+
+def test_vault_context_uses_the_principal_cache(client, make_user, make_vault, headers, count_queries):
+    user, partner = make_user("Alice"), make_user("Bob")
+    vault = make_vault(user, partner)
+
+    # The first request fills the cache
+    assert client.get("/vaults/me", headers=headers(user)).status_code == 200
+    hits = get_principal_cache_stats()["hits"]
+
+    with count_queries() as statements:
+        response = client.get("/vaults/me", headers=headers(user))
+
+    assert response.status_code == 200
+    assert response.json()["vault_id"] == str(vault.id)
+    assert get_principal_cache_stats()["hits"] == hits + 1
+
+    # Only the membership, vault and partner lookup
+    assert len(statements) == 1
+    assert "FROM vault_memberships" in statements[0]
+
+
+def test_vault_context_without_a_vault(client, make_user, headers):
+    user = make_user()
+
+    response = client.get("/vaults/me", headers=headers(user))
+
+    assert response.status_code == 200
+    assert response.json() == {"vault": None}
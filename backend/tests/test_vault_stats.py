@@ -0,0 +1,57 @@
+import threading
+import time
+
+from sqlalchemy import func, select
+
+from app.config.database import SessionLocal
+from app.models.memory import Memory
+from app.services.vault_stats import (
+    VAULT_STATS_LOCK_KEY,
+    VaultStatsRepair,
+    bump_vault_stats,
+    get_vault_stats,
+    recompute_vault_stats,
+)
+
+
+def test_recompute_does_not_lose_a_concurrent_bump(db, make_user, make_vault):
+    user = make_user()
+    vault = make_vault(user, make_user())
+    vault_id, user_id = vault.id, user.id
+
+    # Give the vault a stats row, so the recompute has a row to overwrite
+    recompute_vault_stats(db)
+    db.commit()
+
+    writer = SessionLocal()
+    memory = Memory(vault_id=vault_id, created_by=user_id, title="Trip", content="...")
+    writer.add(memory)
+    writer.flush()
+    bump_vault_stats(writer, vault_id, total_memories=1, memory_at=memory.created_at)
+
+    repair = threading.Thread(target=VaultStatsRepair().repair)
+    repair.start()
+
+    # Commit the bump only once the recompute has started, so an
+    # unserialized recompute would count from a snapshot without it
+    time.sleep(0.3)
+    writer.commit()
+    writer.close()
+
+    repair.join(timeout=10)
+    assert not repair.is_alive()
+
+    db.expire_all()
+    assert get_vault_stats(db, vault_id)["total_memories"] == 1
+
+
+def test_repair_runs_on_one_worker_at_a_time(db):
+    holder = SessionLocal()
+    try:
+        holder.execute(select(func.pg_advisory_xact_lock(VAULT_STATS_LOCK_KEY)))
+
+        assert VaultStatsRepair().repair() is False
+    finally:
+        holder.close()
+
+    assert VaultStatsRepair().repair() is True
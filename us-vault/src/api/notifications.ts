@@ -17,6 +17,13 @@ export const markNotificationAsReadApi = (
   return api.patch(`/notifications/${notificationId}/read`)
 }
 
+// Mark many notifications as read: by id, or everything up to a list cursor
+export const markNotificationsReadApi = (
+  body: { ids: string[] } | { before: string }
+) => {
+  return api.patch("/notifications/read", body)
+}
+
 // Get unread count
 export const getUnreadNotificationsCountApi = () => {
   return api.get("/notifications/unread-count")
@@ -0,0 +1,60 @@
+import { useAuthStore } from "../stores/auth"
+
+type PushMessage = { type: string; data?: any }
+
+const MAX_RETRY_DELAY = 30000
+
+// Open the /ws push socket and keep it open, reconnecting with backoff.
+// Returns a function that closes it for good.
+export const connectPush = (
+  onMessage: (message: PushMessage) => void,
+  onStatus: (connected: boolean) => void = () => {}
+) => {
+  const auth = useAuthStore()
+  const baseUrl = import.meta.env.VITE_API_URL.replace(/^http/, "ws")
+
+  let socket: WebSocket | null = null
+  let retryDelay = 1000
+  let retryTimer: ReturnType<typeof setTimeout> | null = null
+  let stopped = false
+
+  const open = () => {
+    if (stopped) return
+
+    if (!auth.accessToken) {
+      onStatus(false)
+      return
+    }
+
+    socket = new WebSocket(`${baseUrl}/ws?token=${encodeURIComponent(auth.accessToken)}`)
+
+    socket.onopen = () => {
+      retryDelay = 1000
+      onStatus(true)
+    }
+
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data)
+      if (message.type !== "ping") onMessage(message)
+    }
+
+    socket.onclose = async (event) => {
+      onStatus(false)
+      if (stopped) return
+
+      // 1008: the access token was rejected, most likely expired
+      if (event.code === 1008 && !(await auth.refresh())) return
+
+      retryTimer = setTimeout(open, retryDelay)
+      retryDelay = Math.min(retryDelay * 2, MAX_RETRY_DELAY)
+    }
+  }
+
+  open()
+
+  return () => {
+    stopped = true
+    if (retryTimer) clearTimeout(retryTimer)
+    socket?.close()
+  }
+}
@@ -10,4 +10,12 @@ export const markSignalsSeenApi = () => {
 
 export const sendSignalApi = () => {
   return api.post("/signals/send")
-}
\ No newline at end of file
+}
+
+export const getSignalStatsApi = (params: {
+  bucket?: "hour" | "day"
+  start?: string
+  end?: string
+} = {}) => {
+  return api.get("/signals/stats", { params })
+}